@@ -2,18 +2,55 @@ from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 import json
 import os
+from url_canonicalizer import canonical_url
+from url_classifier import classifier
 
 class BookmarksManager:
     def __init__(self):
         self.bookmarks = []
+        # canonical url -> bookmark, so every spelling of a page finds it
+        self.index = {}
         # Start with NO default bookmarks
         
     def add_bookmark(self, title, url):
+        key = canonical_url(url)
+        existing = self.index.get(key)
+        if existing is not None:
+            # Bookmarking the same page again just renames it
+            existing['title'] = title
+            return
         bookmark = {'title': title, 'url': url}
         self.bookmarks.append(bookmark)
+        self.index[key] = bookmark
         
     def get_bookmarks(self):
         return self.bookmarks
+
+    def get_bookmark(self, url):
+        return self.index.get(canonical_url(url))
+
+    def is_bookmarked(self, url):
+        return canonical_url(url) in self.index
         
     def remove_bookmark(self, url):
-        self.bookmarks = [b for b in self.bookmarks if b['url'] != url]
\ No newline at end of file
+        key = canonical_url(url)
+        if self.index.pop(key, None) is not None:
+            self.bookmarks = [b for b in self.bookmarks if canonical_url(b['url']) != key]
+
+    def remove_bookmarks(self, urls):
+        """Remove many bookmarks in one pass. Returns the number removed."""
+        keys = {canonical_url(url) for url in urls}
+        return self.remove_keys([k for k in keys if k in self.index])
+
+    def forget_site(self, host):
+        """Remove every bookmark on a site, subdomains included"""
+        matches = classifier.site_matcher(host)
+        return self.remove_keys([k for k in self.index if matches(k)])
+
+    def remove_keys(self, keys):
+        for key in keys:
+            del self.index[key]
+        if keys:
+            live = set(map(id, self.index.values()))
+            self.bookmarks = [b for b in self.bookmarks if id(b) in live]
+        return len(keys)
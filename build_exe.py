@@ -1,6 +1,7 @@
 import PyInstaller.__main__
 import os
 import shutil
+from build_landing import FONTS_DIR, build_bundle, fetch_fonts
 
 def build_executable():
     # Clean up previous builds
@@ -9,6 +10,11 @@ def build_executable():
     if os.path.exists('build'):
         shutil.rmtree('build')
         
+    # Offline landing page: fonts embedded, no font fetches, deferred scripts
+    if not os.path.isdir(FONTS_DIR):
+        fetch_fonts()
+    build_bundle()
+        
     PyInstaller.__main__.run([
         'main.py',
         '--name=SimpleBrowser',
@@ -0,0 +1,147 @@
+# build_landing.py (OFFLINE LANDING PAGE BUNDLE)
+import base64
+import os
+import re
+import sys
+import time
+
+TEMPLATE = "landing_page.html"
+BUNDLE = "landing_bundle.html"
+FONTS_DIR = os.path.join("assets", "fonts")
+FONTS_CSS_URL = "https://fonts.googleapis.com/css2?family=Inter:wght@300;500;700&display=swap"
+# Google only serves woff2 to browsers it recognises
+CHROME_UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+             "(KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+
+IMPORT_RE = re.compile(r"@import\s+url\([^)]*\)\s*;\s*")
+# Rules only needed once the user opens the (initially hidden) customize dialog
+NON_CRITICAL_MARKER = "/* ========= Modal internal layout ========= */"
+RESPONSIVE_MARKER = "/* Responsive tweaks */"
+
+
+def fetch_fonts():
+    """Download the Latin subset of Inter into assets/fonts (build time only)"""
+    import requests
+    response = requests.get(FONTS_CSS_URL, headers={'User-Agent': CHROME_UA}, timeout=30)
+    response.raise_for_status()
+
+    os.makedirs(FONTS_DIR, exist_ok=True)
+    # The CSS has one block per unicode-range subset; keep the "latin" ones
+    for block in re.findall(r"/\* latin \*/\s*@font-face\s*{[^}]*}", response.text):
+        weight = re.search(r"font-weight:\s*(\d+)", block).group(1)
+        url = re.search(r"url\((https://[^)]+\.woff2)\)", block).group(1)
+        font = requests.get(url, timeout=30)
+        font.raise_for_status()
+        path = os.path.join(FONTS_DIR, f"inter-latin-{weight}.woff2")
+        with open(path, 'wb') as f:
+            f.write(font.content)
+        print(f"Saved {path} ({len(font.content) // 1024} KB)")
+
+
+def font_face_css():
+    """@font-face rules with the local font files embedded as data URIs"""
+    rules = []
+    if not os.path.isdir(FONTS_DIR):
+        return ""
+    for filename in sorted(os.listdir(FONTS_DIR)):
+        match = re.match(r"inter-latin-(\d+)\.woff2$", filename)
+        if not match:
+            continue
+        with open(os.path.join(FONTS_DIR, filename), 'rb') as f:
+            data = base64.b64encode(f.read()).decode('ascii')
+        rules.append(
+            "@font-face{font-family:Inter;font-style:normal;font-display:swap;"
+            f"font-weight:{match.group(1)};src:url(data:font/woff2;base64,{data}) format('woff2')}}"
+        )
+    return "\n".join(rules)
+
+
+def data_uri(mime, text):
+    return f"data:{mime};base64," + base64.b64encode(text.encode('utf-8')).decode('ascii')
+
+
+def build_bundle(template=TEMPLATE, output=BUNDLE):
+    with open(template, 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    style_match = re.search(r"<style>(.*?)</style>", html, re.S)
+    css = IMPORT_RE.sub("", style_match.group(1))
+
+    # Split the stylesheet: above-the-fold rules stay inline, the rest loads late
+    critical, non_critical = css, ""
+    if NON_CRITICAL_MARKER in css:
+        critical, rest = css.split(NON_CRITICAL_MARKER, 1)
+        non_critical = NON_CRITICAL_MARKER + rest
+        # Media queries touch both halves, so they stay critical
+        if RESPONSIVE_MARKER in non_critical:
+            non_critical, responsive = non_critical.split(RESPONSIVE_MARKER, 1)
+            critical += RESPONSIVE_MARKER + responsive
+
+    head_css = f"<style>\n{font_face_css()}\n{critical}</style>"
+    if non_critical:
+        # media=print never blocks rendering; onload switches it on afterwards
+        head_css += (f'\n<link rel="stylesheet" href="{data_uri("text/css", non_critical)}" '
+                     'media="print" onload="this.media=\'all\'">')
+    html = html[:style_match.start()] + head_css + html[style_match.end():]
+
+    # Inline scripts become deferred scripts that run after parsing
+    def defer_script(match):
+        return f'<script defer src="{data_uri("text/javascript", match.group(1))}"></script>'
+    html = re.sub(r"<script>(.*?)</script>", defer_script, html, flags=re.S)
+
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(html)
+    print(f"Wrote {output} ({len(html) // 1024} KB)")
+
+
+def measure_first_paint(paths, runs=5):
+    """Load each page offscreen and report first-contentful-paint"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtWebEngineWidgets import QWebEngineView
+    from PyQt5.QtCore import QUrl, QEventLoop, QTimer
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    view = QWebEngineView()
+    view.resize(1200, 800)
+    view.show()
+
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        html = html.replace('url("assets/', f'url("file:///{os.path.abspath("assets")}/')
+        results = []
+        for _ in range(runs):
+            loop = QEventLoop()
+            start = time.perf_counter()
+            view.loadFinished.connect(loop.quit)
+            view.setHtml(html, QUrl("arc://newtab/"))
+            QTimer.singleShot(30000, loop.quit)
+            loop.exec_()
+            view.loadFinished.disconnect(loop.quit)
+            load_ms = (time.perf_counter() - start) * 1000
+
+            paint = {}
+            loop = QEventLoop()
+
+            def got_paint(value):
+                paint['fcp'] = value
+                loop.quit()
+            # Give the compositor a frame before reading paint timings
+            QTimer.singleShot(100, lambda: view.page().runJavaScript(
+                "(performance.getEntriesByName('first-contentful-paint')[0] || {}).startTime || -1",
+                got_paint))
+            loop.exec_()
+            results.append((paint.get('fcp', -1), load_ms))
+
+        fcp = sorted(r[0] for r in results)[len(results) // 2]
+        load = sorted(r[1] for r in results)[len(results) // 2]
+        print(f"{path}: first-contentful-paint {fcp:.0f} ms, loadFinished {load:.0f} ms (median of {runs})")
+
+
+if __name__ == "__main__":
+    if "--fetch-fonts" in sys.argv:
+        fetch_fonts()
+    build_bundle()
+    if "--measure" in sys.argv:
+        measure_first_paint([TEMPLATE, BUNDLE])
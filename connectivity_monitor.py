@@ -0,0 +1,144 @@
+# connectivity_monitor.py (CACHED ONLINE/OFFLINE STATE)
+from PyQt5.QtCore import *
+from concurrent.futures import ThreadPoolExecutor
+import ipaddress
+import os
+import threading
+import requests
+
+try:
+    from PyQt5.QtNetwork import QNetworkConfigurationManager
+except ImportError:
+    QNetworkConfigurationManager = None
+
+DEFAULT_PROBE_URL = "http://connectivitycheck.gstatic.com/generate_204"
+
+
+class ConnectivityMonitor(QObject):
+    """Keeps a cached online/offline flag so navigation can fail fast.
+
+    A cheap HTTP probe runs on a worker thread: every online_interval
+    seconds while online, and with exponential backoff while offline.
+    OS network change notifications and failed page loads trigger an
+    immediate re-probe.
+
+    A failed probe alone never means offline: a page load must have
+    failed too. A page that loads while the probe fails proves the probe
+    wrong (a blocked probe host, a proxy requests doesn't use, an
+    intranet without internet), and the probe is ignored from then until
+    the network changes.
+    """
+    online_changed = pyqtSignal(bool)
+    # Internal: carries probe results from the worker to the GUI thread
+    probe_finished = pyqtSignal(bool)
+
+    def __init__(self, probe_url=None, timeout=3.0, online_interval=60,
+                 min_backoff=1, max_backoff=60, parent=None):
+        super().__init__(parent)
+        self.probe_url = probe_url or os.environ.get("ARC_CONNECTIVITY_URL", DEFAULT_PROBE_URL)
+        self.timeout = timeout
+        self.online_interval = online_interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.backoff = min_backoff
+
+        # Assume online until a probe and a page load both say otherwise
+        self.online = True
+        self.probe_ok = True
+        self.page_failed = False
+        self.probe_unreliable = False
+        self.probing = False
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="connectivity")
+
+        self.probe_finished.connect(self.on_probe_finished)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.check_now)
+
+        self.network_manager = None
+        if QNetworkConfigurationManager is not None:
+            self.network_manager = QNetworkConfigurationManager(self)
+            self.network_manager.onlineStateChanged.connect(self.on_network_changed)
+
+    def start(self):
+        self.check_now()
+
+    def is_offline(self):
+        return not self.online
+
+    def on_network_changed(self, online):
+        # A new network may well answer the probe properly
+        self.probe_unreliable = False
+        self.check_now()
+
+    def check_now(self):
+        """Probe right away unless a probe is already running"""
+        with self.lock:
+            if self.probing:
+                return
+            self.probing = True
+        self.timer.stop()
+        self.executor.submit(self.run_probe)
+
+    def run_probe(self):
+        try:
+            response = requests.get(self.probe_url, timeout=self.timeout, allow_redirects=False)
+            # Captive portals answer the default probe with a redirect or a login page
+            if self.probe_url == DEFAULT_PROBE_URL:
+                ok = response.status_code == 204
+            else:
+                ok = 200 <= response.status_code < 300
+        except requests.RequestException:
+            ok = False
+        self.probe_finished.emit(ok)
+
+    def on_probe_finished(self, ok):
+        with self.lock:
+            self.probing = False
+        self.probe_ok = ok
+        if ok:
+            self.page_failed = False
+            self.backoff = self.min_backoff
+            self.timer.start(int(self.online_interval * 1000))
+        else:
+            self.timer.start(int(self.backoff * 1000))
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+        self.update_state()
+
+    def update_state(self):
+        online = self.probe_ok or self.probe_unreliable or not self.page_failed
+        if online != self.online:
+            self.online = online
+            self.online_changed.emit(online)
+
+    def report_failure(self):
+        """A page failed to load; confirm whether the network is down"""
+        self.page_failed = True
+        self.check_now()
+
+    def report_success(self):
+        """A non-local page loaded, so the network is up whatever the probe says"""
+        self.page_failed = False
+        if not self.probe_ok:
+            self.probe_unreliable = True
+        self.update_state()
+
+    def shutdown(self):
+        self.timer.stop()
+        self.executor.shutdown(wait=False)
+
+
+def is_local_url(url):
+    """True for hosts reachable without internet: localhost, LAN IPs, intranet names"""
+    host = QUrl(url).host().lower()
+    if not host:
+        return True
+    if host == "localhost" or host.endswith((".localhost", ".local", ".lan", ".internal")):
+        return True
+    try:
+        address = ipaddress.ip_address(host.strip("[]"))
+        return address.is_private or address.is_loopback or address.is_link_local
+    except ValueError:
+        # Single-label names like http://intranet/ resolve on the LAN
+        return "." not in host
@@ -0,0 +1,649 @@
+# downloads_manager.py (SEGMENTED, RESUMABLE DOWNLOADS)
+from PyQt5.QtWidgets import *
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+from PyQt5.QtWebEngineWidgets import QWebEngineDownloadItem
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+import time
+import requests
+
+STATE_SUFFIX = ".arcdownload"
+PART_SUFFIX = ".part"
+MIN_SEGMENT_SIZE = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+STATE_SAVE_INTERVAL = 1.0
+# ProfileCookies counts the store as loaded once cookies stop arriving for this long
+COOKIE_SETTLE_MS = 500
+
+
+class Download:
+    """What DownloadsDialog shows for one download: subclasses keep
+    dest_path, total_size, bytes_done, status, error and the timing fields
+    below up to date."""
+
+    @property
+    def filename(self):
+        return os.path.basename(self.dest_path)
+
+    def sample_speed(self):
+        """Update and return bytes/second since the previous sample"""
+        now = time.perf_counter()
+        last_time, last_bytes = self.last_sample
+        if now - last_time > 0:
+            instant = (self.bytes_done - last_bytes) / (now - last_time)
+            # Smooth so the displayed rate does not jitter
+            self.speed = instant if not self.speed else 0.7 * self.speed + 0.3 * instant
+        self.last_sample = (now, self.bytes_done)
+        return self.speed
+
+    def average_speed(self):
+        if not self.started_at:
+            return 0.0
+        elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        return (self.bytes_done - self.resumed_bytes) / elapsed if elapsed > 0 else 0.0
+
+    def progress(self):
+        if not self.total_size:
+            return 0
+        return int(self.bytes_done * 100 / self.total_size)
+
+
+class DownloadJob(Download):
+    """A single download, split into byte-range segments when the server allows it.
+
+    Progress is persisted next to the target file (<file>.arcdownload) so an
+    interrupted job can be rebuilt with from_state_file() and resumed.
+    """
+
+    def __init__(self, url, dest_path, segments=4, timeout=30, keep_state=True, headers=None, cookies=None):
+        self.url = url
+        # What the page's own request sent: Referer, User-Agent and the profile's cookies
+        self.headers = headers or {}
+        self.cookies = cookies
+        self.dest_path = dest_path
+        self.part_path = dest_path + PART_SUFFIX
+        self.state_path = dest_path + STATE_SUFFIX
+        self.max_segments = segments
+        self.timeout = timeout
+        # Off the record, nothing about the download may outlive the session
+        self.keep_state = keep_state
+
+        self.total_size = None
+        self.supports_ranges = False
+        self.segments = []  # [start, end, done] with end inclusive
+        self.bytes_done = 0
+        self.status = 'queued'
+        self.error = None
+
+        self.lock = threading.Lock()
+        self.state_lock = threading.Lock()
+        # Restored from a state file of a job that sent cookies; set cookies before starting it
+        self.needs_cookies = False
+        self.cancel_event = threading.Event()
+        # Set by a user cancel: partial data and state are deleted, not kept
+        self.discard = False
+        self.started_at = None
+        self.finished_at = None
+        self.resumed_bytes = 0
+        self.last_sample = (time.perf_counter(), 0)
+        self.speed = 0.0
+        self.last_state_save = 0.0
+
+    @classmethod
+    def from_state_file(cls, state_path):
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        job = cls(state['url'], state_path[:-len(STATE_SUFFIX)], segments=len(state['segments']) or 1,
+                  headers=state.get('headers'))
+        job.needs_cookies = state.get('cookies', False)
+        job.total_size = state.get('total_size')
+        job.supports_ranges = state.get('supports_ranges', False)
+        job.segments = [list(seg) for seg in state['segments']]
+        job.bytes_done = sum(seg[2] for seg in job.segments)
+        job.status = 'paused'
+        return job
+
+    def run(self):
+        """Run the download to completion on the calling thread"""
+        self.status = 'downloading'
+        self.started_at = time.perf_counter()
+        self.resumed_bytes = self.bytes_done
+        self.last_sample = (self.started_at, self.bytes_done)
+        try:
+            # Cancelled while queued, e.g. at shutdown: no network I/O at all
+            if self.cancel_event.is_set():
+                self.stop()
+                return
+            if not self.segments:
+                self.probe()
+                self.plan_segments()
+            if self.cancel_event.is_set():
+                self.stop()
+                return
+            if self.supports_ranges and self.total_size:
+                self.download_segments()
+            else:
+                self.download_stream()
+
+            if self.cancel_event.is_set():
+                self.stop()
+                return
+            os.replace(self.part_path, self.dest_path)
+            if os.path.exists(self.state_path):
+                os.remove(self.state_path)
+            self.status = 'completed'
+        except Exception as e:
+            if self.cancel_event.is_set():
+                self.stop()
+                return
+            self.error = str(e)
+            self.status = 'failed'
+            self.save_state()
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def probe(self):
+        """Find the file size and whether the server honours Range requests"""
+        try:
+            response = requests.head(self.url, headers=self.headers, cookies=self.cookies,
+                                     allow_redirects=True, timeout=self.timeout)
+            if response.ok:
+                length = response.headers.get('Content-Length')
+                self.total_size = int(length) if length and length.isdigit() else None
+                self.supports_ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+        except requests.RequestException:
+            self.total_size = None
+            self.supports_ranges = False
+
+    def plan_segments(self):
+        if not (self.supports_ranges and self.total_size):
+            self.segments = []
+            return
+        count = max(1, min(self.max_segments, self.total_size // MIN_SEGMENT_SIZE))
+        size = self.total_size // count
+        self.segments = []
+        for i in range(count):
+            start = i * size
+            end = self.total_size - 1 if i == count - 1 else start + size - 1
+            self.segments.append([start, end, 0])
+
+        # Preallocate so segments can write at their own offsets
+        with open(self.part_path, 'wb') as f:
+            f.truncate(self.total_size)
+        self.save_state()
+
+    def download_segments(self):
+        if not os.path.exists(self.part_path):
+            # Partial data went missing, start the segments over
+            with open(self.part_path, 'wb') as f:
+                f.truncate(self.total_size)
+            for seg in self.segments:
+                seg[2] = 0
+            self.bytes_done = 0
+
+        pending = [seg for seg in self.segments if seg[0] + seg[2] <= seg[1]]
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="download") as pool:
+            futures = [pool.submit(self.download_segment, seg) for seg in pending]
+            for future in futures:
+                future.result()
+        self.save_state()
+
+    def download_segment(self, seg):
+        start, end, done = seg
+        headers = dict(self.headers, Range=f"bytes={start + done}-{end}")
+        with requests.get(self.url, headers=headers, cookies=self.cookies, stream=True,
+                          timeout=self.timeout) as response:
+            if response.status_code != 206:
+                raise IOError(f"Server ignored range request (HTTP {response.status_code})")
+            with open(self.part_path, 'r+b') as f:
+                f.seek(start + done)
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if self.cancel_event.is_set():
+                        return
+                    f.write(chunk)
+                    with self.lock:
+                        seg[2] += len(chunk)
+                        self.bytes_done += len(chunk)
+                    self.maybe_save_state()
+        if start + seg[2] <= end and not self.cancel_event.is_set():
+            raise IOError(f"Segment {start}-{end} ended early")
+
+    def download_stream(self):
+        """Single-connection fallback for servers without Range support"""
+        self.bytes_done = 0
+        with requests.get(self.url, headers=self.headers, cookies=self.cookies, stream=True,
+                          timeout=self.timeout) as response:
+            response.raise_for_status()
+            if self.total_size is None:
+                length = response.headers.get('Content-Length')
+                self.total_size = int(length) if length and length.isdigit() else None
+            with open(self.part_path, 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if self.cancel_event.is_set():
+                        return
+                    f.write(chunk)
+                    self.bytes_done += len(chunk)
+
+    def maybe_save_state(self):
+        now = time.perf_counter()
+        if now - self.last_state_save >= STATE_SAVE_INTERVAL:
+            self.save_state()
+
+    def save_state(self):
+        # Only ranged downloads can be resumed, so only they keep state
+        if not self.segments or not self.keep_state:
+            return
+        with self.lock:
+            self.last_state_save = time.perf_counter()
+            state = {
+                'url': self.url,
+                'headers': self.headers,
+                # The cookies themselves stay in the profile; resume_pending() takes them from there
+                'cookies': self.cookies is not None or self.needs_cookies,
+                'total_size': self.total_size,
+                'supports_ranges': self.supports_ranges,
+                'segments': [list(seg) for seg in self.segments],
+            }
+        tmp_path = self.state_path + ".tmp"
+        with self.state_lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+
+    def cancel(self, discard=True):
+        """Stop the download; discard=False keeps it resumable (used at shutdown)"""
+        self.discard = discard
+        self.cancel_event.set()
+
+    def stop(self):
+        self.status = 'cancelled'
+        if self.discard:
+            self.discard_files()
+        else:
+            self.save_state()
+
+    def discard_files(self):
+        with self.state_lock:
+            for path in (self.part_path, self.state_path):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Error removing {path}: {e}")
+
+
+class BrowserDownload(Download):
+    """A download Chromium keeps, listed alongside the DownloadJobs.
+
+    Its state is copied from the item's signals, since the item goes away
+    with its profile (e.g. when an incognito window closes).
+    """
+    STATUSES = {
+        QWebEngineDownloadItem.DownloadRequested: 'queued',
+        QWebEngineDownloadItem.DownloadInProgress: 'downloading',
+        QWebEngineDownloadItem.DownloadCompleted: 'completed',
+        QWebEngineDownloadItem.DownloadCancelled: 'cancelled',
+        QWebEngineDownloadItem.DownloadInterrupted: 'failed',
+    }
+
+    def __init__(self, item):
+        self.item = item
+        self.url = item.url().toString()
+        self.dest_path = item.path()
+        self.total_size = item.totalBytes() if item.totalBytes() > 0 else None
+        self.bytes_done = item.receivedBytes()
+        self.status = 'queued'
+        self.error = None
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.resumed_bytes = self.bytes_done
+        self.last_sample = (self.started_at, self.bytes_done)
+        self.speed = 0.0
+        item.downloadProgress.connect(self.on_progress)
+        item.stateChanged.connect(self.on_state_changed)
+        item.destroyed.connect(self.on_destroyed)
+        self.on_state_changed(item.state())
+
+    def on_progress(self, received, total):
+        self.bytes_done = received
+        self.total_size = total if total > 0 else None
+
+    def on_state_changed(self, state):
+        if state == QWebEngineDownloadItem.DownloadInterrupted:
+            self.error = self.item.interruptReasonString()
+        self.status = self.STATUSES.get(state, self.status)
+        if self.status in ('completed', 'cancelled', 'failed'):
+            self.finished_at = time.perf_counter()
+
+    def on_destroyed(self):
+        self.item = None
+        if self.status in ('queued', 'downloading'):
+            self.status = 'cancelled'
+            self.finished_at = time.perf_counter()
+
+    def cancel(self, discard=True):
+        # Not at shutdown: Chromium ends its own downloads then
+        if discard and self.item is not None and self.status in ('queued', 'downloading'):
+            self.item.cancel()
+
+
+class ProfileCookies(QObject):
+    """A copy of a profile's cookies that requests can send.
+
+    QWebEngineCookieStore can't be read synchronously, so the copy is
+    kept up to date from its cookieAdded/cookieRemoved signals.
+    The store never says when loadAllCookies() is done, so the copy counts
+    as loaded once cookies stop arriving for COOKIE_SETTLE_MS.
+    """
+    loaded = pyqtSignal()
+
+    def __init__(self, cookie_store, parent=None):
+        super().__init__(parent)
+        self.jar = requests.cookies.RequestsCookieJar()
+        self.is_loaded = False
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(COOKIE_SETTLE_MS)
+        self.settle_timer.timeout.connect(self.on_settled)
+        cookie_store.cookieAdded.connect(self.on_cookie_added)
+        cookie_store.cookieRemoved.connect(self.on_cookie_removed)
+        cookie_store.loadAllCookies()
+        self.settle_timer.start()
+
+    def on_settled(self):
+        self.is_loaded = True
+        self.loaded.emit()
+
+    def when_loaded(self, callback):
+        if self.is_loaded:
+            callback()
+        else:
+            self.loaded.connect(callback)
+
+    @staticmethod
+    def name_of(cookie):
+        return bytes(cookie.name()).decode('utf-8', 'replace')
+
+    def on_cookie_added(self, cookie):
+        if not self.is_loaded:
+            self.settle_timer.start()
+        self.jar.set(self.name_of(cookie), bytes(cookie.value()).decode('utf-8', 'replace'),
+                     domain=cookie.domain(), path=cookie.path() or "/", secure=cookie.isSecure())
+
+    def on_cookie_removed(self, cookie):
+        try:
+            self.jar.clear(cookie.domain(), cookie.path() or "/", self.name_of(cookie))
+        except KeyError:
+            pass
+
+    def snapshot(self):
+        """A copy the download threads can use while the original keeps changing"""
+        return self.jar.copy()
+
+
+class DownloadsManager(QObject):
+    download_added = pyqtSignal(object)
+    download_finished = pyqtSignal(object)
+    # Internal: replay probe thread -> GUI thread, queued
+    replay_checked = pyqtSignal(object, object)
+
+    def __init__(self, download_dir=None, max_parallel=3, segments=4):
+        super().__init__()
+        if download_dir is None:
+            download_dir = QStandardPaths.writableLocation(QStandardPaths.DownloadLocation) or "downloads"
+        self.download_dir = download_dir
+        self.segments = segments
+        self.jobs = []
+        self.executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="downloads")
+
+        # Emit finished signals on the GUI thread
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(500)
+        self.poll_timer.timeout.connect(self.poll_jobs)
+        self.reported = set()
+        self.replay_checked.connect(self.on_replay_checked)
+
+    def attach_profile(self, profile, resumable=True):
+        """Route downloads from a QWebEngineProfile through this manager.
+
+        Downloads from a profile attached with resumable=False never write
+        resume state, so an interrupted one is simply lost. Returns the
+        profile's ProfileCookies, for resume_pending().
+        """
+        cookies = ProfileCookies(profile.cookieStore(), parent=profile)
+        profile.downloadRequested.connect(
+            lambda item: self.handle_download_request(item, profile, cookies, resumable))
+        return cookies
+
+    def handle_download_request(self, item, profile, cookies, resumable=True):
+        """Take large downloads over when a plain GET fetches the same file.
+
+        Chromium keeps every other download: blob: and data: URLs, small
+        or unsized responses (typical of generated files), and anything a
+        replayed request can't reproduce, such as a form POST or HTTP auth.
+        Those are listed as BrowserDownloads. The item is paused while a
+        HEAD with the page's cookies and headers checks that the replay
+        gets the same file.
+        """
+        url = item.url().toString()
+        if hasattr(item, 'setDownloadDirectory'):
+            item.setDownloadDirectory(self.download_dir)
+        item.accept()
+        if not url.startswith(("http://", "https://")) or item.totalBytes() < 2 * MIN_SEGMENT_SIZE:
+            self.track(BrowserDownload(item))
+            return
+        item.pause()
+        headers = {'User-Agent': profile.httpUserAgent()}
+        page = item.page() if hasattr(item, 'page') else None
+        if page is not None:
+            headers['Referer'] = page.url().toString(QUrl.FullyEncoded)
+        request = {'url': url, 'filename': os.path.basename(item.path()), 'size': item.totalBytes(),
+                   'headers': headers, 'cookies': cookies.snapshot(), 'keep_state': resumable}
+        threading.Thread(target=self.check_replay, args=(item, request), name="download-replay",
+                         daemon=True).start()
+
+    def check_replay(self, item, request):
+        try:
+            response = requests.head(request['url'], headers=request['headers'], cookies=request['cookies'],
+                                     allow_redirects=True, timeout=10)
+            replayable = (response.ok and response.headers.get('Content-Length') == str(request['size'])
+                          and response.headers.get('Accept-Ranges', '').lower() == 'bytes')
+        except requests.RequestException:
+            replayable = False
+        self.replay_checked.emit(item, request if replayable else None)
+
+    def on_replay_checked(self, item, request):
+        if request is None:
+            item.resume()
+            self.track(BrowserDownload(item))
+            return
+        # Fetch it ourselves so it gets parallel, resumable segments
+        item.cancel()
+        self.add_download(request['url'], request['filename'], keep_state=request['keep_state'],
+                          headers=request['headers'], cookies=request['cookies'])
+
+    def add_download(self, url, filename=None, keep_state=True, headers=None, cookies=None):
+        if not filename:
+            filename = os.path.basename(QUrl(url).path()) or "download"
+        os.makedirs(self.download_dir, exist_ok=True)
+        job = DownloadJob(url, self.unique_path(filename), segments=self.segments, keep_state=keep_state,
+                          headers=headers, cookies=cookies)
+        self.start_job(job)
+        return job
+
+    def unique_path(self, filename):
+        base, ext = os.path.splitext(filename)
+        path = os.path.join(self.download_dir, filename)
+        counter = 1
+        while os.path.exists(path) or os.path.exists(path + STATE_SUFFIX) or \
+                any(job.dest_path == path for job in self.jobs):
+            path = os.path.join(self.download_dir, f"{base} ({counter}){ext}")
+            counter += 1
+        return path
+
+    def start_job(self, job):
+        job.status = 'queued'
+        self.executor.submit(job.run)
+        self.track(job)
+
+    def track(self, download):
+        self.jobs.append(download)
+        self.download_added.emit(download)
+        self.poll_timer.start()
+
+    def resume_pending(self, cookies=None):
+        """Resume downloads left unfinished by a previous session.
+
+        Jobs that sent the profile's cookies wait until cookies (that
+        profile's ProfileCookies) has loaded and go out with its copy.
+        Without cookies they are left alone: replayed without them, a
+        range request could splice a login page into the file.
+        """
+        if not os.path.isdir(self.download_dir):
+            return
+        waiting = []
+        for filename in os.listdir(self.download_dir):
+            if filename.endswith(STATE_SUFFIX):
+                try:
+                    job = DownloadJob.from_state_file(os.path.join(self.download_dir, filename))
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Skipping unreadable download state {filename}: {e}")
+                    continue
+                if not job.needs_cookies:
+                    self.start_job(job)
+                elif cookies is None:
+                    print(f"Not resuming {job.filename}: it needs cookies from its profile")
+                else:
+                    waiting.append(job)
+        if waiting:
+            cookies.when_loaded(lambda: self.resume_with_cookies(waiting, cookies))
+
+    def resume_with_cookies(self, jobs, cookies):
+        for job in jobs:
+            job.cookies = cookies.snapshot()
+            self.start_job(job)
+
+    def cancel(self, job):
+        """Cancel for good: the job won't come back on the next launch"""
+        job.cancel()
+        if isinstance(job, DownloadJob) and job.status == 'failed':
+            # Not running, so nothing else will clean up its resume state
+            job.status = 'cancelled'
+            job.discard_files()
+
+    def retry(self, job):
+        # Chromium can't restart a download it has given up on
+        if isinstance(job, DownloadJob) and job.status in ('failed', 'cancelled'):
+            job.cancel_event.clear()
+            job.discard = False
+            job.error = None
+            self.jobs.remove(job)
+            self.reported.discard(id(job))
+            self.start_job(job)
+
+    def poll_jobs(self):
+        active = False
+        for job in self.jobs:
+            if job.status in ('queued', 'downloading'):
+                job.sample_speed()
+                active = True
+            elif id(job) not in self.reported:
+                self.reported.add(id(job))
+                self.download_finished.emit(job)
+        if not active:
+            self.poll_timer.stop()
+
+    def shutdown(self):
+        """Stop active downloads, keeping their state for the next session"""
+        for job in self.jobs:
+            job.cancel(discard=False)
+        # Queued jobs never start; running ones stop at their next chunk
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024.0
+
+
+class DownloadsDialog(QDialog):
+    def __init__(self, downloads_manager, parent=None):
+        super().__init__(parent)
+        self.downloads_manager = downloads_manager
+        self.init_ui()
+
+    def init_ui(self):
+        self.setWindowTitle("Downloads")
+        self.setGeometry(200, 200, 640, 400)
+
+        layout = QVBoxLayout()
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["File", "Progress", "Speed", "Status"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        action_layout = QHBoxLayout()
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.clicked.connect(self.cancel_selected)
+        retry_btn = QPushButton("Retry")
+        retry_btn.clicked.connect(self.retry_selected)
+        open_btn = QPushButton("Open Folder")
+        open_btn.clicked.connect(self.open_folder)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        action_layout.addWidget(cancel_btn)
+        action_layout.addWidget(retry_btn)
+        action_layout.addWidget(open_btn)
+        action_layout.addStretch()
+        action_layout.addWidget(close_btn)
+        layout.addLayout(action_layout)
+
+        self.setLayout(layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(500)
+        self.refresh()
+
+    def refresh(self):
+        jobs = self.downloads_manager.jobs
+        self.table.setRowCount(len(jobs))
+        for row, job in enumerate(jobs):
+            total = format_bytes(job.total_size) if job.total_size else "?"
+            if job.status == 'downloading':
+                speed = f"{format_bytes(job.speed)}/s"
+            elif job.status == 'completed':
+                speed = f"{format_bytes(job.average_speed())}/s avg"
+            else:
+                speed = ""
+            status = job.status if not job.error else f"{job.status}: {job.error}"
+            values = [job.filename, f"{job.progress()}% of {total}", speed, status]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+
+    def selected_job(self):
+        row = self.table.currentRow()
+        jobs = self.downloads_manager.jobs
+        return jobs[row] if 0 <= row < len(jobs) else None
+
+    def cancel_selected(self):
+        job = self.selected_job()
+        if job:
+            self.downloads_manager.cancel(job)
+
+    def retry_selected(self):
+        job = self.selected_job()
+        if job:
+            self.downloads_manager.retry(job)
+
+    def open_folder(self):
+        QDesktopServices.openUrl(QUrl.fromLocalFile(self.downloads_manager.download_dir))
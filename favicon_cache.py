@@ -0,0 +1,119 @@
+# favicon_cache.py (HOST-KEYED FAVICON CACHE)
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+from collections import OrderedDict
+import base64
+import os
+from io_executor import io_executor
+
+
+class FaviconCache(QObject):
+    """Favicons keyed by host, fed from QWebEngineView.iconChanged.
+
+    Decoded QIcons live in a bounded LRU in memory with PNG copies on disk,
+    so tabs, the bookmarks bar and landing pages can show icons without
+    ever fetching one themselves. Lookups never wait on the disk either: a
+    miss starts a background read, and icon_updated follows once the icon
+    is in memory.
+    """
+    icon_updated = pyqtSignal(str)
+    # Internal: a background read finished (empty when there is no icon on disk)
+    icon_read = pyqtSignal(str, bytes)
+
+    def __init__(self, cache_dir="cache/favicons", capacity=256, icon_size=32):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.capacity = capacity
+        self.icon_size = icon_size
+        # host -> (QIcon, data: URI)
+        self.icons = OrderedDict()
+        # Hosts with no icon on disk, so misses don't read again
+        self.missing = OrderedDict()
+        self.reading = set()
+        self.icon_read.connect(self.on_icon_read)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def host_for(url):
+        if isinstance(url, QUrl):
+            return url.host().lower()
+        return QUrl(url).host().lower()
+
+    def path_for(self, host):
+        safe = "".join(c if c.isalnum() or c in '.-' else '_' for c in host)
+        return os.path.join(self.cache_dir, f"{safe}.png")
+
+    def remember(self, store, host, value):
+        store[host] = value
+        store.move_to_end(host)
+        if len(store) > self.capacity:
+            store.popitem(last=False)
+
+    def store(self, url, icon):
+        """Save the icon a page reported for its host"""
+        host = self.host_for(url)
+        if not host or icon is None or icon.isNull():
+            return
+        pixmap = icon.pixmap(self.icon_size, self.icon_size)
+        if pixmap.isNull():
+            return
+        # Pages report their icon on every visit; only new or changed icons are written
+        cached = self.icon_for_url(url)
+        if cached is not None and cached.pixmap(self.icon_size, self.icon_size).toImage() == pixmap.toImage():
+            return
+        buffer = QBuffer()
+        buffer.open(QIODevice.WriteOnly)
+        if not pixmap.save(buffer, "PNG"):
+            print(f"Error encoding favicon for {host}")
+            return
+        data = bytes(buffer.data())
+        self.remember(self.icons, host, (QIcon(pixmap), self.data_uri(data)))
+        self.missing.pop(host, None)
+        io_executor.write_bytes(self.path_for(host), data)
+        self.icon_updated.emit(host)
+
+    @staticmethod
+    def data_uri(data):
+        return "data:image/png;base64," + base64.b64encode(data).decode('ascii')
+
+    def lookup(self, url):
+        host = self.host_for(url)
+        if not host:
+            return None
+        entry = self.icons.get(host)
+        if entry is not None:
+            self.icons.move_to_end(host)
+        elif host not in self.missing and host not in self.reading:
+            self.reading.add(host)
+            io_executor.submit_read(self.read_icon, host)
+        return entry
+
+    def read_icon(self, host):
+        try:
+            with open(self.path_for(host), 'rb') as f:
+                data = f.read()
+        except OSError:
+            data = b""
+        self.icon_read.emit(host, data)
+
+    def on_icon_read(self, host, data):
+        self.reading.discard(host)
+        # A page may have stored a newer icon while the read was in flight
+        if host in self.icons:
+            return
+        pixmap = QPixmap()
+        if not data or not pixmap.loadFromData(data, "PNG"):
+            self.remember(self.missing, host, True)
+            return
+        self.remember(self.icons, host, (QIcon(pixmap), self.data_uri(data)))
+        self.icon_updated.emit(host)
+
+    def icon_for_url(self, url):
+        """Cached QIcon for the URL's host, or None. Never hits the network or waits on the disk."""
+        entry = self.lookup(url)
+        return entry[0] if entry else None
+
+    def data_uri_for_url(self, url):
+        """Cached icon as a data: URI for HTML pages, or empty string"""
+        entry = self.lookup(url)
+        return entry[1] if entry else ""
@@ -0,0 +1,130 @@
+# feeds_service.py (WEATHER AND NEWS FOR THE LANDING PAGE)
+from PyQt5.QtCore import *
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import threading
+import time
+import requests
+from dotenv import load_dotenv
+from io_executor import io_executor
+
+WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+NEWS_URL = "https://newsapi.org/v2/top-headlines"
+
+WEATHER_ICONS = {
+    'Clear': '☀️', 'Clouds': '☁️', 'Rain': '🌧️', 'Drizzle': '🌦️',
+    'Thunderstorm': '⛈️', 'Snow': '❄️', 'Mist': '🌫️', 'Fog': '🌫️', 'Haze': '🌫️',
+}
+
+
+class FeedsService(QObject):
+    """Fetches weather and news once for every landing tab.
+
+    Cached values are returned immediately, even when stale; a stale or
+    missing entry triggers one background refresh whose result is emitted
+    through weather_updated/news_updated on the GUI thread.
+    """
+    weather_updated = pyqtSignal(dict)
+    news_updated = pyqtSignal(list)
+
+    def __init__(self, cache_file="cache/feeds.json", weather_ttl=600, news_ttl=1800,
+                 weather_url=None, news_url=None, timeout=10):
+        super().__init__()
+        load_dotenv()
+        self.weather_key = os.environ.get("OPENWEATHER_API_KEY", "")
+        self.news_key = os.environ.get("NEWS_API_KEY", "")
+        self.city = os.environ.get("WEATHER_CITY", "Manipal,IN")
+        self.country = os.environ.get("NEWS_COUNTRY", "in")
+        self.weather_url = weather_url or os.environ.get("WEATHER_API_URL", WEATHER_URL)
+        self.news_url = news_url or os.environ.get("NEWS_API_URL", NEWS_URL)
+        self.timeout = timeout
+        self.ttls = {'weather': weather_ttl, 'news': news_ttl}
+
+        self.cache_file = cache_file
+        self.cache = self.load_cache()
+        self.lock = threading.Lock()
+        self.in_flight = set()
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="feeds")
+
+    def load_cache(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_cache(self):
+        with self.lock:
+            data = json.dumps(self.cache)
+        io_executor.write_text(self.cache_file, data)
+
+    def get_weather(self):
+        """Cached weather dict (possibly stale) or None; refreshes in the background"""
+        return self.get('weather', self.fetch_weather if self.weather_key else None)
+
+    def get_news(self):
+        """Cached list of {'title', 'url'} (possibly stale) or None"""
+        return self.get('news', self.fetch_news if self.news_key else None)
+
+    def get(self, name, fetcher):
+        with self.lock:
+            entry = self.cache.get(name)
+        if fetcher and (entry is None or time.time() - entry['fetched_at'] > self.ttls[name]):
+            self.refresh(name, fetcher)
+        return entry['data'] if entry else None
+
+    def refresh(self, name, fetcher):
+        # One request per feed no matter how many tabs are asking
+        with self.lock:
+            if name in self.in_flight:
+                return
+            self.in_flight.add(name)
+        self.executor.submit(self.run_fetch, name, fetcher)
+
+    def run_fetch(self, name, fetcher):
+        try:
+            data = fetcher()
+        except (requests.RequestException, ValueError, KeyError) as e:
+            print(f"Error refreshing {name}: {e}")
+            return
+        finally:
+            with self.lock:
+                self.in_flight.discard(name)
+
+        with self.lock:
+            self.cache[name] = {'fetched_at': time.time(), 'data': data}
+        self.save_cache()
+
+        # Signals emitted here are queued onto the GUI thread
+        if name == 'weather':
+            self.weather_updated.emit(data)
+        else:
+            self.news_updated.emit(data)
+
+    def fetch_weather(self):
+        response = requests.get(self.weather_url, timeout=self.timeout, params={
+            'q': self.city, 'appid': self.weather_key, 'units': 'metric',
+        })
+        response.raise_for_status()
+        payload = response.json()
+        condition = payload['weather'][0]['main']
+        return {
+            'icon': WEATHER_ICONS.get(condition, '🌡️'),
+            'temp': round(payload['main']['temp']),
+            'desc': payload['weather'][0].get('description', condition).capitalize(),
+            'location': payload.get('name', self.city),
+        }
+
+    def fetch_news(self):
+        response = requests.get(self.news_url, timeout=self.timeout, params={
+            'country': self.country, 'pageSize': 8, 'apiKey': self.news_key,
+        })
+        response.raise_for_status()
+        return [
+            {'title': article.get('title') or 'Untitled', 'url': article.get('url') or ''}
+            for article in response.json().get('articles', [])
+        ]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,264 @@
+# history_import.py (HISTORY FROM CHROMIUM AND FIREFOX PROFILES)
+from PyQt5.QtCore import *
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Chromium counts microseconds from 1601-01-01, Firefox from the Unix epoch
+CHROMIUM_EPOCH_OFFSET = 11644473600
+# Transition types meaning "the user typed this address"
+CHROMIUM_TYPED = 1  # core type, in the low byte of visits.transition
+FIREFOX_TYPED = 2   # moz_historyvisits.visit_type
+
+SOURCES = {
+    'chromium': {
+        'count': "SELECT COUNT(*) FROM visits WHERE visit_time > ?",
+        'rows': ("SELECT urls.url, urls.title, visits.visit_time, visits.transition & 255 = ? "
+                 "FROM visits JOIN urls ON urls.id = visits.url "
+                 "WHERE visits.visit_time > ? ORDER BY visits.visit_time"),
+        'typed': CHROMIUM_TYPED,
+        'to_unix': lambda t: t / 1e6 - CHROMIUM_EPOCH_OFFSET,
+        'from_unix': lambda t: int((t + CHROMIUM_EPOCH_OFFSET) * 1e6),
+    },
+    'firefox': {
+        'count': "SELECT COUNT(*) FROM moz_historyvisits WHERE visit_date > ?",
+        'rows': ("SELECT moz_places.url, moz_places.title, moz_historyvisits.visit_date, "
+                 "moz_historyvisits.visit_type = ? "
+                 "FROM moz_historyvisits JOIN moz_places ON moz_places.id = moz_historyvisits.place_id "
+                 "WHERE moz_historyvisits.visit_date > ? ORDER BY moz_historyvisits.visit_date"),
+        'typed': FIREFOX_TYPED,
+        'to_unix': lambda t: t / 1e6,
+        'from_unix': lambda t: int(t * 1e6),
+    },
+}
+
+
+def copy_database(path):
+    """Copy a database (and its WAL) aside, so a running browser's lock never blocks us"""
+    directory = tempfile.mkdtemp(prefix="arc-import-")
+    copy = os.path.join(directory, os.path.basename(path))
+    shutil.copyfile(path, copy)
+    for suffix in ("-wal", "-journal"):
+        if os.path.exists(path + suffix):
+            shutil.copyfile(path + suffix, copy + suffix)
+    return copy
+
+
+def detect_source(connection):
+    tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if {'moz_places', 'moz_historyvisits'} <= tables:
+        return 'firefox'
+    if {'urls', 'visits'} <= tables:
+        return 'chromium'
+    return None
+
+
+def read_visits(path, since=0.0, batch_size=5000):
+    """Yield (source, total, visits, rows) batches in time order.
+
+    visits are (url, title, visit_time, typed) tuples for the web pages
+    among the batch's rows.
+
+    Reads from a read-only copy of the database, fetching one batch at a
+    time, and skips visits at or before since (a Unix time) so a second
+    import only picks up what is new.
+    """
+    copy = copy_database(path)
+    try:
+        connection = sqlite3.connect(f"file:{copy}?mode=ro", uri=True)
+        try:
+            source = detect_source(connection)
+            if source is None:
+                raise ValueError(f"{os.path.basename(path)} is not a Chromium or Firefox history database")
+            queries = SOURCES[source]
+            to_unix = queries['to_unix']
+            since_raw = queries['from_unix'](since)
+            total = connection.execute(queries['count'], (since_raw,)).fetchone()[0]
+            cursor = connection.execute(queries['rows'], (queries['typed'], since_raw))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield source, total, [(url, title or "", to_unix(t), bool(typed))
+                                      for url, title, t, typed in rows
+                                      if url.startswith(("http://", "https://"))], len(rows)
+        finally:
+            connection.close()
+    finally:
+        shutil.rmtree(os.path.dirname(copy), ignore_errors=True)
+
+
+class HistoryImporter(QObject):
+    """Imports a history database on a worker thread.
+
+    The worker reads batches and hands them to the GUI thread, where each
+    is inserted into HistoryManager in one call. At most max_pending
+    batches are in flight, so memory stays bounded however large the
+    source is. Like the rest of HistoryManager, imported visits are not
+    written to disk.
+    """
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(dict)
+    # Internal: worker -> GUI thread, queued
+    batch_ready = pyqtSignal(list, int, int)
+    read_finished = pyqtSignal(dict)
+
+    def __init__(self, history_manager, batch_size=2000, max_pending=8, parent=None):
+        super().__init__(parent)
+        self.history_manager = history_manager
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.slots = None
+        self.cancelled = False
+        self.batch_ready.connect(self.insert_batch)
+        self.read_finished.connect(self.finish)
+        self.report = {}
+
+    def start(self, path, since=0.0):
+        self.report = {'path': path, 'source': None, 'total': 0, 'read': 0, 'imported': 0,
+                       'last_visit': since, 'error': None, 'started_at': time.perf_counter()}
+        self.slots = threading.Semaphore(self.max_pending)
+        self.cancelled = False
+        threading.Thread(target=self.run, args=(path, since), name="history-import", daemon=True).start()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self, path, since):
+        summary = {}
+        try:
+            for source, total, visits, rows in read_visits(path, since, self.batch_size):
+                summary.update(source=source, total=total)
+                self.slots.acquire()
+                if self.cancelled:
+                    break
+                self.batch_ready.emit(visits, rows, total)
+        except (sqlite3.Error, OSError, ValueError) as e:
+            summary['error'] = str(e)
+        self.read_finished.emit(summary)
+
+    def insert_batch(self, visits, rows, total):
+        try:
+            if not self.cancelled:
+                self.report['imported'] += self.history_manager.add_entries(visits)
+                if visits:
+                    self.report['last_visit'] = max(self.report['last_visit'], visits[-1][2])
+            self.report['read'] += rows
+            self.report['total'] = total
+            self.progress.emit(self.report['read'], total)
+        finally:
+            self.slots.release()
+
+    def finish(self, summary):
+        self.report.update(summary)
+        self.report['cancelled'] = self.cancelled
+        self.report['seconds'] = round(time.perf_counter() - self.report.pop('started_at'), 2)
+        self.finished.emit(self.report)
+
+
+def default_history_files():
+    """History databases of browsers installed for this user"""
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        local = os.environ.get("LOCALAPPDATA", "")
+        roaming = os.environ.get("APPDATA", "")
+        chromium = [os.path.join(local, "Google", "Chrome", "User Data"),
+                    os.path.join(local, "Microsoft", "Edge", "User Data"),
+                    os.path.join(local, "BraveSoftware", "Brave-Browser", "User Data")]
+        firefox = os.path.join(roaming, "Mozilla", "Firefox", "Profiles")
+    elif sys.platform == "darwin":
+        support = os.path.join(home, "Library", "Application Support")
+        chromium = [os.path.join(support, "Google", "Chrome"),
+                    os.path.join(support, "Microsoft Edge"),
+                    os.path.join(support, "BraveSoftware", "Brave-Browser")]
+        firefox = os.path.join(support, "Firefox", "Profiles")
+    else:
+        config = os.path.join(home, ".config")
+        chromium = [os.path.join(config, "google-chrome"), os.path.join(config, "chromium"),
+                    os.path.join(config, "microsoft-edge"), os.path.join(config, "BraveSoftware", "Brave-Browser")]
+        firefox = os.path.join(home, ".mozilla", "firefox")
+
+    found = []
+    for root in chromium:
+        path = os.path.join(root, "Default", "History")
+        if os.path.isfile(path):
+            found.append(path)
+    if os.path.isdir(firefox):
+        for profile in sorted(os.listdir(firefox)):
+            path = os.path.join(firefox, profile, "places.sqlite")
+            if os.path.isfile(path):
+                found.append(path)
+    return found
+
+
+def make_test_database(path, source, visits=500000, pages=50000, days=365):
+    """A minimal Chromium or Firefox history database with synthetic visits"""
+    import random
+
+    rng = random.Random(7)
+    now = time.time()
+    connection = sqlite3.connect(path)
+    if source == 'chromium':
+        connection.executescript("""
+            CREATE TABLE urls (id INTEGER PRIMARY KEY, url TEXT, title TEXT);
+            CREATE TABLE visits (id INTEGER PRIMARY KEY, url INTEGER, visit_time INTEGER, transition INTEGER);
+            CREATE INDEX visits_time_index ON visits (visit_time);
+        """)
+        place_sql = "INSERT INTO urls (id, url, title) VALUES (?, ?, ?)"
+        visit_sql = "INSERT INTO visits (url, visit_time, transition) VALUES (?, ?, ?)"
+    else:
+        connection.executescript("""
+            CREATE TABLE moz_places (id INTEGER PRIMARY KEY, url TEXT, title TEXT);
+            CREATE TABLE moz_historyvisits (id INTEGER PRIMARY KEY, place_id INTEGER, visit_date INTEGER,
+                                            visit_type INTEGER);
+            CREATE INDEX moz_historyvisits_dateindex ON moz_historyvisits (visit_date);
+        """)
+        place_sql = "INSERT INTO moz_places (id, url, title) VALUES (?, ?, ?)"
+        visit_sql = "INSERT INTO moz_historyvisits (place_id, visit_date, visit_type) VALUES (?, ?, ?)"
+    from_unix = SOURCES[source]['from_unix']
+    typed = SOURCES[source]['typed']
+    connection.executemany(place_sql, ((i, f"https://www.site{i % 5000}.com/page{i}?utm_source=x",
+                                        f"Page {i}") for i in range(1, pages + 1)))
+    connection.executemany(visit_sql, ((rng.randint(1, pages), from_unix(now - rng.random() * days * 86400),
+                                        typed if rng.random() < 0.1 else 0) for _ in range(visits)))
+    connection.commit()
+    connection.close()
+
+
+def benchmark(visits=500000):
+    """Import 500k visits from each browser format into a fresh HistoryManager"""
+    from history_manager import HistoryManager
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    directory = tempfile.mkdtemp(prefix="arc-import-bench-")
+    try:
+        for source, filename in (('chromium', "History"), ('firefox', "places.sqlite")):
+            path = os.path.join(directory, filename)
+            make_test_database(path, source, visits)
+            manager = HistoryManager()
+            importer = HistoryImporter(manager)
+            loop = QEventLoop()
+            result = {}
+            importer.finished.connect(lambda report: (result.update(report), loop.quit()))
+            importer.start(path)
+            loop.exec_()
+            print(f"{source}: imported {result['imported']:,} of {result['total']:,} visits "
+                  f"in {result['seconds']} s ({result['imported'] / max(result['seconds'], 1e-9):,.0f}/s), "
+                  f"{len(manager.site_stats):,} pages, "
+                  f"at most {importer.max_pending * importer.batch_size:,} rows in flight, "
+                  f"store {manager.measure()['bytes'] / (1024 * 1024):.0f} MB")
+            importer.start(path, since=result['last_visit'])
+            loop.exec_()
+            print(f"  re-import: {result['imported']:,} new visits in {result['seconds']} s")
+            ordered = all(a['visit_time'] <= b['visit_time'] for a, b in zip(manager.history, manager.history[1:]))
+            print(f"  history sorted: {ordered}, error: {result['error']}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark()
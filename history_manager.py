@@ -1,17 +1,446 @@
+import bisect
+import heapq
+import itertools
+import math
+import sys
+import time
+from url_canonicalizer import canonical_url
+from url_classifier import classifier
+
+# A visit's weight halves every FRECENCY_HALF_LIFE seconds
+FRECENCY_HALF_LIFE = 7 * 24 * 3600
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+
 class HistoryManager:
+    """Raw visits in visit_time order, aggregated into one row per page.
+
+    A page row (site_stats) holds the visit and typed counts, first and
+    last visit and the frecency score. Raw visits older than the retention
+    age are expired into their rows by compaction(), so the list stays
+    bounded while top sites still remember old favourites.
+
+    Bulk deletes are set-based: each one makes a single pass (or a slice
+    for time ranges), then adjusts only the rows it touched.
+
+    Indexes built from the raw visits (e.g. search suggestions) register
+    with add_listener() and are told about every visit added or removed,
+    so they never need to rescan.
+    """
+
     def __init__(self):
         self.history = []
-        
-    def add_entry(self, url, title):
+        # canonical url -> running frecency stats, updated on every visit
+        self.site_stats = {}
+        self.ids = itertools.count(1)
+        self.listeners = []
+        # history database path -> newest visit imported from it. Kept here, in
+        # memory with the visits it describes, so it never outlives them
+        self.imported = {}
+        # Highest visit id whose strings compaction has already shared
+        self.compacted_through = 0
+
+    def add_entry(self, url, title, visit_time=None, typed=False):
+        now = time.time() if visit_time is None else visit_time
+        key = canonical_url(url)
         entry = {
+            'id': next(self.ids),
             'url': url,
             'title': title,
-            'timestamp': 'Now'
+            'visit_time': now,
+            'key': key,
+            'typed': typed
         }
-        self.history.append(entry)
-        
+        if self.history and now < self.history[-1]['visit_time']:
+            # Keep the list sorted so time ranges are a slice
+            bisect.insort(self.history, entry, key=visit_time_of)
+        else:
+            self.history.append(entry)
+        self.update_site_stats(key, url, title, now, typed)
+        self.notify('visits_added', [entry])
+        return entry
+
+    def add_entries(self, visits):
+        """Insert (url, title, visit_time, typed) visits sorted by time, e.g. an import.
+
+        The batch goes in with one slice assignment (merged with any
+        visits it overlaps) instead of one insort per visit.
+        """
+        entries = []
+        for url, title, visit_time, typed in visits:
+            key = canonical_url(url)
+            entries.append({'id': next(self.ids), 'url': url, 'title': title,
+                            'visit_time': visit_time, 'key': key, 'typed': typed})
+            self.update_site_stats(key, url, title, visit_time, typed)
+        if not entries:
+            return 0
+        lo = bisect.bisect_right(self.history, entries[0]['visit_time'], key=visit_time_of)
+        hi = bisect.bisect_right(self.history, entries[-1]['visit_time'], key=visit_time_of)
+        if lo == hi:
+            self.history[lo:lo] = entries
+        else:
+            self.history[lo:hi] = list(heapq.merge(self.history[lo:hi], entries, key=visit_time_of))
+        self.notify('visits_added', entries)
+        return len(entries)
+
+    def add_listener(self, listener):
+        """Call listener.visits_added(entries), visits_removed(entries) and
+        history_cleared() on every change to the raw visits"""
+        self.listeners.append(listener)
+
+    def notify(self, event, *args):
+        for listener in self.listeners:
+            getattr(listener, event)(*args)
+
+    def update_site_stats(self, key, url, title, now, typed=False):
+        stats = self.site_stats.get(key)
+        if stats is None:
+            self.site_stats[key] = {'url': url, 'title': title, 'visits': 1, 'typed': int(typed),
+                                    'score': 1.0, 'first_visit': now, 'last_visit': now}
+            return
+        stats['first_visit'] = min(stats['first_visit'], now)
+        stats['typed'] += typed
+        if now >= stats['last_visit']:
+            # Decay the old score to now, then count this visit
+            stats['score'] = stats['score'] * decay(now - stats['last_visit']) + 1.0
+            stats['last_visit'] = now
+        else:
+            # An older visit (e.g. imported) counts at its decayed weight
+            stats['score'] += decay(stats['last_visit'] - now)
+        stats['visits'] += 1
+        if title:
+            stats['title'] = title
+
+    def frecency(self, stats, now=None):
+        if now is None:
+            now = time.time()
+        return stats['score'] * decay(now - stats['last_visit'])
+
+    def get_top_sites(self, limit=8):
+        now = time.time()
+        top = heapq.nlargest(limit, self.site_stats.values(), key=lambda s: self.frecency(s, now))
+        return [{'url': s['url'], 'title': s['title'] or s['url'], 'visits': s['visits']} for s in top]
+
+    def get_site_stats(self, url):
+        """Visit stats for any spelling of a URL, or None"""
+        return self.site_stats.get(canonical_url(url))
+
     def get_history(self):
         return self.history
-        
+
+    def get_recent(self, limit=1000):
+        """Newest visits first, for display"""
+        return [dict(e, timestamp=time.strftime('%Y-%m-%d %H:%M', time.localtime(e['visit_time'])))
+                for e in self.history[:-limit - 1:-1]]
+
     def clear_history(self):
-        self.history.clear()
\ No newline at end of file
+        self.history.clear()
+        self.site_stats.clear()
+        self.imported.clear()
+        self.notify('history_cleared')
+
+    # ----- bulk deletes -----
+
+    def delete_range(self, start, end=None):
+        """Delete visits with start <= visit_time < end. Returns the number removed."""
+        lo = bisect.bisect_left(self.history, start, key=visit_time_of)
+        hi = len(self.history) if end is None else bisect.bisect_left(self.history, end, key=visit_time_of)
+        if lo >= hi:
+            return 0
+        removed = self.history[lo:hi]
+        del self.history[lo:hi]
+        self.discount(removed)
+        self.notify('visits_removed', removed)
+        return len(removed)
+
+    def delete_recent(self, seconds):
+        """Delete the last hour/day/week etc. of history"""
+        return self.delete_range(time.time() - seconds)
+
+    def delete_entries(self, ids):
+        """Delete visits by id in one pass"""
+        ids = set(ids)
+        if not ids:
+            return 0
+        kept = []
+        removed = []
+        for entry in self.history:
+            (removed if entry['id'] in ids else kept).append(entry)
+        if removed:
+            self.history = kept
+            self.discount(removed)
+            self.notify('visits_removed', removed)
+        return len(removed)
+
+    def forget_site(self, host):
+        """Delete every visit to a site, subdomains included"""
+        matches = classifier.site_matcher(host)
+        # Every visit of these pages goes, so their stats just go too
+        doomed = {key for key in self.site_stats if matches(key)}
+        if not doomed:
+            return 0
+        kept = []
+        removed = []
+        for entry in self.history:
+            (removed if entry['key'] in doomed else kept).append(entry)
+        self.history = kept
+        for key in doomed:
+            del self.site_stats[key]
+        self.notify('visits_removed', removed)
+        return len(removed)
+
+    def discount(self, removed):
+        """Take removed visits out of their pages' frecency.
+
+        Scores are anchored at last_visit, so a removed visit is subtracted
+        at its decayed weight. Pages that lost their latest visit are then
+        re-anchored on the newest remaining one, found by scanning back from
+        the end of the list until every such page has been seen.
+        """
+        reanchor = {}
+        refirst = {}
+        for entry in removed:
+            key = entry['key']
+            stats = self.site_stats.get(key)
+            if stats is None:
+                continue
+            stats['visits'] -= 1
+            if stats['visits'] <= 0:
+                del self.site_stats[key]
+                reanchor.pop(key, None)
+                refirst.pop(key, None)
+                continue
+            stats['typed'] = max(0, stats['typed'] - entry.get('typed', False))
+            stats['score'] = max(0.0, stats['score'] - decay(stats['last_visit'] - entry['visit_time']))
+            if entry['visit_time'] >= stats['last_visit']:
+                reanchor[key] = stats
+            if entry['visit_time'] <= stats['first_visit']:
+                refirst[key] = stats
+        for entry in reversed(self.history):
+            if not reanchor:
+                break
+            stats = reanchor.pop(entry['key'], None)
+            if stats is not None:
+                self.reanchor(stats, entry['visit_time'])
+        for key, stats in reanchor.items():
+            # Only expired visits are left; the newest of them is the anchor
+            self.reanchor(stats, stats.get('expired_last', stats['last_visit']))
+        for entry in self.history:
+            if not refirst:
+                break
+            stats = refirst.pop(entry['key'], None)
+            if stats is not None:
+                stats['first_visit'] = entry['visit_time']
+
+    @staticmethod
+    def reanchor(stats, last_visit):
+        stats['score'] /= decay(stats['last_visit'] - last_visit)
+        stats['last_visit'] = last_visit
+
+    # ----- retention -----
+
+    def expire(self, before, limit=None):
+        """Fold raw visits older than before into their page rows.
+
+        The rows keep counting the visits (and their frecency), only the
+        raw entries go. At most limit visits are expired per call.
+        """
+        hi = bisect.bisect_left(self.history, before, key=visit_time_of)
+        if limit is not None:
+            hi = min(hi, limit)
+        if hi == 0:
+            return 0
+        expired = self.history[:hi]
+        for entry in expired:
+            stats = self.site_stats.get(entry['key'])
+            if stats is not None:
+                # Visits are sorted, so the last one seen is the newest
+                stats['expired_last'] = entry['visit_time']
+        del self.history[:hi]
+        self.notify('visits_removed', expired)
+        return hi
+
+    def expire_pages(self, keys, before):
+        """Drop page rows whose last visit is older than before.
+
+        Callers expire raw visits up to at least the same age first. Rows
+        that still have raw visits are kept anyway, since add_entries()
+        may have inserted old visits in between.
+        """
+        # Only visits older than before can belong to a row this old
+        remaining = {entry['key'] for entry in
+                     self.history[:bisect.bisect_left(self.history, before, key=visit_time_of)]}
+        dropped = 0
+        for key in keys:
+            stats = self.site_stats.get(key)
+            if stats is not None and stats['last_visit'] < before and key not in remaining:
+                del self.site_stats[key]
+                dropped += 1
+        return dropped
+
+    def compaction(self, visit_age, page_age, batch=2000, now=None):
+        """Expire and compact the store, yielding between batches.
+
+        A generator, so a caller can spread the work over idle time: every
+        step between yields leaves the store consistent, so queries made
+        in between see correct results. Returns a report with the store
+        size before and after.
+        """
+        now = time.time() if now is None else now
+        # A row must never outlive its raw visits
+        page_age = max(page_age, visit_age)
+        report = {'before': self.measure(), 'expired_visits': 0,
+                  'expired_pages': 0, 'compacted_visits': 0}
+        # Measuring takes a slice of its own
+        yield
+
+        while True:
+            expired = self.expire(now - visit_age, limit=batch)
+            if not expired:
+                break
+            report['expired_visits'] += expired
+            yield
+
+        keys = list(self.site_stats)
+        for i in range(0, len(keys), batch):
+            report['expired_pages'] += self.expire_pages(keys[i:i + batch], now - page_age)
+            yield
+
+        # Visits recorded since the last pass carry their own copies of
+        # the URL, title and key strings; share one copy per distinct value
+        entries = list(self.history)
+        compacted_through = self.compacted_through
+        for i in range(0, len(entries), batch):
+            for entry in entries[i:i + batch]:
+                if entry['id'] <= self.compacted_through:
+                    continue
+                entry['url'] = sys.intern(entry['url'])
+                entry['key'] = sys.intern(entry['key'])
+                if entry['title']:
+                    entry['title'] = sys.intern(entry['title'])
+                compacted_through = max(compacted_through, entry['id'])
+                report['compacted_visits'] += 1
+            yield
+        self.compacted_through = compacted_through
+
+        report['after'] = self.measure()
+        return report
+
+    def measure(self, sample=500):
+        """Approximate memory held by the store, from an evenly spaced sample.
+
+        A string referenced from n places is charged 1/n of its size at
+        each, so shared strings count about once and every entry can be
+        sized on its own, which is what makes sampling valid. Compaction
+        measures inside a single idle slice, so the sample stays small.
+        """
+        entries = self.history[::max(1, len(self.history) // sample)]
+        # islice rather than a list of every row: that many new tuples sets off the cyclic GC
+        rows = list(itertools.islice(self.site_stats.items(), 0, None, max(1, len(self.site_stats) // sample)))
+        total = sys.getsizeof(self.history) + sys.getsizeof(self.site_stats)
+        if entries:
+            per_entry = sum(sys.getsizeof(e) + values_size(e.values()) for e in entries) / len(entries)
+            total += per_entry * len(self.history)
+        if rows:
+            per_row = sum(sys.getsizeof(stats) + values_size((key, *stats.values()))
+                          for key, stats in rows) / len(rows)
+            total += per_row * len(self.site_stats)
+        return {'visits': len(self.history), 'pages': len(self.site_stats), 'bytes': int(total)}
+
+
+def values_size(values):
+    total = 0
+    for value in values:
+        if isinstance(value, str):
+            # Less the references held by this loop and by getrefcount() itself
+            total += sys.getsizeof(value) / max(1, sys.getrefcount(value) - 2)
+        elif not isinstance(value, bool):
+            total += sys.getsizeof(value)
+    return total
+
+
+def visit_time_of(entry):
+    return entry['visit_time']
+
+
+def decay(age):
+    return math.pow(0.5, max(age, 0) / FRECENCY_HALF_LIFE)
+
+
+def benchmark(visits=1000000, pages=50000, hosts=5000, days=90):
+    """Bulk deletes on a million visits spread over the last few months"""
+    import random
+    from bookmarks_manager import BookmarksManager
+
+    rng = random.Random(1)
+    now = time.time()
+    urls = [f"https://www.site{i % hosts}.com/page{i}" for i in range(pages)]
+    manager = HistoryManager()
+    start = time.perf_counter()
+    for t in sorted(now - rng.random() * days * DAY for _ in range(visits)):
+        manager.add_entry(rng.choice(urls), "Title", visit_time=t)
+    print(f"Added {visits:,} visits to {pages:,} pages in {time.perf_counter() - start:.1f} s")
+
+    bookmarks = BookmarksManager()
+    for url in urls[:10000]:
+        bookmarks.add_bookmark("Bookmark", url)
+
+    def timed(label, func, *args):
+        start = time.perf_counter()
+        removed = func(*args)
+        print(f"  {label:32} {(time.perf_counter() - start) * 1000:8.1f} ms  ({removed:,} removed)")
+
+    timed("delete last hour", manager.delete_recent, HOUR)
+    timed("delete last day", manager.delete_recent, DAY)
+    timed("delete last week", manager.delete_recent, WEEK)
+    ids = [e['id'] for e in rng.sample(manager.history, 10000)]
+    timed("delete 10,000 visits by id", manager.delete_entries, ids)
+    timed("forget site (history)", manager.forget_site, "site42.com")
+    timed("forget site (bookmarks)", bookmarks.forget_site, "site42.com")
+    timed("delete 1,000 bookmarks", bookmarks.remove_bookmarks, urls[:1000])
+
+
+def benchmark_compaction(visits=1000000, pages=50000, days=180, visit_days=90, page_days=150):
+    """Expire and compact half a year of visits, timing the longest idle slice"""
+    import random
+
+    rng = random.Random(2)
+    now = time.time()
+    manager = HistoryManager()
+    for t in sorted(now - rng.random() * days * DAY for _ in range(visits)):
+        # Fresh strings per visit, as QUrl.toString() and page titles produce
+        page = rng.randrange(pages)
+        manager.add_entry(f"https://www.site{page % 5000}.com/page{page}", f"Page {page} title", visit_time=t)
+    top_before = manager.get_top_sites(20)
+
+    job = manager.compaction(visit_days * DAY, page_days * DAY)
+    steps = []
+    start = time.perf_counter()
+    while True:
+        step = time.perf_counter()
+        try:
+            next(job)
+        except StopIteration as done:
+            report = done.value
+            break
+        finally:
+            steps.append(time.perf_counter() - step)
+    total = time.perf_counter() - start
+
+    mb = 1024 * 1024
+    before, after = report['before'], report['after']
+    print(f"Compacted in {total:.2f} s over {len(steps)} steps "
+          f"(longest step {max(steps) * 1000:.1f} ms)")
+    print(f"  raw visits: {before['visits']:,} -> {after['visits']:,} "
+          f"({report['expired_visits']:,} expired into page rows)")
+    print(f"  page rows:  {before['pages']:,} -> {after['pages']:,} ({report['expired_pages']:,} expired)")
+    print(f"  store size: {before['bytes'] / mb:.0f} MB -> {after['bytes'] / mb:.0f} MB")
+    print(f"  top sites unchanged: {manager.get_top_sites(20) == top_before}")
+
+
+if __name__ == "__main__":
+    benchmark()
+    benchmark_compaction()
@@ -0,0 +1,69 @@
+# history_retention.py (EXPIRE AND COMPACT HISTORY WHILE THE BROWSER IS IDLE)
+from PyQt5.QtCore import *
+import time
+from history_manager import DAY
+from tracing import tracer
+
+
+class HistoryCompactor(QObject):
+    """Runs HistoryManager.compaction() in short slices once history goes quiet.
+
+    Every history change restarts the idle timer. When it fires, the
+    compaction generator is advanced for at most slice_ms per event loop
+    turn, so pages, menus and queries stay responsive throughout.
+    Retention ages come from the 'history' settings on every run.
+    """
+    finished = pyqtSignal(dict)
+
+    def __init__(self, history_manager, settings_manager, idle_ms=60000, slice_ms=8, parent=None):
+        super().__init__(parent)
+        self.history_manager = history_manager
+        self.settings_manager = settings_manager
+        self.slice_ms = slice_ms
+        self.job = None
+        self.started_at = 0.0
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(idle_ms)
+        self.idle_timer.timeout.connect(self.start)
+        self.idle_timer.start()
+
+    def schedule(self):
+        """History changed; compact once it has been quiet for idle_ms"""
+        if self.job is None:
+            self.idle_timer.start()
+
+    def start(self):
+        if self.job is not None:
+            return
+        visit_days = self.settings_manager.get('history', 'visit_retention_days', 90)
+        page_days = self.settings_manager.get('history', 'page_retention_days', 365)
+        self.job = self.history_manager.compaction(visit_days * DAY, page_days * DAY)
+        self.started_at = time.perf_counter()
+        QTimer.singleShot(0, self.run_slice)
+
+    def run_slice(self):
+        deadline = time.perf_counter() + self.slice_ms / 1000
+        with tracer.span("history_compaction_slice"):
+            try:
+                while time.perf_counter() < deadline:
+                    next(self.job)
+            except StopIteration as done:
+                self.job = None
+                self.report(done.value)
+                return
+        QTimer.singleShot(0, self.run_slice)
+
+    def report(self, report):
+        report['seconds'] = round(time.perf_counter() - self.started_at, 2)
+        before, after = report['before'], report['after']
+        tracer.instant("history_compaction", visits_before=before['visits'], visits_after=after['visits'],
+                       bytes_before=before['bytes'], bytes_after=after['bytes'],
+                       expired_visits=report['expired_visits'], expired_pages=report['expired_pages'])
+        if report['expired_visits'] or report['expired_pages'] or report['compacted_visits']:
+            kb = 1024
+            print(f"History compacted in {report['seconds']} s: "
+                  f"{before['visits']} -> {after['visits']} visits, "
+                  f"{before['pages']} -> {after['pages']} pages, "
+                  f"{before['bytes'] // kb} KB -> {after['bytes'] // kb} KB")
+        self.finished.emit(report)
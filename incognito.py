@@ -0,0 +1,125 @@
+# incognito.py (OFF-THE-RECORD PROFILE AND MEMORY-ONLY STORES FOR INCOGNITO WINDOWS)
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile
+from PyQt5.QtCore import *
+from PyQt5.QtNetwork import QNetworkCookie
+from collections import OrderedDict
+import heapq
+import math
+import time
+from history_manager import HistoryManager
+
+MB = 1024 * 1024
+
+
+def create_incognito_profile(cache_mb=32, parent=None):
+    """An off-the-record profile: cache and cookies in memory, nothing on disk"""
+    # A profile without a storage name is off the record
+    profile = QWebEngineProfile(parent)
+    profile.setHttpCacheType(QWebEngineProfile.MemoryHttpCache)
+    profile.setHttpCacheMaximumSize(cache_mb * MB)
+    profile.setPersistentCookiesPolicy(QWebEngineProfile.NoPersistentCookies)
+    return profile
+
+
+class CookieBudget(QObject):
+    """Keeps a profile's cookies under max_bytes, evicting the oldest first.
+
+    Off-the-record cookies live in memory for as long as the session, so
+    a site setting large cookies on every page would otherwise grow it
+    without limit. Sizes count name, value, domain and path.
+    """
+
+    def __init__(self, cookie_store, max_bytes, parent=None):
+        super().__init__(parent)
+        self.cookie_store = cookie_store
+        self.max_bytes = max_bytes
+        # (domain, path, name) -> (cookie, size), oldest first
+        self.cookies = OrderedDict()
+        self.total_bytes = 0
+        self.evicted = 0
+        cookie_store.cookieAdded.connect(self.on_cookie_added)
+        cookie_store.cookieRemoved.connect(self.on_cookie_removed)
+
+    @staticmethod
+    def key_for(cookie):
+        return cookie.domain(), cookie.path(), bytes(cookie.name())
+
+    @staticmethod
+    def size_of(cookie):
+        return len(cookie.name()) + len(cookie.value()) + len(cookie.domain()) + len(cookie.path())
+
+    def on_cookie_added(self, cookie):
+        key = self.key_for(cookie)
+        self.forget(key)
+        size = self.size_of(cookie)
+        self.cookies[key] = (QNetworkCookie(cookie), size)
+        self.total_bytes += size
+        # The newest cookie always stays, even on its own over budget
+        while self.total_bytes > self.max_bytes and len(self.cookies) > 1:
+            oldest_key, (oldest, _) = next(iter(self.cookies.items()))
+            self.forget(oldest_key)
+            self.cookie_store.deleteCookie(oldest)
+            self.evicted += 1
+
+    def on_cookie_removed(self, cookie):
+        self.forget(self.key_for(cookie))
+
+    def forget(self, key):
+        entry = self.cookies.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+
+
+class BoundedHistoryManager(HistoryManager):
+    """History that only lives in memory and never outgrows its caps.
+
+    Past max_visits the oldest raw visits are folded into their page rows,
+    as compaction does. Past max_pages the least recently visited tenth
+    of the rows is dropped in one go, so trimming stays rare.
+    """
+
+    def __init__(self, max_visits=5000, max_pages=None):
+        super().__init__()
+        self.max_visits = max_visits
+        self.max_pages = max_pages or max_visits
+
+    def add_entry(self, url, title, visit_time=None, typed=False):
+        entry = super().add_entry(url, title, visit_time, typed)
+        self.enforce_limits()
+        return entry
+
+    def add_entries(self, visits):
+        added = super().add_entries(visits)
+        self.enforce_limits()
+        return added
+
+    def enforce_limits(self):
+        excess = len(self.history) - self.max_visits
+        if excess > 0:
+            self.expire(math.inf, limit=excess)
+        excess = len(self.site_stats) - self.max_pages
+        if excess > 0:
+            excess += self.max_pages // 10
+            oldest = heapq.nsmallest(excess, self.site_stats.items(), key=lambda item: item[1]['last_visit'])
+            # Every visit to these rows is at or before the newest of them
+            before = math.nextafter(oldest[-1][1]['last_visit'], math.inf)
+            self.expire(before)
+            self.expire_pages([key for key, _ in oldest], before)
+
+
+def benchmark(visits=200000, max_visits=5000):
+    """Cost and footprint of the bounded store against an unbounded one"""
+    for manager in (HistoryManager(), BoundedHistoryManager(max_visits)):
+        now = time.time() - visits
+        start = time.perf_counter()
+        for i in range(visits):
+            manager.add_entry(f"https://site{i % 3000}.com/page{i % 20000}", f"Page {i}", now + i)
+        elapsed = time.perf_counter() - start
+        size = manager.measure()
+        print(f"{type(manager).__name__}: {visits:,} visits in {elapsed:.2f} s "
+              f"({elapsed / visits * 1e6:.1f} us each), kept {size['visits']:,} visits, "
+              f"{size['pages']:,} pages, {size['bytes'] / MB:.1f} MB")
+
+
+if __name__ == "__main__":
+    benchmark()
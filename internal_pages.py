@@ -1,10 +1,12 @@
 # internal_pages.py (COMPLETELY FIXED)
 from PyQt5.QtWidgets import *
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 import json
-import os
+from tracing import tracer
+from io_executor import io_executor
+from history_manager import HOUR, DAY, WEEK
 
 class InternalPage(QWebEngineView):
     page_requested = pyqtSignal(str)
@@ -12,24 +14,37 @@ class InternalPage(QWebEngineView):
     history_cleared = pyqtSignal()
     bookmark_added = pyqtSignal(str, str)
     bookmark_deleted = pyqtSignal(str)
+    bookmarks_deleted = pyqtSignal(list)
+    history_entries_deleted = pyqtSignal(list)
+    history_range_deleted = pyqtSignal(int)
+    # Internal: the page's HTML file was read (None if missing)
+    source_read = pyqtSignal(object)
+    site_forgotten = pyqtSignal(str)
+
+    # Ranges offered by arc://delete-history-range/<name>, in seconds
+    HISTORY_RANGES = {'hour': HOUR, 'day': DAY, 'week': WEEK}
+    # Only the newest visits are sent to the history page
+    HISTORY_PAGE_LIMIT = 1000
     
-    def __init__(self, page_type, data_manager=None):
+    def __init__(self, page_type, data_manager=None, profile=None):
         super().__init__()
+        if profile is not None:
+            self.setPage(QWebEnginePage(profile, self))
         self.page_type = page_type
         self.data_manager = data_manager
         self.processing_navigation = False
+        self.source_read.connect(self.render_page)
         self.setup_page()
         
     def setup_page(self):
-        # Load the appropriate HTML file
-        html_file = f"{self.page_type}.html"
-        if os.path.exists(html_file):
-            with open(html_file, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
+        # Load the appropriate HTML file; rendered at once if it is already in memory
+        io_executor.read_text_async(f"{self.page_type}.html", self.source_read.emit)
+
+    def render_page(self, html_content):
+        if html_content:
             # Inject data into the HTML
             if self.page_type == 'history' and self.data_manager:
-                history_data = self.data_manager.history_manager.get_history()
+                history_data = self.data_manager.history_manager.get_recent(self.HISTORY_PAGE_LIMIT)
                 injected_data = f"window.historyData = {json.dumps(history_data)};"
             elif self.page_type == 'bookmarks' and self.data_manager:
                 bookmarks_data = self.data_manager.bookmarks_manager.get_bookmarks()
@@ -95,7 +110,7 @@ class InternalPage(QWebEngineView):
             return
             
         self.processing_navigation = True
-        print(f"Internal page handling: {url_str}")
+        tracer.instant("internal_page_navigation", page=self.page_type, url=url_str)
         
         try:
             if url_str.startswith("arc://navigate/"):
@@ -123,6 +138,33 @@ class InternalPage(QWebEngineView):
                 self.bookmark_deleted.emit(bookmark_url)
                 QTimer.singleShot(500, self.setup_page)  # Refresh after deleting
                 
+            elif url_str.startswith("arc://delete-bookmarks/"):
+                encoded = url.toString(QUrl.FullyEncoded)[23:]  # Remove "arc://delete-bookmarks/"
+                try:
+                    urls = json.loads(QUrl.fromPercentEncoding(encoded.encode()))
+                except ValueError as e:
+                    print(f"Error reading bookmarks to delete: {e}")
+                else:
+                    self.bookmarks_deleted.emit([u for u in urls if isinstance(u, str)])
+                QTimer.singleShot(500, self.setup_page)  # Refresh after deleting
+
+            elif url_str.startswith("arc://delete-history/"):
+                ids = [int(i) for i in url_str[21:].split(',') if i.isdigit()]
+                self.history_entries_deleted.emit(ids)
+                QTimer.singleShot(500, self.setup_page)  # Refresh after deleting
+
+            elif url_str.startswith("arc://delete-history-range/"):
+                seconds = self.HISTORY_RANGES.get(url_str[27:].strip('/'))
+                if seconds:
+                    self.history_range_deleted.emit(seconds)
+                QTimer.singleShot(500, self.setup_page)  # Refresh after deleting
+
+            elif url_str.startswith("arc://forget-site/"):
+                host = url_str[18:].strip('/')
+                if host:
+                    self.site_forgotten.emit(host)
+                QTimer.singleShot(500, self.setup_page)  # Refresh after forgetting
+
             elif url_str.startswith("arc://save-settings/"):
                 settings_json = QUrl.fromPercentEncoding(url_str[20:].encode())
                 try:
@@ -0,0 +1,238 @@
+# io_executor.py (ALL DISK WRITES OFF THE GUI THREAD)
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import json
+import os
+import threading
+import time
+
+DELETE = object()
+
+
+class IOExecutor:
+    """Shared worker pool and write queue for every manager.
+
+    write_*() and delete() return immediately. Writes to the same path
+    are coalesced: if a file is written again before the worker gets to
+    it, only the newest contents hit the disk. Each write goes to a
+    temporary file that is fsynced and renamed over the target, so a
+    crash never leaves a half-written file. flush() waits for the queue
+    to drain and is called on application shutdown.
+
+    Read-only files such as page templates are read once and served from
+    memory afterwards. Reads have their own worker, so they never wait
+    behind a queue of writes, and hand their result to a callback or
+    future instead of blocking the caller.
+    """
+
+    def __init__(self, max_workers=2, latency_samples=1000):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="io")
+        self.reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="io-read")
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        # path -> (data or DELETE, enqueue time); at most one entry per file
+        self.pending = {}
+        # Paths with a worker draining them, so one file is never written twice at once
+        self.active = set()
+        self.reads = {}
+        self.latencies = deque(maxlen=latency_samples)
+        self.stats = {'writes': 0, 'coalesced': 0, 'completed': 0, 'errors': 0,
+                      'bytes': 0, 'max_depth': 0}
+        self.closed = False
+
+    # ----- writes -----
+
+    def write_bytes(self, path, data):
+        self.enqueue(path, bytes(data))
+
+    def write_text(self, path, text):
+        self.enqueue(path, text.encode('utf-8'))
+
+    def write_json(self, path, obj, indent=None):
+        # Serialized now, so later changes to obj can't race the worker
+        self.write_text(path, json.dumps(obj, indent=indent))
+
+    def delete(self, path):
+        self.enqueue(path, DELETE)
+
+    def enqueue(self, path, data):
+        path = os.path.abspath(path)
+        with self.lock:
+            self.stats['writes'] += 1
+            if path in self.pending:
+                self.stats['coalesced'] += 1
+                enqueued_at = self.pending[path][1]
+            else:
+                enqueued_at = time.perf_counter()
+            self.pending[path] = (data, enqueued_at)
+            self.stats['max_depth'] = max(self.stats['max_depth'], len(self.pending))
+            if path in self.active:
+                # The worker draining this path will pick up the newer data
+                return
+            self.active.add(path)
+        try:
+            self.executor.submit(self.drain, path)
+        except RuntimeError:
+            # After shutdown(): write synchronously rather than lose data
+            self.drain(path)
+
+    def drain(self, path):
+        while True:
+            with self.lock:
+                item = self.pending.pop(path, None)
+                if item is None:
+                    self.active.discard(path)
+                    if not self.active:
+                        self.idle.notify_all()
+                    return
+            data, enqueued_at = item
+            try:
+                if data is DELETE:
+                    if os.path.exists(path):
+                        os.remove(path)
+                else:
+                    self.atomic_write(path, data)
+                ok = True
+            except OSError as e:
+                print(f"Error writing {path}: {e}")
+                ok = False
+            with self.lock:
+                self.stats['completed' if ok else 'errors'] += 1
+                if ok and data is not DELETE:
+                    self.stats['bytes'] += len(data)
+                self.latencies.append((time.perf_counter() - enqueued_at) * 1000)
+
+    @staticmethod
+    def atomic_write(path, data):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def flush(self, timeout=None):
+        """Block until every queued write is on disk. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            while self.active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.idle.wait(remaining)
+        return True
+
+    def shutdown(self):
+        """Flush, then stop the workers; later writes run synchronously"""
+        self.flush()
+        self.closed = True
+        self.executor.shutdown(wait=True)
+        self.reader.shutdown(wait=True)
+
+    # ----- reads -----
+
+    def preload(self, paths):
+        """Start reading files that will be needed soon"""
+        for path in paths:
+            self.read_future(path)
+
+    def read_future(self, path):
+        path = os.path.abspath(path)
+        with self.lock:
+            future = self.reads.get(path)
+            if future is None:
+                future = self.reads[path] = self.submit_read(self.read_file, path)
+        return future
+
+    def submit_read(self, fn, *args):
+        """Run a read-only task on the reader; after shutdown() it runs inline"""
+        try:
+            return self.reader.submit(fn, *args)
+        except RuntimeError:
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
+    @staticmethod
+    def read_file(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def read_text_async(self, path, callback):
+        """Call callback(contents or None) once a read-only file is read.
+
+        Cached after the first read: a file that is already in memory is
+        handed over at once on the calling thread, otherwise callback runs
+        on the reader. Qt callers pass a signal's emit so the result lands
+        on their own thread.
+        """
+        self.read_future(path).add_done_callback(lambda future: callback(future.result()))
+
+    # ----- metrics -----
+
+    def queue_depth(self):
+        with self.lock:
+            return len(self.pending)
+
+    def metrics(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            summary = dict(self.stats, depth=len(self.pending), active=len(self.active))
+        if latencies:
+            summary['latency_p50_ms'] = round(latencies[len(latencies) // 2], 2)
+            summary['latency_p95_ms'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2)
+            summary['latency_max_ms'] = round(latencies[-1], 2)
+        return summary
+
+    def export_metrics(self, path=None):
+        """Write queue metrics to ARC_IO_METRICS if set"""
+        path = path or os.environ.get("ARC_IO_METRICS")
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.metrics(), f, indent=2)
+        except OSError as e:
+            print(f"Error writing I/O metrics: {e}")
+
+
+io_executor = IOExecutor()
+
+
+def benchmark(writes=2000, files=20, disk_delay_ms=5):
+    """Bursty writes against a slow disk: caller time vs. queue behaviour"""
+    import tempfile
+
+    directory = tempfile.mkdtemp(prefix="arc-io-")
+    executor = IOExecutor()
+    slow_write = IOExecutor.atomic_write
+
+    def delayed_write(path, data):
+        time.sleep(disk_delay_ms / 1000)
+        slow_write(path, data)
+    executor.atomic_write = delayed_write
+
+    start = time.perf_counter()
+    worst = 0.0
+    for i in range(writes):
+        t = time.perf_counter()
+        executor.write_json(os.path.join(directory, f"file{i % files}.json"), {'n': i})
+        worst = max(worst, time.perf_counter() - t)
+    enqueue_ms = (time.perf_counter() - start) * 1000
+    executor.flush()
+    total_ms = (time.perf_counter() - start) * 1000
+    print(f"{writes} writes to {files} files with a {disk_delay_ms} ms disk: "
+          f"caller spent {enqueue_ms:.1f} ms (worst call {worst * 1000:.2f} ms), "
+          f"drained in {total_ms:.0f} ms")
+    print(f"  {executor.metrics()}")
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,48 +1,203 @@
 # landing_page.py (FIXED ASSETS AND BOOKMARKS)
 from PyQt5.QtWidgets import *
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
 import json
 import os
 import urllib.parse
+from suggestions import Suggester
+from tracing import tracer
+from io_executor import io_executor
+
+LANDING_TEMPLATE = "landing_page.html"
+LANDING_BUNDLE = "landing_bundle.html"
+
+
+def landing_html_path():
+    """The offline bundle from build_landing.py, unless the template was edited since it was built.
+    Stats the files, so it is only called on the reader (see LandingPage.load_source)."""
+    if not os.path.exists(LANDING_BUNDLE):
+        return LANDING_TEMPLATE
+    if os.path.exists(LANDING_TEMPLATE) and os.path.getmtime(LANDING_TEMPLATE) > os.path.getmtime(LANDING_BUNDLE):
+        return LANDING_TEMPLATE
+    return LANDING_BUNDLE
+
+
+class LandingWebPage(QWebEnginePage):
+    """Handles arc://suggest/ without leaving the page"""
+    suggest_requested = pyqtSignal(str)
+
+    def acceptNavigationRequest(self, url, nav_type, is_main_frame):
+        url_str = url.toString(QUrl.FullyEncoded)
+        if url_str.startswith("arc://suggest/"):
+            self.suggest_requested.emit(urllib.parse.unquote(url_str[14:]))
+            return False
+        return super().acceptNavigationRequest(url, nav_type, is_main_frame)
+
 
 class LandingPage(QWebEngineView):
     search_requested = pyqtSignal(str)
     url_requested = pyqtSignal(str)
     background_changed = pyqtSignal(str)
+    # Internal: the page HTML was read (None if neither file exists)
+    source_read = pyqtSignal(object)
+
+    # Future for the page HTML, resolved and read once per run for every landing page
+    source = None
     
-    def __init__(self, bookmarks_manager=None, settings_manager=None):
+    def __init__(self, bookmarks_manager=None, settings_manager=None, feeds_service=None,
+                 favicon_cache=None, history_manager=None, thumbnail_cache=None,
+                 suggestion_service=None, profile=None):
         super().__init__()
         self.bookmarks_manager = bookmarks_manager
         self.settings_manager = settings_manager
+        self.feeds_service = feeds_service
+        self.favicon_cache = favicon_cache
+        self.history_manager = history_manager
+        self.thumbnail_cache = thumbnail_cache
+        # Icons and thumbnails that weren't in memory yet arrive shortly after a render
+        self.image_refresh_pending = False
+        if self.favicon_cache:
+            self.favicon_cache.icon_updated.connect(self.on_image_updated)
+        if self.thumbnail_cache:
+            self.thumbnail_cache.thumbnail_ready.connect(self.on_image_updated)
+        if self.feeds_service:
+            self.feeds_service.weather_updated.connect(self.push_weather)
+            self.feeds_service.news_updated.connect(self.push_news)
+            self.loadFinished.connect(self.push_cached_feeds)
+        # Updates that arrive while the document is (re)loading wait for loadFinished
+        self.page_ready = False
+        self.pending_updates = set()
+        self.loadFinished.connect(self.on_load_finished)
+        self.urlChanged.connect(self.handle_navigation)
+        page = LandingWebPage(profile, self) if profile is not None else LandingWebPage(self)
+        self.setPage(page)
+        if suggestion_service:
+            self.suggester = Suggester(suggestion_service, parent=self)
+            self.suggester.suggestions_ready.connect(self.push_suggestions)
+            page.suggest_requested.connect(self.suggester.request)
+        self.source_read.connect(self.render)
         self.setup_landing_page()
-        
+
+    @classmethod
+    def load_source(cls):
+        """Start reading the page HTML, preferring an up-to-date offline bundle"""
+        if cls.source is None:
+            cls.source = io_executor.submit_read(lambda: io_executor.read_file(landing_html_path()))
+        return cls.source
+
     def setup_landing_page(self):
+        """Render the whole page once its HTML is read; later changes are patched in with update_*"""
+        self.page_ready = False
+        self.pending_updates.clear()
+        # Runs at once, on this thread, when the HTML is already in memory
+        self.load_source().add_done_callback(lambda future: self.source_read.emit(future.result()))
+
+    def render(self, html_content):
         # Get current background setting
         background_style = self.get_background_style()
         
         # Get bookmarks data
-        bookmarks_data = []
-        if self.bookmarks_manager:
-            bookmarks_data = self.bookmarks_manager.get_bookmarks()
+        bookmarks_data = self.get_bookmarks_data()
         
-        # Load and modify the HTML
-        html_file = "landing_page.html"
-        if os.path.exists(html_file):
-            with open(html_file, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
+        top_sites = self.get_top_sites()
+        
+        if html_content:
             # Inject data and fix asset paths
-            html_content = self.inject_data_and_fix_paths(html_content, background_style, bookmarks_data)
+            html_content = self.inject_data_and_fix_paths(html_content, background_style, bookmarks_data, top_sites)
             
             self.setHtml(html_content, QUrl("arc://newtab/"))
         else:
             # Fallback HTML
             self.setHtml(self.create_fallback_html(background_style, bookmarks_data), QUrl("arc://newtab/"))
+
+    def get_bookmarks_data(self):
+        if not self.bookmarks_manager:
+            return []
+        bookmarks_data = self.bookmarks_manager.get_bookmarks()
+        if self.favicon_cache:
+            # Icons come from the local cache only, never from the network
+            bookmarks_data = [dict(b, icon=self.favicon_cache.data_uri_for_url(b['url']))
+                              for b in bookmarks_data]
+        return bookmarks_data
+
+    def on_load_finished(self, ok):
+        self.page_ready = ok
+        pending, self.pending_updates = self.pending_updates, set()
+        if ok and 'bookmarks' in pending:
+            self.update_bookmarks()
+        if ok and 'background' in pending:
+            self.update_background()
+
+    def run_update(self, kind, script):
+        if not self.page_ready:
+            self.pending_updates.add(kind)
+            return
+        with tracer.span("landing_update", kind=kind):
+            self.page().runJavaScript(script)
+
+    def update_bookmarks(self):
+        """Re-render the bookmarks row in place"""
+        self.run_update('bookmarks', f"window.renderBookmarks && renderBookmarks({json.dumps(self.get_bookmarks_data())});")
+
+    def on_image_updated(self, key):
+        if not self.image_refresh_pending:
+            self.image_refresh_pending = True
+            QTimer.singleShot(100, self.refresh_images)
+
+    def refresh_images(self):
+        self.image_refresh_pending = False
+        self.update_bookmarks()
+        if self.page_ready:
+            self.refresh_top_sites()
+
+    def update_background(self):
+        """Apply the background from settings without reloading the page"""
+        style = self.resolve_asset_paths(self.get_background_style())
+        self.run_update('background', f"window.applyBackground && applyBackground({json.dumps(style)});")
+
+    @staticmethod
+    def resolve_asset_paths(css):
+        # The page's base URL is arc://newtab/, so relative asset URLs need a file path
+        return css.replace("url('assets/", f"url('file:///{os.path.abspath('assets')}/")
         
-        self.urlChanged.connect(self.handle_navigation)
-        
+    def get_top_sites(self):
+        """Top sites by frecency, with cached thumbnails and favicons only"""
+        if not self.history_manager:
+            return []
+        sites = self.history_manager.get_top_sites()
+        for site in sites:
+            site['thumbnail'] = self.thumbnail_cache.data_uri_for_url(site['url']) if self.thumbnail_cache else ""
+            site['icon'] = self.favicon_cache.data_uri_for_url(site['url']) if self.favicon_cache else ""
+        return sites
+
+    def refresh_top_sites(self):
+        """Re-render the top-sites grid in place"""
+        self.page().runJavaScript(f"window.renderTopSites && renderTopSites({json.dumps(self.get_top_sites())});")
+
+    def push_cached_feeds(self, ok):
+        """Fill weather and news from cache as soon as the page is ready"""
+        if not ok:
+            return
+        weather = self.feeds_service.get_weather()
+        if weather:
+            self.push_weather(weather)
+        news = self.feeds_service.get_news()
+        if news is not None:
+            self.push_news(news)
+
+    def push_weather(self, weather):
+        args = ", ".join(json.dumps(weather[k]) for k in ('icon', 'temp', 'desc', 'location'))
+        self.page().runJavaScript(f"window.updateWeather && updateWeather({args});")
+
+    def push_news(self, articles):
+        self.page().runJavaScript(f"window.updateNews && updateNews({json.dumps(articles)});")
+
+    def push_suggestions(self, prefix, suggestions):
+        self.page().runJavaScript(
+            f"window.showSuggestions && showSuggestions({json.dumps(prefix)}, {json.dumps(suggestions)});")
+
     def get_background_style(self):
         """Get background style from settings or use default"""
         if self.settings_manager:
@@ -58,7 +213,7 @@ class LandingPage(QWebEngineView):
                 return gradient
         return "url('assets/backgrounds/bg9.jpg')"
     
-    def inject_data_and_fix_paths(self, html_content, background_style, bookmarks_data):
+    def inject_data_and_fix_paths(self, html_content, background_style, bookmarks_data, top_sites=()):
         """Inject data and fix asset paths in HTML"""
         # Fix asset paths - convert to file URLs
         html_content = html_content.replace('src="assets/', f'src="file:///{os.path.abspath("assets")}/')
@@ -74,6 +229,7 @@ class LandingPage(QWebEngineView):
         injected_data = f"""
         <script>
             window.landingBookmarks = {json.dumps(bookmarks_data)};
+            window.topSites = {json.dumps(list(top_sites))};
             window.currentBackground = "{background_style}";
         </script>
         """
@@ -355,14 +511,14 @@ class LandingPage(QWebEngineView):
                     
                     container.innerHTML = '';
                     bookmarks.forEach(bookmark => {{
-                        const faviconUrl = `https://www.google.com/s2/favicons?domain=${{new URL(bookmark.url).hostname}}&sz=32`;
                         const bookmarkElement = document.createElement('a');
                         bookmarkElement.className = 'bookmark-item';
                         bookmarkElement.href = `arc://navigate/${{bookmark.url}}`;
+                        const favicon = bookmark.icon
+                            ? `<img src="${{bookmark.icon}}" width="24" height="24">`
+                            : '🌐';
                         bookmarkElement.innerHTML = `
-                            <div class="bookmark-favicon">
-                                <img src="${{faviconUrl}}" width="24" height="24" onerror="this.style.display='none'; this.parentNode.innerHTML='🌐';">
-                            </div>
+                            <div class="bookmark-favicon">${{favicon}}</div>
                             <div class="bookmark-name">${{escapeHtml(bookmark.title)}}</div>
                         `;
                         container.appendChild(bookmarkElement);
@@ -408,6 +564,17 @@ class LandingPage(QWebEngineView):
                 setInterval(updateTime, 1000);
                 updateTime();
                 
+                // Python pushes later changes here instead of reloading the page
+                window.renderBookmarks = function(bookmarks) {{
+                    window.landingBookmarks = bookmarks;
+                    loadBookmarks();
+                }};
+                window.applyBackground = function(style) {{
+                    document.body.style.background = style;
+                    document.body.style.backgroundSize = 'cover';
+                    document.body.style.backgroundPosition = 'center';
+                }};
+
                 // Load bookmarks when page loads
                 loadBookmarks();
             </script>
@@ -423,7 +590,8 @@ class LandingPage(QWebEngineView):
             self.url_requested.emit(target_url)
             
         elif url_str.startswith("arc://search/"):
-            query = url_str[13:]
+            # encodeURIComponent'd by the page
+            query = urllib.parse.unquote(url.toString(QUrl.FullyEncoded)[13:])
             self.search_requested.emit(query)
             
         elif url_str.startswith("arc://background/"):
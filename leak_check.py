@@ -0,0 +1,287 @@
+# leak_check.py (OPEN AND CLOSE MANY TABS, CHECK MEMORY COMES BACK)
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtCore import *
+from PyQt5 import sip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import gc
+import os
+import threading
+import urllib.parse
+
+
+def process_rss(pid="self"):
+    """Resident memory of a process in bytes (Linux /proc; 0 elsewhere)"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def child_processes(parent=None):
+    """PIDs whose parent is this process, i.e. the Chromium zygote/renderers"""
+    parent = parent or os.getpid()
+    children = []
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return children
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces, so split after its ")"
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        # Renderers that exited but weren't reaped yet hold no memory
+        if int(fields[1]) == parent and fields[0] != 'Z':
+            children.append(int(entry))
+    return children
+
+
+def total_rss():
+    """Browser process plus its descendants (renderers live in child processes)"""
+    pids = ["self"]
+    frontier = [os.getpid()]
+    while frontier:
+        kids = child_processes(frontier.pop())
+        pids.extend(kids)
+        frontier.extend(kids)
+    return sum(process_rss(pid) for pid in pids), len(pids) - 1
+
+
+def live_views():
+    return sum(1 for w in QApplication.allWidgets() if isinstance(w, QWebEngineView))
+
+
+class TabLeakCheck(QObject):
+    """Opens and closes tabs in a window and compares memory with a baseline.
+
+    Every step runs from the application event loop (never a nested one)
+    so deleteLater() is honoured exactly as it is in normal use.
+    """
+    finished = pyqtSignal(bool)
+
+    def __init__(self, window, tabs=200, warmup=20, url="about:blank", step_ms=30,
+                 settle_ms=3000, tolerance=0.10, parent=None):
+        super().__init__(parent)
+        self.window = window
+        self.tabs = tabs
+        self.warmup = warmup
+        self.url = url
+        self.step_ms = step_ms
+        self.settle_ms = settle_ms
+        self.tolerance = tolerance
+        self.cycle = 0
+        self.baseline = None
+
+    def start(self):
+        QTimer.singleShot(self.settle_ms, self.step)
+
+    def step(self):
+        total = self.warmup + self.tabs
+        if self.cycle == self.warmup and self.baseline is None:
+            # Pool, caches and renderer process are warm; measure once the pool's
+            # new renderers have started, as the final snapshot does
+            QTimer.singleShot(self.settle_ms, self.take_baseline)
+            return
+        if self.cycle >= total:
+            QTimer.singleShot(self.settle_ms, self.report)
+            return
+        self.window.add_browser_tab(self.url)
+        QTimer.singleShot(self.step_ms, self.close_current)
+
+    def take_baseline(self):
+        self.baseline = self.snapshot()
+        self.step()
+
+    def close_current(self):
+        self.window.close_tab(self.window.tabs.currentIndex())
+        self.cycle += 1
+        QTimer.singleShot(self.step_ms, self.step)
+
+    def snapshot(self):
+        gc.collect()
+        rss, processes = total_rss()
+        return {'rss': rss, 'processes': processes, 'views': live_views(),
+                'tabs': self.window.tabs.count()}
+
+    def report(self):
+        after = self.snapshot()
+        base = self.baseline
+        growth = (after['rss'] - base['rss']) / base['rss'] if base['rss'] else 0.0
+        ok = (after['views'] <= base['views'] and after['tabs'] == base['tabs']
+              and growth <= self.tolerance)
+        mb = 1024 * 1024
+        print(f"Opened and closed {self.tabs} tabs")
+        print(f"  live web views:   {base['views']} -> {after['views']}")
+        print(f"  child processes:  {base['processes']} -> {after['processes']}")
+        print(f"  resident memory:  {base['rss'] / mb:.1f} MB -> {after['rss'] / mb:.1f} MB "
+              f"({growth:+.1%}, tolerance {self.tolerance:.0%})")
+        print("PASS" if ok else "FAIL: memory did not return to baseline")
+        self.finished.emit(ok)
+
+
+def serve_test_pages(page_kb=64, cookies=4, cookie_bytes=4000):
+    """A local HTTP stand-in: every path is a cacheable page that sets cookies.
+
+    Returns (server, base_url); call server.shutdown() when done.
+    """
+    filler = "x" * 1024
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = (f"<html><head><title>{self.path}</title></head><body>"
+                    f"{filler * page_kb}</body></html>").encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'max-age=3600')
+            name = self.path.strip("/").replace("/", "_") or "root"
+            for n in range(cookies):
+                self.send_header('Set-Cookie', f"{name}_{n}={'c' * cookie_bytes}; Path=/")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, name="test-pages", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def file_snapshot(roots):
+    """(size, mtime) of every file under roots, to spot anything written"""
+    files = {}
+    for root in roots:
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files[path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+class IncognitoLeakCheck(QObject):
+    """Opens incognito windows, browses in them, closes them, then checks
+    that no file was written and memory is back at its baseline.
+
+    Pages come from a local stand-in server that sets cookies on every
+    response, so the memory cache and the cookie budget both fill up.
+    The first warmup sessions are not measured: memory steps up once over
+    the first two and is flat from then on.
+
+    The regular profile keeps saving its own state (preferences, network
+    properties) on timers. Files changed under its storage_dirs only count
+    when they mention the test server.
+    """
+    finished = pyqtSignal(bool)
+
+    def __init__(self, window_factory, watch_dirs, io_stats, storage_dirs=(), sessions=3, warmup=2,
+                 tabs=20, step_ms=150, settle_ms=3000, tolerance=0.10, parent=None):
+        super().__init__(parent)
+        self.window_factory = window_factory
+        self.watch_dirs = [d for d in watch_dirs if d and os.path.isdir(d)]
+        self.storage_dirs = [os.path.join(d, "") for d in storage_dirs if d]
+        self.io_stats = io_stats
+        self.sessions = sessions
+        self.warmup = warmup
+        self.tabs = tabs
+        self.step_ms = step_ms
+        self.settle_ms = settle_ms
+        self.tolerance = tolerance
+        self.session = 0
+        self.baseline = None
+        self.files = None
+        self.writes = 0
+        self.window = None
+        self.tab = 0
+        self.profiles = []
+        self.budgets = []
+        self.server, self.base_url = serve_test_pages()
+
+    def start(self):
+        QTimer.singleShot(self.settle_ms, self.begin_session)
+
+    def begin_session(self):
+        if self.session == self.warmup and self.baseline is None:
+            self.baseline = self.snapshot()
+            self.files = file_snapshot(self.watch_dirs)
+            self.writes = self.io_stats['writes']
+        self.window = self.window_factory()
+        self.window.show()
+        self.profiles.append(self.window.profile)
+        self.tab = 0
+        QTimer.singleShot(self.step_ms, self.step)
+
+    def step(self):
+        if self.tab >= self.tabs:
+            budget = self.window.data_manager.cookie_budget
+            self.budgets.append((budget.total_bytes, budget.max_bytes, budget.evicted))
+            self.window.close()
+            self.window = None
+            self.session += 1
+            QTimer.singleShot(self.settle_ms, self.end_session)
+            return
+        self.window.add_browser_tab(f"{self.base_url}/session{self.session}/page{self.tab}")
+        self.tab += 1
+        QTimer.singleShot(self.step_ms, self.step)
+
+    def end_session(self):
+        if self.session < self.warmup + self.sessions:
+            self.begin_session()
+        else:
+            self.report()
+
+    def snapshot(self):
+        gc.collect()
+        rss, processes = total_rss()
+        return {'rss': rss, 'processes': processes, 'views': live_views()}
+
+    def leaked(self, path):
+        if not path.startswith(tuple(self.storage_dirs)):
+            return True
+        try:
+            with open(path, 'rb') as f:
+                return urllib.parse.urlsplit(self.base_url).hostname.encode('ascii') in f.read()
+        except OSError:
+            return False
+
+    def report(self):
+        self.server.shutdown()
+        after = self.snapshot()
+        base = self.baseline
+        growth = (after['rss'] - base['rss']) / base['rss'] if base['rss'] else 0.0
+        current = file_snapshot(self.watch_dirs)
+        changed = sorted(path for path, stat in current.items() if self.files.get(path) != stat)
+        written = [path for path in changed if self.leaked(path)]
+        writes = self.io_stats['writes'] - self.writes
+        freed = sum(1 for profile in self.profiles if sip.isdeleted(profile))
+        over_budget = [b for b in self.budgets if b[0] > b[1]]
+        ok = (not written and not writes and freed == len(self.profiles) and not over_budget
+              and after['views'] <= base['views'] and growth <= self.tolerance)
+        mb = 1024 * 1024
+        print(f"Opened and closed {self.warmup + self.sessions} incognito windows of {self.tabs} tabs")
+        print(f"  files written:    {len(written)} under {len(self.watch_dirs)} watched directories, "
+              f"{writes} queued writes")
+        for path in written[:10]:
+            print(f"    {path}")
+        if len(changed) > len(written):
+            print(f"  regular profile:  {len(changed) - len(written)} of its own files saved, "
+                  f"none mention the test pages")
+        print(f"  profiles freed:   {freed} of {len(self.profiles)}")
+        for total, limit, evicted in self.budgets:
+            print(f"  cookies:          {total / 1024:.0f} KB of {limit / 1024:.0f} KB, {evicted} evicted")
+        print(f"  live web views:   {base['views']} -> {after['views']}")
+        print(f"  child processes:  {base['processes']} -> {after['processes']}")
+        print(f"  resident memory:  {base['rss'] / mb:.1f} MB -> {after['rss'] / mb:.1f} MB "
+              f"({growth:+.1%}, tolerance {self.tolerance:.0%})")
+        print("PASS" if ok else "FAIL: incognito left files behind or memory did not return to baseline")
+        self.finished.emit(ok)
@@ -0,0 +1,289 @@
+# load_driver.py (REPLAY URL LISTS ACROSS MANY TABS AND REPORT LOAD TIMES)
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile
+from PyQt5.QtCore import *
+from PyQt5 import sip
+from collections import deque
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from tracing import tracer
+
+# Everything the Performance API saw for the page: the document and its subresources
+MEASURE_SCRIPT = """
+(function () {
+    var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+    var transfer = 0, body = 0;
+    entries.forEach(function (e) { transfer += e.transferSize || 0; body += e.decodedBodySize || 0; });
+    return [transfer, body, entries.length];
+})()
+"""
+# A renderer that crashed or hangs never answers MEASURE_SCRIPT
+MEASURE_TIMEOUT_MS = 5000
+
+
+def load_driver_options(argv):
+    """Options for --load-driver, or None when it wasn't given"""
+    if "--load-driver" not in argv:
+        return None
+    parser = argparse.ArgumentParser(prog="main.py --load-driver",
+                                     description="Load a list of URLs across many tabs and report load times")
+    parser.add_argument("--load-driver", metavar="URL_FILE", required=True,
+                        help="one URL per line, '#' comments allowed, '-' for stdin")
+    parser.add_argument("--concurrency", type=int, default=4, help="tabs loading at once (default 4)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a load counts as failed")
+    parser.add_argument("--screenshots", metavar="DIR", help="save a PNG of every loaded page here")
+    parser.add_argument("--report", metavar="FILE", default="load_report.json", help="JSON report path")
+    options, _ = parser.parse_known_args(argv)
+    return options
+
+
+def read_url_list(path):
+    f = sys.stdin if path == "-" else open(path, encoding='utf-8')
+    try:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def create_scratch_profile(parent=None):
+    """A throwaway on-disk profile, so runs behave like real browsing without touching the user's.
+
+    Returns (profile, directory); pass both to remove_scratch_profile() when done.
+    """
+    directory = tempfile.mkdtemp(prefix="arc-load-driver-")
+    profile = QWebEngineProfile("load-driver", parent)
+    profile.setPersistentStoragePath(os.path.join(directory, "storage"))
+    profile.setCachePath(os.path.join(directory, "cache"))
+    return profile, directory
+
+
+def remove_scratch_profile(profile, directory, windows=(), timeout=2.0):
+    """Delete a scratch profile, then its directory.
+
+    The profile writes its last state when it is destroyed, which must wait
+    for its pages, so the windows using it are closed and deleted first.
+    Chromium's own threads (disk cache, network state) may still write into
+    the directory for a moment after that, so it is removed until it stays
+    gone, for at most timeout seconds.
+    """
+    for window in list(windows):
+        window.close()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    sip.delete(profile)
+    deadline = time.monotonic() + timeout
+    while True:
+        shutil.rmtree(directory, ignore_errors=True)
+        time.sleep(0.1)
+        if not os.path.exists(directory) or time.monotonic() > deadline:
+            return
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0
+
+
+class LoadDriver(QObject):
+    """Loads URLs in a browser window, at most concurrency tabs at a time.
+
+    Each URL gets its own tab; once it has loaded (or timed out) its
+    bytes are read from the page's Performance API, an optional
+    screenshot is taken and the tab is closed, making room for the next
+    URL. Screenshots are taken one at a time, since only the current tab
+    paints.
+    """
+    finished = pyqtSignal(dict)
+
+    def __init__(self, window, urls, concurrency=4, timeout=30.0, screenshot_dir=None,
+                 report_path=None, screenshot_delay_ms=300, parent=None):
+        super().__init__(parent)
+        self.window = window
+        self.urls = urls
+        self.concurrency = max(1, concurrency)
+        self.timeout_ms = int(timeout * 1000)
+        self.screenshot_dir = screenshot_dir
+        self.report_path = report_path
+        self.screenshot_delay_ms = screenshot_delay_ms
+        self.results = [None] * len(urls)
+        self.next_index = 0
+        self.active = 0
+        self.captures = deque()
+        self.capturing = False
+        self.started_at = 0.0
+
+    def start(self):
+        if self.screenshot_dir:
+            os.makedirs(self.screenshot_dir, exist_ok=True)
+        self.started_at = time.perf_counter()
+        self.fill()
+
+    def fill(self):
+        while self.active < self.concurrency and self.next_index < len(self.urls):
+            self.open(self.next_index)
+            self.next_index += 1
+        if not self.active and self.next_index >= len(self.urls) and not self.capturing:
+            self.finish()
+
+    def open(self, index):
+        url = self.urls[index]
+        self.active += 1
+        load = {'index': index, 'url': url, 'started': time.perf_counter(),
+                'first_progress_ms': None, 'done': False}
+        self.window.add_browser_tab(self.window.process_url(url))
+        browser = self.window.tabs.currentWidget()
+        load['browser'] = browser
+
+        def on_progress(progress):
+            if load['first_progress_ms'] is None and progress > 0:
+                load['first_progress_ms'] = round((time.perf_counter() - load['started']) * 1000, 1)
+
+        def on_finished(ok):
+            # A pooled view may still be finishing its warm-up about:blank
+            if browser.url().toString() != "about:blank":
+                self.loaded(load, ok, None)
+
+        load['slots'] = (on_progress, on_finished)
+        browser.loadProgress.connect(on_progress)
+        browser.loadFinished.connect(on_finished)
+        QTimer.singleShot(self.timeout_ms, lambda: self.loaded(load, False, 'timeout'))
+
+    def loaded(self, load, ok, error):
+        if load['done']:
+            return
+        load['done'] = True
+        browser = load['browser']
+        load['ms'] = round((time.perf_counter() - load['started']) * 1000, 1)
+        for signal, slot in zip((browser.loadProgress, browser.loadFinished), load.pop('slots')):
+            signal.disconnect(slot)
+        if error:
+            browser.stop()
+        elif getattr(browser, 'pending_url', None):
+            # The browser thought it was offline and showed its offline page instead
+            ok, error = False, 'offline'
+        elif not ok:
+            error = 'load failed'
+        load['ok'] = ok
+        load['error'] = error
+        load['measured'] = False
+        browser.page().runJavaScript(MEASURE_SCRIPT, lambda sizes: self.measured(load, sizes))
+        QTimer.singleShot(MEASURE_TIMEOUT_MS, lambda: self.measured(load, None, 'measure timeout'))
+
+    def measured(self, load, sizes, error=None):
+        """Record the result and free the tab's slot; error is set when the page never answered"""
+        if load['measured']:
+            return
+        load['measured'] = True
+        if error:
+            load['ok'], load['error'] = False, load['error'] or error
+        browser = load['browser']
+        transfer, body, resources = sizes if isinstance(sizes, list) and len(sizes) == 3 else (0, 0, 0)
+        result = {'url': load['url'], 'ok': load['ok'], 'error': load['error'], 'ms': load['ms'],
+                  'first_progress_ms': load['first_progress_ms'], 'bytes': int(transfer),
+                  'body_bytes': int(body), 'resources': int(resources),
+                  'blocked': self.window.content_blocker.blocked_count(browser.page())}
+        self.results[load['index']] = result
+        tracer.instant("load_driver_result", url=load['url'], ok=load['ok'], ms=load['ms'], bytes=result['bytes'])
+        if self.screenshot_dir and load['ok']:
+            self.captures.append(load)
+            self.capture_next()
+        else:
+            self.release(browser)
+
+    def capture_next(self):
+        if self.capturing or not self.captures:
+            return
+        self.capturing = True
+        load = self.captures.popleft()
+        self.window.tabs.setCurrentWidget(load['browser'])
+        QTimer.singleShot(self.screenshot_delay_ms, lambda: self.capture(load))
+
+    def capture(self, load):
+        path = os.path.join(self.screenshot_dir, f"{load['index']:05d}.png")
+        if load['browser'].grab().save(path, "PNG"):
+            self.results[load['index']]['screenshot'] = path
+        self.capturing = False
+        self.release(load['browser'])
+        self.capture_next()
+
+    def release(self, browser):
+        index = self.window.tabs.indexOf(browser)
+        if index >= 0:
+            self.window.discard_tab(index)
+        self.active -= 1
+        self.fill()
+
+    def summary(self):
+        seconds = time.perf_counter() - self.started_at
+        results = [r for r in self.results if r is not None]
+        times = sorted(r['ms'] for r in results if r['ok'])
+        succeeded = sum(1 for r in results if r['ok'])
+        return {
+            'urls': len(self.urls),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'concurrency': self.concurrency,
+            'seconds': round(seconds, 2),
+            'pages_per_second': round(len(results) / seconds, 2) if seconds else 0.0,
+            'bytes': sum(r['bytes'] for r in results),
+            'load_ms': {
+                'mean': round(sum(times) / len(times), 1) if times else 0,
+                'p50': percentile(times, 0.50),
+                'p95': percentile(times, 0.95),
+                'max': times[-1] if times else 0,
+            },
+            'errors': sorted({r['error'] for r in results if r['error']}),
+            'results': results,
+        }
+
+    def finish(self):
+        report = self.summary()
+        if self.report_path:
+            try:
+                with open(self.report_path, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, indent=2)
+            except OSError as e:
+                print(f"Error writing load report: {e}")
+        load_ms = report['load_ms']
+        print(f"Loaded {report['urls']} URLs, {report['concurrency']} at a time, in {report['seconds']} s "
+              f"({report['pages_per_second']} pages/s): {report['succeeded']} ok, {report['failed']} failed")
+        print(f"  load time: mean {load_ms['mean']} ms, p50 {load_ms['p50']} ms, p95 {load_ms['p95']} ms, "
+              f"max {load_ms['max']} ms")
+        print(f"  transferred {report['bytes'] / (1024 * 1024):.1f} MB"
+              + (f", errors: {', '.join(report['errors'])}" if report['errors'] else ""))
+        self.finished.emit(report)
+
+
+def benchmark(pages=100, concurrency=(1, 4, 8)):
+    """Replay the same list against the local stand-in server at several concurrency windows"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from leak_check import serve_test_pages
+    from main import SimpleBrowser
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    SimpleBrowser.scratch_profile, scratch_dir = create_scratch_profile(app)
+    # No cookies: on one host they pile up past http.server's 64 KB header line limit
+    server, base_url = serve_test_pages(cookies=0)
+    try:
+        for tabs in concurrency:
+            window = SimpleBrowser()
+            window.show()
+            # A fresh path per run so the memory cache doesn't flatter later runs
+            driver = LoadDriver(window, [f"{base_url}/run{tabs}/page{i}" for i in range(pages)], concurrency=tabs)
+            loop = QEventLoop()
+            driver.finished.connect(loop.quit)
+            driver.start()
+            loop.exec_()
+            window.close()
+    finally:
+        server.shutdown()
+        remove_scratch_profile(SimpleBrowser.scratch_profile, scratch_dir, SimpleBrowser.windows)
+        SimpleBrowser.scratch_profile = None
+
+
+if __name__ == "__main__":
+    benchmark()
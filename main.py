@@ -1,30 +1,247 @@
 # main.py (COMPLETE WITH ALL FEATURES)
 import sys
 import os
+import json
+import re
+import urllib.parse
+from collections import deque
+
+# Hand URLs to a running browser before loading QtWebEngine at all
+from single_instance import forward_to_running_instance, InstanceServer
+if __name__ == "__main__" and not {"--new-instance", "--leak-check", "--incognito-check", "--load-driver"} & set(sys.argv):
+    if forward_to_running_instance([a for a in sys.argv[1:] if not a.startswith("-")]):
+        sys.exit(0)
+
 from PyQt5.QtWidgets import *
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage, QWebEngineProfile
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
+from PyQt5 import sip
 from landing_page import LandingPage
+from internal_pages import InternalPage
 from modern_ribbon import ModernRibbon
 
 # Import managers
 from history_manager import HistoryManager
+from history_retention import HistoryCompactor
+from history_import import HistoryImporter, default_history_files
+from incognito import BoundedHistoryManager, CookieBudget, create_incognito_profile
 from bookmarks_manager import BookmarksManager
 from settings_manager import SettingsManager
+from stall_watchdog import StallWatchdog
+from tracing import tracer, export_trace
+from downloads_manager import DownloadsManager, DownloadsDialog
+from profiles_manager import ProfilesManager, ProfileDialog
+from content_blocker import ContentBlocker
+from feeds_service import FeedsService
+from favicon_cache import FaviconCache
+from thumbnail_cache import ThumbnailCache
+from view_pool import ViewPool
+from connectivity_monitor import ConnectivityMonitor, is_local_url
+from url_classifier import classifier
+from theme_engine import ThemeEngine
+from io_executor import io_executor
+from leak_check import TabLeakCheck, IncognitoLeakCheck
+from load_driver import (LoadDriver, create_scratch_profile, remove_scratch_profile, load_driver_options,
+                         read_url_list)
+from suggestions import SuggestionService, Suggester
+
+class DataManager(QObject):
+    """Process-wide browsing data shared by every window.
+
+    All writes go through these methods so each window's bookmarks bar and
+    landing pages hear about changes made in any other window.
+    """
+    bookmarks_changed = pyqtSignal()
+    history_changed = pyqtSignal()
+    # The section that changed, e.g. 'appearance'
+    settings_changed = pyqtSignal(str)
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, history_manager=None, bookmarks_manager=None, settings_manager=None):
+        super().__init__()
+        self.history_manager = history_manager or HistoryManager()
+        self.bookmarks_manager = bookmarks_manager or BookmarksManager()
+        self.settings_manager = settings_manager or SettingsManager()
+        self.history_compactor = HistoryCompactor(self.history_manager, self.settings_manager, parent=self)
+        self.history_changed.connect(self.history_compactor.schedule)
+
+    def add_bookmark(self, title, url):
+        self.bookmarks_manager.add_bookmark(title, url)
+        self.bookmarks_changed.emit()
+
+    def remove_bookmark(self, url):
+        self.bookmarks_manager.remove_bookmark(url)
+        self.bookmarks_changed.emit()
+
+    def add_history_entry(self, url, title, typed=False):
+        self.history_manager.add_entry(url, title, typed=typed)
+        self.history_changed.emit()
+
+    def clear_history(self):
+        self.history_manager.clear_history()
+        self.history_changed.emit()
+
+    def import_history(self, path):
+        """Start importing another browser's history; returns the HistoryImporter.
+
+        Imported visits live in memory like the rest of history, so an
+        import lasts for the session. Importing the same file again in that
+        session only reads visits newer than the last import.
+        """
+        since = self.history_manager.imported.get(path, 0.0)
+        importer = HistoryImporter(self.history_manager, parent=self)
+        importer.finished.connect(lambda report: self.on_history_imported(importer, report))
+        importer.start(path, since)
+        return importer
+
+    def on_history_imported(self, importer, report):
+        self.history_manager.imported[report['path']] = report['last_visit']
+        if report['imported']:
+            self.history_changed.emit()
+        importer.deleteLater()
+
+    def delete_recent_history(self, seconds):
+        if self.history_manager.delete_recent(seconds):
+            self.history_changed.emit()
+
+    def delete_history_entries(self, ids):
+        if self.history_manager.delete_entries(ids):
+            self.history_changed.emit()
+
+    def remove_bookmarks(self, urls):
+        if self.bookmarks_manager.remove_bookmarks(urls):
+            self.bookmarks_changed.emit()
+
+    def forget_site(self, host):
+        """Delete a site's history and bookmarks, subdomains included"""
+        if self.history_manager.forget_site(host):
+            self.history_changed.emit()
+        if self.bookmarks_manager.forget_site(host):
+            self.bookmarks_changed.emit()
+
+    def set_setting(self, section, key, value):
+        self.set_settings(section, {key: value})
+
+    def set_settings(self, section, values):
+        """Change several keys of a section with a single settings_changed"""
+        for key, value in values.items():
+            self.settings_manager.set(section, key, value)
+        self.settings_changed.emit(section)
+
+
+class IncognitoDataManager(DataManager):
+    """Browsing data for incognito windows, held only in memory.
+
+    One instance, with its off-the-record profile, serves every incognito
+    window; the last of them to close frees it all. History is bounded and
+    bookmarks start as a copy of the regular ones. Settings are shared
+    with the regular windows, so theme changes reach both.
+    """
+    _instance = None
+    windows = 0
+
+    @classmethod
+    def acquire(cls):
+        cls.windows += 1
+        return cls.instance()
+
+    @classmethod
+    def release(cls):
+        """An incognito window closed; drop the session after the last one"""
+        cls.windows -= 1
+        if cls.windows == 0 and cls._instance is not None:
+            instance, cls._instance = cls._instance, None
+            # Qt owns it from here, so the profile outlives the window's pages
+            # until the event loop has deleted them
+            sip.transferto(instance, None)
+            instance.deleteLater()
+            tracer.instant("incognito_session_closed")
 
-class DataManager:
     def __init__(self):
-        self.history_manager = HistoryManager()
-        self.bookmarks_manager = BookmarksManager()
-        self.settings_manager = SettingsManager()
+        regular = DataManager.instance()
+        settings = regular.settings_manager
+        super().__init__(BoundedHistoryManager(settings.get('privacy', 'incognito_history_visits', 5000)),
+                         BookmarksManager(), settings)
+        for bookmark in regular.bookmarks_manager.get_bookmarks():
+            self.bookmarks_manager.add_bookmark(bookmark['title'], bookmark['url'])
+        regular.settings_changed.connect(self.settings_changed)
+        self.profile = create_incognito_profile(settings.get('privacy', 'incognito_cache_mb', 32), parent=self)
+        self.cookie_budget = CookieBudget(self.profile.cookieStore(),
+                                          settings.get('privacy', 'incognito_cookie_kb', 256) * 1024, parent=self)
+        tracer.instant("incognito_session_opened")
+
+    def set_settings(self, section, values):
+        DataManager.instance().set_settings(section, values)
+
 
 class SimpleBrowser(QMainWindow):
-    def __init__(self):
+    # Downloads come from the shared default profile, so one manager serves every window
+    downloads_manager = None
+    content_blocker = None
+    feeds_service = None
+    favicon_cache = None
+    thumbnail_cache = None
+    connectivity_monitor = None
+    suggestion_service = None
+    theme_engine = None
+    profiles_manager = None
+    offline_html = None
+    # Set for load-driver runs: regular windows browse in it and write nothing to the user's data
+    scratch_profile = None
+
+    # Open windows; top-level widgets must stay referenced to stay alive
+    windows = []
+    # Closed tabs kept per window for Ctrl+Shift+T
+    closed_tabs_limit = 25
+
+    def __init__(self, incognito=False):
         super().__init__()
-        self.data_manager = DataManager()
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        SimpleBrowser.windows.append(self)
+        self.destroyed.connect(lambda obj=None, w=self: SimpleBrowser.windows.remove(w))
+        self.incognito = incognito
+        if incognito:
+            first = IncognitoDataManager.windows == 0
+            self.data_manager = IncognitoDataManager.acquire()
+            self.profile = self.data_manager.profile
+            self.destroyed.connect(lambda obj=None: IncognitoDataManager.release())
+        else:
+            self.data_manager = DataManager.instance()
+            self.profile = self.regular_profile()
+        # Thumbnails and favicons are only cached for the user's own browsing
+        self.caches_pages = not incognito and self.scratch_profile is None
+        self.data_manager.bookmarks_changed.connect(self.refresh_bookmarks_display)
+        self.data_manager.settings_changed.connect(self.on_settings_changed)
+        self.setup_downloads()
+        self.setup_content_blocker()
+        if incognito and first:
+            self.downloads_manager.attach_profile(self.profile, resumable=False)
+        if SimpleBrowser.feeds_service is None:
+            SimpleBrowser.feeds_service = FeedsService()
+        if SimpleBrowser.favicon_cache is None:
+            SimpleBrowser.favicon_cache = FaviconCache()
+        self.favicon_cache.icon_updated.connect(self.on_favicon_updated)
+        if SimpleBrowser.thumbnail_cache is None:
+            SimpleBrowser.thumbnail_cache = ThumbnailCache()
+        if SimpleBrowser.connectivity_monitor is None:
+            SimpleBrowser.connectivity_monitor = ConnectivityMonitor()
+            SimpleBrowser.connectivity_monitor.start()
+        self.connectivity_monitor.online_changed.connect(self.on_online_changed)
+        if SimpleBrowser.theme_engine is None:
+            SimpleBrowser.theme_engine = ThemeEngine()
+        if SimpleBrowser.suggestion_service is None:
+            SimpleBrowser.suggestion_service = SuggestionService.from_environment(
+                self.data_manager.history_manager, self.data_manager.settings_manager)
         
-        self.setWindowTitle("Arc Browser")
+        self.setWindowTitle("Arc Browser (Incognito)" if incognito else "Arc Browser")
         self.setGeometry(100, 100, 1200, 800)
 
         # Central layout
@@ -37,6 +254,7 @@ class SimpleBrowser(QMainWindow):
         # Create ribbon
         self.ribbon = ModernRibbon(self)
         self.layout.addWidget(self.ribbon)
+        self.setup_address_suggestions()
 
         # Create bookmarks bar
         self.create_bookmarks_bar()
@@ -47,6 +265,13 @@ class SimpleBrowser(QMainWindow):
         self.tabs.tabCloseRequested.connect(self.close_tab)
         self.tabs.currentChanged.connect(self.on_tab_changed)
         self.layout.addWidget(self.tabs)
+        self.closed_tabs = deque(maxlen=self.closed_tabs_limit)
+        QShortcut(QKeySequence("Ctrl+Shift+T"), self, self.reopen_closed_tab)
+
+        # Pre-warmed views for new tabs, filled while the UI is idle
+        pool_size = self.data_manager.settings_manager.get('performance', 'view_pool_size', 2)
+        self.view_pool = ViewPool(self.create_landing_page, size=pool_size, parent=self,
+                                  view_factory=self.create_browser_view)
 
         # Add first tab as landing page
         self.add_landing_tab()
@@ -54,28 +279,78 @@ class SimpleBrowser(QMainWindow):
         # Apply theme
         self.apply_theme()
 
+    @classmethod
+    def regular_profile(cls):
+        return cls.scratch_profile or QWebEngineProfile.defaultProfile()
+
+    def setup_address_suggestions(self):
+        self.suggestion_model = QStringListModel(self)
+        self.address_completer = QCompleter(self.suggestion_model, self)
+        # Suggestions are already matched; don't let Qt filter them again
+        self.address_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.address_completer.activated[str].connect(self.on_suggestion_activated)
+        self.ribbon.address_bar.setCompleter(self.address_completer)
+        self.suggestion_activated = False
+
+        self.address_suggester = Suggester(self.suggestion_service, parent=self)
+        self.address_suggester.suggestions_ready.connect(self.show_address_suggestions)
+        # textEdited fires for typing only, not for setText from page loads
+        self.ribbon.address_bar.textEdited.connect(self.address_suggester.request)
+
+    def show_address_suggestions(self, prefix, suggestions):
+        address_bar = self.ribbon.address_bar
+        if not address_bar.hasFocus() or prefix != address_bar.text().strip():
+            return
+        self.suggestion_model.setStringList(suggestions)
+        if suggestions:
+            self.address_completer.complete()
+        else:
+            self.address_completer.popup().hide()
+
+    def on_suggestion_activated(self, text):
+        # Enter in the popup also reaches returnPressed; navigate only once
+        self.suggestion_activated = True
+        QTimer.singleShot(0, lambda: setattr(self, 'suggestion_activated', False))
+        self.address_suggester.cancel()
+        self.navigate_to_url(text)
+
+    def setup_downloads(self):
+        if SimpleBrowser.downloads_manager is None:
+            manager = DownloadsManager()
+            if self.scratch_profile is None:
+                cookies = manager.attach_profile(QWebEngineProfile.defaultProfile())
+                manager.resume_pending(cookies)
+            else:
+                # No resume state: the run's downloads die with it
+                manager.attach_profile(self.scratch_profile, resumable=False)
+            SimpleBrowser.downloads_manager = manager
+        SimpleBrowser.downloads_manager.download_added.connect(self.on_download_added)
+
+    def setup_content_blocker(self):
+        if SimpleBrowser.content_blocker is None:
+            SimpleBrowser.content_blocker = ContentBlocker()
+
+    def on_download_added(self, job):
+        if self.isActiveWindow():
+            self.show_downloads()
+
     def apply_theme(self):
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #1a1a1a;
-                color: #ffffff;
-            }
-            QTabWidget::pane {
-                border: 1px solid #404040;
-                background-color: #252525;
-            }
-            QTabBar::tab {
-                background-color: #252525;
-                color: #ffffff;
-                padding: 8px 16px;
-                border: 1px solid #404040;
-                border-bottom: none;
-            }
-            QTabBar::tab:selected {
-                background-color: #1a1a1a;
-                border-bottom: 2px solid #ff6f3c;
-            }
-        """)
+        """Apply the theme from settings app-wide (no-op when it hasn't changed)"""
+        theme = self.data_manager.settings_manager.get('appearance', 'theme', 'dark')
+        with tracer.span("apply_theme", theme=theme):
+            self.theme_engine.apply(theme)
+
+    def set_theme(self, name):
+        self.data_manager.set_setting('appearance', 'theme', name)
+
+    def open_urls(self, urls):
+        """Open URLs handed over from another launch, then come to the front"""
+        for url in urls:
+            self.add_browser_tab(self.process_url(url))
+        if self.isMinimized():
+            self.showNormal()
+        self.raise_()
+        self.activateWindow()
 
     def on_tab_changed(self, index):
         """Update address bar when tab changes"""
@@ -95,6 +370,7 @@ class SimpleBrowser(QMainWindow):
             self.bookmarks_bar.deleteLater()
             
         self.bookmarks_bar = QWidget()
+        self.bookmarks_bar.setObjectName("bookmarksBar")
         layout = QHBoxLayout(self.bookmarks_bar)
         layout.setContentsMargins(10, 4, 10, 4)
         layout.setSpacing(6)
@@ -104,47 +380,53 @@ class SimpleBrowser(QMainWindow):
         for bookmark in bookmarks[:10]:  # Show first 10 bookmarks
             btn = QPushButton(bookmark['title'][:12])
             btn.setFixedHeight(28)
-            btn.setStyleSheet("""
-                QPushButton {
-                    background: rgba(255,255,255,0.08);
-                    color: white;
-                    border: none;
-                    border-radius: 8px;
-                    padding: 4px 10px;
-                }
-                QPushButton:hover {
-                    background: rgba(255,111,60,0.3);
-                }
-            """)
+            icon = self.favicon_cache.icon_for_url(bookmark['url'])
+            if icon:
+                btn.setIcon(icon)
             btn.clicked.connect(lambda checked, u=bookmark['url']: self.navigate_to_url(u))
             layout.addWidget(btn)
 
         # Add bookmark button
         add_btn = QPushButton("+")
         add_btn.setFixedSize(28, 28)
-        add_btn.setStyleSheet("""
-            QPushButton {
-                background: rgba(255,255,255,0.1);
-                color: white;
-                border: none;
-                border-radius: 8px;
-            }
-            QPushButton:hover {
-                background: rgba(255,111,60,0.3);
-            }
-        """)
         add_btn.clicked.connect(self.add_current_bookmark)
         layout.addWidget(add_btn)
         
         layout.addStretch()
         self.layout.insertWidget(1, self.bookmarks_bar)
 
-    def add_landing_tab(self):
-        """Add a new landing page tab"""
-        landing = LandingPage(
+    def closeEvent(self, event):
+        # Pooled views have no parent, so they would outlive the window
+        self.view_pool.clear()
+        super().closeEvent(event)
+
+    def create_landing_page(self):
+        return LandingPage(
             bookmarks_manager=self.data_manager.bookmarks_manager,
-            settings_manager=self.data_manager.settings_manager
+            settings_manager=self.data_manager.settings_manager,
+            feeds_service=self.feeds_service,
+            favicon_cache=self.favicon_cache,
+            history_manager=self.data_manager.history_manager,
+            thumbnail_cache=self.thumbnail_cache,
+            suggestion_service=self.suggestion_service,
+            profile=self.profile
         )
+
+    def create_browser_view(self):
+        view = QWebEngineView()
+        if self.profile is not QWebEngineProfile.defaultProfile():
+            view.setPage(QWebEnginePage(self.profile, view))
+        # Each tab filters its own requests and keeps its own blocked count
+        self.content_blocker.attach(view.page())
+        return view
+
+    def add_landing_tab(self):
+        """Add a new landing page tab"""
+        landing, pooled = self.view_pool.take_landing()
+        if pooled:
+            # Rendered a while ago; top sites may have moved since
+            landing.refresh_top_sites()
+        self.view_pool.track_visible('landing', landing, pooled, None if pooled else landing.loadFinished)
         landing.search_requested.connect(self.handle_search)
         landing.url_requested.connect(self.navigate_to_url)
         landing.background_changed.connect(self.handle_background_change)
@@ -153,20 +435,37 @@ class SimpleBrowser(QMainWindow):
         self.tabs.setCurrentIndex(index)
         self.ribbon.address_bar.setText("arc://newtab")
 
-    def add_browser_tab(self, url=None):
-        """Add a new browser tab"""
+    def add_browser_tab(self, url=None, trace_id=0, history_state=None):
+        """Add a new browser tab, optionally restoring a saved navigation history"""
         if url is None:
             url = "https://www.google.com"
             
-        browser = QWebEngineView()
-        browser.setUrl(QUrl(url))
-        
-        index = self.tabs.addTab(browser, "Loading...")
-        self.tabs.setCurrentIndex(index)
+        with tracer.span("create_tab", url=url):
+            browser, pooled = self.view_pool.take_browser_view()
+            self.view_pool.track_visible('browser', browser, pooled, browser.loadStarted)
+            browser.trace_id = trace_id
+            browser.trace_progress_seen = False
+            browser.pending_url = None
+            browser.failed_url = None
+            browser.typed_navigation = False
+            if history_state is None or not self.restore_history(browser, history_state):
+                self.load_in_view(browser, url)
+            
+            index = self.tabs.addTab(browser, "Loading...")
+            icon = self.favicon_cache.icon_for_url(url)
+            if icon:
+                self.tabs.setTabIcon(index, icon)
+            self.tabs.setCurrentIndex(index)
         
         # Connect signals
         browser.urlChanged.connect(lambda qurl: self.update_urlbar(qurl))
-        browser.loadFinished.connect(lambda ok, i=index, b=browser: self.update_tab_title(ok, b, i))
+        browser.loadFinished.connect(lambda ok, b=browser: self.update_tab_title(ok, b))
+        browser.loadProgress.connect(lambda progress, b=browser: self.trace_load_progress(progress, b))
+        browser.loadFinished.connect(lambda ok, b=browser: self.trace_load_finished(ok, b))
+        browser.loadFinished.connect(lambda ok, b=browser: self.schedule_thumbnail(ok, b))
+        browser.loadFinished.connect(lambda ok, b=browser: self.check_load_failure(ok, b))
+        browser.urlChanged.connect(lambda qurl, b=browser: self.handle_browser_arc_url(qurl, b))
+        browser.iconChanged.connect(lambda icon, b=browser: self.on_icon_changed(icon, b))
         
         # Add to history
         browser.urlChanged.connect(lambda qurl: self.add_to_history(qurl, browser))
@@ -175,67 +474,220 @@ class SimpleBrowser(QMainWindow):
         """Add page to history"""
         url = qurl.toString()
         if url not in ["about:blank", "arc://newtab"] and not url.startswith("arc://"):
-            title = browser.page().title()
-            self.data_manager.history_manager.add_entry(url, title)
+            with tracer.span("history_commit", url=url):
+                title = browser.page().title()
+                # The first page a typed navigation lands on counts as typed
+                typed, browser.typed_navigation = browser.typed_navigation, False
+                self.data_manager.add_history_entry(url, title, typed)
+
+    def load_in_view(self, browser, url, force=False):
+        """Load url, or show the offline page at once if the network is known to be down"""
+        if (not force and self.connectivity_monitor.is_offline() and url.startswith(("http://", "https://"))
+                and not is_local_url(url)):
+            tracer.instant("offline_short_circuit", url=url)
+            self.show_offline_page(browser, url)
+            return
+        browser.pending_url = None
+        browser.setUrl(QUrl(url))
+
+    def show_offline_page(self, browser, url):
+        browser.pending_url = url
+        fallback = "<html><body><h1>No internet connection</h1></body></html>"
+        if SimpleBrowser.offline_html is None:
+            # Preloaded at startup; the fallback stands in until the read is done
+            source = io_executor.read_future("no_internet.html")
+            if source.done():
+                SimpleBrowser.offline_html = source.result() or fallback
+        browser.setHtml(SimpleBrowser.offline_html or fallback, QUrl("arc://offline/"))
+
+    def check_load_failure(self, ok, browser):
+        """A failed load may mean the network dropped; have the monitor confirm.
+        A loaded page proves the network is up."""
+        url = browser.url().toString()
+        remote = url.startswith(("http://", "https://")) and not is_local_url(url)
+        if ok:
+            browser.failed_url = None
+            if remote:
+                self.connectivity_monitor.report_success()
+        elif remote:
+            browser.failed_url = url
+            self.connectivity_monitor.report_failure()
+
+    def handle_browser_arc_url(self, qurl, browser):
+        if qurl.toString() == "arc://retry" and browser.pending_url:
+            # Always really try: if the page loads, the monitor learns it was wrong
+            self.connectivity_monitor.check_now()
+            self.load_in_view(browser, browser.pending_url, force=True)
+
+    def on_online_changed(self, online):
+        """Swap tabs to or from the offline page as connectivity changes"""
+        for i in range(self.tabs.count()):
+            browser = self.tabs.widget(i)
+            if online and getattr(browser, 'pending_url', None):
+                self.load_in_view(browser, browser.pending_url)
+            elif not online and getattr(browser, 'failed_url', None):
+                self.show_offline_page(browser, browser.failed_url)
+                browser.failed_url = None
+
+    def schedule_thumbnail(self, ok, browser):
+        """Grab a top-sites thumbnail once the page has had time to paint"""
+        # Thumbnails are files on disk; incognito pages never get one
+        if ok and self.caches_pages:
+            QTimer.singleShot(800, lambda: not sip.isdeleted(browser) and self.tabs.indexOf(browser) >= 0
+                              and self.thumbnail_cache.capture(browser))
+
+    def on_icon_changed(self, icon, browser):
+        """Show the page's favicon on its tab and remember it for the host"""
+        index = self.tabs.indexOf(browser)
+        if index >= 0:
+            self.tabs.setTabIcon(index, icon)
+        if self.caches_pages:
+            self.favicon_cache.store(browser.url(), icon)
+
+    def on_favicon_updated(self, host):
+        """Refresh the bookmarks bar when one of its hosts gets an icon"""
+        bookmarks = self.data_manager.bookmarks_manager.get_bookmarks()[:10]
+        if any(self.favicon_cache.host_for(b['url']) == host for b in bookmarks):
+            self.create_bookmarks_bar()
+
+    def trace_load_progress(self, progress, browser):
+        """Mark the first loadProgress of a traced navigation"""
+        if browser.trace_id and not browser.trace_progress_seen:
+            browser.trace_progress_seen = True
+            tracer.step("first_load_progress", browser.trace_id, progress=progress)
+
+    def trace_load_finished(self, ok, browser):
+        """Close the navigation span once the page has loaded"""
+        if browser.trace_id:
+            tracer.end("navigation", browser.trace_id, ok=ok)
+            browser.trace_id = 0
 
     def close_tab(self, index):
         if self.tabs.count() > 1:
-            self.tabs.removeTab(index)
+            self.closed_tabs.append(self.tab_state(index))
+            self.discard_tab(index)
         else:
             self.close()
 
+    def discard_tab(self, index):
+        """Remove a tab and destroy its view so the renderer is released now"""
+        widget = self.tabs.widget(index)
+        self.tabs.removeTab(index)
+        if isinstance(widget, QWebEngineView):
+            widget.stop()
+        widget.deleteLater()
+
+    def tab_state(self, index):
+        """Enough of a tab to reopen it: URL, title and back/forward history"""
+        widget = self.tabs.widget(index)
+        state = {'index': index, 'title': self.tabs.tabText(index), 'url': "arc://newtab", 'history': None}
+        if isinstance(widget, LandingPage):
+            return state
+        if isinstance(widget, InternalPage):
+            state['url'] = f"arc://{widget.page_type}"
+            return state
+        pending = getattr(widget, 'pending_url', None)
+        state['url'] = pending or widget.url().toString()
+        if not pending:
+            # The offline page has no history worth restoring
+            data = QByteArray()
+            stream = QDataStream(data, QIODevice.WriteOnly)
+            stream << widget.history()
+            state['history'] = bytes(data)
+        return state
+
+    def restore_history(self, browser, history_state):
+        stream = QDataStream(QByteArray(history_state), QIODevice.ReadOnly)
+        stream >> browser.history()
+        return stream.status() == QDataStream.Ok and browser.history().count() > 0
+
+    def reopen_closed_tab(self):
+        if not self.closed_tabs:
+            return
+        state = self.closed_tabs.pop()
+        tracer.instant("reopen_closed_tab", url=state['url'])
+        if state['url'] == "arc://newtab":
+            self.add_landing_tab()
+        elif state['url'] in ("arc://history", "arc://bookmarks"):
+            self.open_internal_page(state['url'][6:])
+        else:
+            self.add_browser_tab(state['url'], history_state=state['history'])
+        # Put it back where it was
+        current = self.tabs.currentIndex()
+        target = min(state['index'], self.tabs.count() - 1)
+        if target != current:
+            self.tabs.tabBar().moveTab(current, target)
+
     def handle_search(self, query):
         """Handle search from landing page"""
-        print(f"Search requested: {query}")
-        if query.startswith(("http://", "https://")):
-            self.navigate_to_url(query)
-        else:
-            search_url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
-            self.navigate_to_url(search_url)
+        tracer.instant("search_requested", query=query)
+        self.navigate_to_url(classifier.to_url(query))
 
     def handle_background_change(self, background_data):
-        """Handle background change from landing page"""
-        print(f"Background change requested: {background_data}")
-        # You can implement background change logic here
-        QMessageBox.information(self, "Background", f"Background would change to: {background_data}")
-
-    def navigate_to_url(self, url):
-        """Main navigation method"""
-        print(f"Navigating to: {url}")
+        """Save a background picked on a landing page; settings_changed updates the others"""
+        tracer.instant("background_change", data=background_data)
+        kind, _, value = background_data.partition("/")
+        value = urllib.parse.unquote(value)
+        if kind == "image":
+            match = re.search(r"bg(\d+)\.jpg$", value)
+            if match:
+                self.data_manager.set_settings('appearance', {'preset_bg': int(match.group(1)),
+                                                              'background_type': 'preset'})
+        elif kind == "color":
+            self.data_manager.set_settings('appearance', {'background_color': value, 'background_type': 'color'})
+        elif kind == "gradient":
+            try:
+                colors = json.loads(value)
+                gradient = f"linear-gradient(135deg, {colors['start']} 0%, {colors['end']} 100%)"
+            except (ValueError, KeyError, TypeError):
+                return
+            self.data_manager.set_settings('appearance', {'background_gradient': gradient,
+                                                          'background_type': 'gradient'})
+        # Uploads only reach us as a file name, so they stay local to the page that chose them
+
+    def navigate_to_url(self, url, typed=False):
+        """Main navigation method; typed marks addresses entered in the address bar"""
+        trace_id = tracer.new_id()
+        tracer.begin("navigation", trace_id, url=url)
         
         current_widget = self.tabs.currentWidget()
         
-        if isinstance(current_widget, LandingPage):
-            # Replace landing page with browser tab
+        if isinstance(current_widget, (LandingPage, InternalPage)):
+            # Replace landing or internal page with browser tab
             current_index = self.tabs.currentIndex()
-            self.tabs.removeTab(current_index)
-            self.add_browser_tab(url)
+            self.discard_tab(current_index)
+            with tracer.span("process_url", url=url):
+                processed_url = self.process_url(url)
+            self.add_browser_tab(processed_url, trace_id)
+            self.tabs.currentWidget().typed_navigation = typed
         else:
             # Navigate in current browser tab
-            processed_url = self.process_url(url)
-            current_widget.setUrl(QUrl(processed_url))
+            with tracer.span("process_url", url=url):
+                processed_url = self.process_url(url)
+            with tracer.span("set_url", url=processed_url):
+                current_widget.trace_id = trace_id
+                current_widget.trace_progress_seen = False
+                current_widget.typed_navigation = typed
+                self.load_in_view(current_widget, processed_url)
 
     def process_url(self, url):
         """Process URLs to handle search queries"""
-        if url.startswith(("http://", "https://", "arc://")):
-            return url
-            
-        if "." in url and " " not in url:
-            return "https://" + url
-        else:
-            return f"https://www.google.com/search?q={url.replace(' ', '+')}"
+        return classifier.to_url(url)
 
     def update_urlbar(self, qurl):
         """Update address bar when page URL changes"""
         self.ribbon.address_bar.setText(qurl.toString())
         self.ribbon.address_bar.setCursorPosition(0)
 
-    def update_tab_title(self, ok, browser, index):
+    def update_tab_title(self, ok, browser):
         """Update tab title when page loads"""
-        if ok:
+        index = self.tabs.indexOf(browser)
+        if ok and index >= 0:
             title = browser.page().title()
             short = title[:20] + "..." if len(title) > 20 else title
             self.tabs.setTabText(index, short)
+            blocked = self.content_blocker.blocked_count(browser.page())
+            self.tabs.setTabToolTip(index, f"{title}\n🛡 {blocked} requests blocked" if blocked else title)
 
     # ===================== Navigation Methods =====================
     def go_back(self):
@@ -275,9 +727,13 @@ class SimpleBrowser(QMainWindow):
 
     def load_url(self):
         """Called when user presses Enter in address bar"""
+        if self.suggestion_activated:
+            return
+        self.address_suggester.cancel()
         url = self.ribbon.address_bar.text().strip()
+        tracer.instant("address_bar_submit", text=url)
         if url:
-            self.navigate_to_url(url)
+            self.navigate_to_url(url, typed=True)
 
     # ===================== Bookmark Methods =====================
     def add_current_bookmark(self):
@@ -287,53 +743,233 @@ class SimpleBrowser(QMainWindow):
             url = current.url().toString()
             title = current.title()
             if url and url != "about:blank" and not url.startswith("arc://"):
-                self.data_manager.bookmarks_manager.add_bookmark(title, url)
-                self.refresh_bookmarks_display()
+                if self.data_manager.bookmarks_manager.is_bookmarked(url):
+                    self.data_manager.add_bookmark(title, url)
+                    QMessageBox.information(self, "Bookmark Updated", f"'{title}' is already bookmarked.")
+                    return
+                self.data_manager.add_bookmark(title, url)
                 QMessageBox.information(self, "Bookmark Added", f"Added '{title}' to bookmarks!")
 
     def refresh_bookmarks_display(self):
         """Refresh bookmarks bar and landing pages"""
         self.create_bookmarks_bar()
         
-        # Refresh any open landing pages
-        for i in range(self.tabs.count()):
-            widget = self.tabs.widget(i)
-            if isinstance(widget, LandingPage):
-                widget.setup_landing_page()
+        # Patch open (and pre-rendered) landing pages in place
+        for landing in self.landing_pages():
+            landing.update_bookmarks()
+
+    def on_settings_changed(self, section):
+        # Only appearance settings show up in the window itself
+        if section == 'appearance':
+            self.refresh_landing_background()
+            self.apply_theme()
+
+    def refresh_landing_background(self):
+        for landing in self.landing_pages():
+            landing.update_background()
+
+    def landing_pages(self):
+        pages = [self.tabs.widget(i) for i in range(self.tabs.count())
+                 if isinstance(self.tabs.widget(i), LandingPage)]
+        if self.view_pool.landing is not None:
+            pages.append(self.view_pool.landing)
+        return pages
 
     # ===================== Menu Methods =====================
     def show_history(self):
-        QMessageBox.information(self, "History", f"History has {len(self.data_manager.history_manager.get_history())} entries")
+        self.open_internal_page('history')
 
     def show_bookmarks_manager(self):
-        QMessageBox.information(self, "Bookmarks", f"You have {len(self.data_manager.bookmarks_manager.get_bookmarks())} bookmarks")
+        self.open_internal_page('bookmarks')
+
+    def import_history(self):
+        """Pick a Chromium or Firefox history database and import it with progress"""
+        if self.incognito:
+            QMessageBox.information(self, "Import History", "History can't be imported into an incognito window.")
+            return
+        other = "Choose a file..."
+        choices = default_history_files() + [other]
+        path, ok = QInputDialog.getItem(self, "Import History", "Import browsing history from:",
+                                        choices, 0, False)
+        if not ok:
+            return
+        if path == other:
+            path, _ = QFileDialog.getOpenFileName(self, "Import History", os.path.expanduser("~"),
+                                                  "History databases (History places.sqlite);;All files (*)")
+            if not path:
+                return
+
+        progress = QProgressDialog("Importing history...", "Cancel", 0, 0, self)
+        progress.setWindowTitle("Import History")
+        progress.setMinimumDuration(500)
+        importer = self.data_manager.import_history(path)
+        importer.progress.connect(lambda done, total: (progress.setMaximum(total), progress.setValue(done)))
+        progress.canceled.connect(importer.cancel)
+        importer.finished.connect(lambda report: self.on_history_imported(progress, report))
+
+    def on_history_imported(self, progress, report):
+        progress.close()
+        progress.deleteLater()
+        if report['error']:
+            QMessageBox.warning(self, "Import History", f"Could not import history:\n{report['error']}")
+        elif not report['cancelled']:
+            QMessageBox.information(self, "Import History",
+                                    f"Imported {report['imported']:,} visits in {report['seconds']} s.")
+
+    def open_internal_page(self, page_type):
+        """Show an arc:// management page, reusing an open one"""
+        for i in range(self.tabs.count()):
+            widget = self.tabs.widget(i)
+            if isinstance(widget, InternalPage) and widget.page_type == page_type:
+                widget.setup_page()
+                self.tabs.setCurrentIndex(i)
+                return
+        page = InternalPage(page_type, self.data_manager, self.profile)
+        page.page_requested.connect(lambda url, p=page: self.handle_internal_request(p, url))
+        page.history_cleared.connect(self.data_manager.clear_history)
+        page.history_range_deleted.connect(self.data_manager.delete_recent_history)
+        page.history_entries_deleted.connect(self.data_manager.delete_history_entries)
+        page.bookmark_added.connect(self.data_manager.add_bookmark)
+        page.bookmark_deleted.connect(self.data_manager.remove_bookmark)
+        page.bookmarks_deleted.connect(self.data_manager.remove_bookmarks)
+        page.site_forgotten.connect(self.data_manager.forget_site)
+        index = self.tabs.addTab(page, f"{'🕘' if page_type == 'history' else '⭐'} {page_type.title()}")
+        self.tabs.setCurrentIndex(index)
+        self.ribbon.address_bar.setText(f"arc://{page_type}")
+
+    def handle_internal_request(self, page, url):
+        """Links on an internal page replace it, like those on a landing page"""
+        index = self.tabs.indexOf(page)
+        if index < 0:
+            return
+        self.tabs.setCurrentIndex(index)
+        if url.startswith("arc://newtab"):
+            self.discard_tab(index)
+            self.add_landing_tab()
+            self.tabs.tabBar().moveTab(self.tabs.currentIndex(), index)
+        else:
+            self.navigate_to_url(url)
 
     def show_settings(self):
         QMessageBox.information(self, "Settings", "Settings manager would open here")
 
     def show_profiles(self):
-        QMessageBox.information(self, "Profiles", "Profiles manager would open here")
+        if SimpleBrowser.profiles_manager is None:
+            SimpleBrowser.profiles_manager = ProfilesManager()
+        dialog = ProfileDialog(SimpleBrowser.profiles_manager, self)
+        dialog.exec_()
 
     def new_incognito_window(self):
-        QMessageBox.information(self, "Incognito", "New incognito window would open")
+        browser = SimpleBrowser(incognito=True)
+        browser.show()
 
     def new_window(self):
         browser = SimpleBrowser()
         browser.show()
 
     def show_downloads(self):
-        QMessageBox.information(self, "Downloads", "Downloads manager would open here")
+        if getattr(self, 'downloads_dialog', None) is None:
+            self.downloads_dialog = DownloadsDialog(SimpleBrowser.downloads_manager, self)
+        self.downloads_dialog.show()
+        self.downloads_dialog.raise_()
 
     def clear_history(self):
-        self.data_manager.history_manager.clear_history()
+        self.data_manager.clear_history()
         QMessageBox.information(self, "History Cleared", "Browsing history has been cleared.")
 
 
+def open_forwarded_urls(urls):
+    """Open URLs from another launch in the most recently opened window.
+    A launch without URLs just brings that window to the front."""
+    # Never into an incognito window
+    regular = [w for w in SimpleBrowser.windows if not w.incognito]
+    if regular:
+        window = regular[-1]
+    else:
+        window = SimpleBrowser()
+        window.show()
+    window.open_urls(urls)
+
+
 if __name__ == "__main__":
+    # Replay a URL list headlessly: main.py --load-driver urls.txt [--concurrency N] ...
+    load_options = load_driver_options(sys.argv[1:])
+    if load_options:
+        # No window on screen, unless a platform was chosen explicitly
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
     app = QApplication(sys.argv)
     app.setApplicationName("Arc Browser")
+    scratch_dir = None
+    if load_options:
+        SimpleBrowser.scratch_profile, scratch_dir = create_scratch_profile(app)
+    # Templates are read by the I/O workers while Qt starts up
+    LandingPage.load_source()
+    io_executor.preload(["no_internet.html"])
+
+    # Opt-in GUI stall detection (set ARC_STALL_WATCHDOG_MS, e.g. 50)
+    watchdog = StallWatchdog.from_environment()
+    if watchdog:
+        watchdog.start()
+        app.aboutToQuit.connect(watchdog.stop)
+
+    # Chrome trace-event export (set ARC_TRACE=1)
+    app.aboutToQuit.connect(export_trace)
 
     browser = SimpleBrowser()
     browser.show()
-
-    sys.exit(app.exec_())
\ No newline at end of file
+    startup_urls = [a for a in sys.argv[1:] if not a.startswith("-")]
+    if startup_urls and not load_options:
+        browser.open_urls(startup_urls)
+
+    # Later launches forward their URLs here instead of starting a new process;
+    # a load-driver run is not the user's browser and must not take them
+    if not load_options:
+        instance_server = InstanceServer()
+        instance_server.urls_received.connect(open_forwarded_urls)
+        instance_server.listen()
+
+    # Keep partial downloads resumable across restarts
+    app.aboutToQuit.connect(SimpleBrowser.downloads_manager.shutdown)
+    app.aboutToQuit.connect(SimpleBrowser.feeds_service.shutdown)
+    app.aboutToQuit.connect(SimpleBrowser.thumbnail_cache.shutdown)
+    app.aboutToQuit.connect(SimpleBrowser.connectivity_monitor.shutdown)
+    app.aboutToQuit.connect(SimpleBrowser.suggestion_service.shutdown)
+    app.aboutToQuit.connect(ViewPool.export_metrics)
+    # Last, so writes queued by the shutdowns above still reach the disk
+    app.aboutToQuit.connect(io_executor.shutdown)
+    app.aboutToQuit.connect(io_executor.export_metrics)
+
+    # Open and close 200 tabs, exit non-zero if memory doesn't return to baseline
+    if "--leak-check" in sys.argv:
+        leak_check = TabLeakCheck(browser)
+        leak_check.finished.connect(lambda ok: app.exit(0 if ok else 1))
+        leak_check.start()
+
+    # Browse in incognito windows, exit non-zero if anything reached the disk or memory stayed
+    if "--incognito-check" in sys.argv:
+        profile = QWebEngineProfile.defaultProfile()
+        incognito_check = IncognitoLeakCheck(lambda: SimpleBrowser(incognito=True),
+                                             [os.getcwd(), profile.persistentStoragePath(), profile.cachePath(),
+                                              SimpleBrowser.downloads_manager.download_dir],
+                                             io_executor.stats,
+                                             [profile.persistentStoragePath(), profile.cachePath()])
+        incognito_check.finished.connect(lambda ok: app.exit(0 if ok else 1))
+        incognito_check.start()
+
+    if load_options:
+        try:
+            urls = read_url_list(load_options.load_driver)
+        except OSError as e:
+            print(f"Can't read URL list: {e}")
+            sys.exit(2)
+        driver = LoadDriver(browser, urls, concurrency=load_options.concurrency,
+                            timeout=load_options.timeout, screenshot_dir=load_options.screenshots,
+                            report_path=load_options.report)
+        driver.finished.connect(lambda report: app.exit(0 if not report['failed'] else 1))
+        # Let the view pool warm up, as it would before a user's first tab
+        QTimer.singleShot(1000, driver.start)
+
+    status = app.exec_()
+    if scratch_dir:
+        remove_scratch_profile(SimpleBrowser.scratch_profile, scratch_dir, SimpleBrowser.windows)
+    sys.exit(status)
\ No newline at end of file
@@ -8,8 +8,12 @@ class ModernRibbon(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.browser = parent
+        self.menu = None
+        self.theme_group = None
+        self.browser.theme_engine.theme_changed.connect(self.update_theme_checks)
+        # Colors come from the application stylesheet (theme_engine.py)
+        self.setAttribute(Qt.WA_StyledBackground, True)
         self.init_ui()
-        self.apply_styles()
 
     def init_ui(self):
         layout = QHBoxLayout(self)
@@ -90,139 +94,57 @@ class ModernRibbon(QWidget):
         btn.setObjectName("actionButton")
         return btn
 
-    def show_menu(self):
+    def get_menu(self):
+        """The main menu, built once and reused for every click"""
+        if self.menu is None:
+            self.menu = self.build_menu()
+        return self.menu
+
+    def build_menu(self):
         menu = QMenu(self.browser)
-        menu.setStyleSheet("""
-            QMenu {
-                background-color: #2d2d2d;
-                color: white;
-                border: 1px solid #404040;
-                border-radius: 8px;
-                padding: 4px;
-            }
-            QMenu::item {
-                padding: 6px 16px;
-                border-radius: 4px;
-                margin: 2px;
-            }
-            QMenu::item:selected {
-                background-color: #ff6f3c;
-            }
-        """)
         
         # File menu
         file_menu = menu.addMenu("📁 File")
         file_menu.addAction("🪟 New Window", self.browser.new_window)
         file_menu.addAction("🔒 New Incognito Window", self.browser.new_incognito_window)
+        file_menu.addAction("⬇️ Downloads", self.browser.show_downloads)
         file_menu.addSeparator()
         file_menu.addAction("❌ Exit", self.browser.close)
         
         # History menu
         history_menu = menu.addMenu("📚 History")
         history_menu.addAction("📖 Show History", self.browser.show_history)
+        history_menu.addAction("↩️ Reopen Closed Tab\tCtrl+Shift+T", self.browser.reopen_closed_tab)
+        history_menu.addAction("📥 Import History...", self.browser.import_history)
         
         # Bookmarks menu
         bookmarks_menu = menu.addMenu("⭐ Bookmarks")
-        bookmarks_menu.addAction("📒 Bookmarks Manager", self.browser.show_bookmarks)
+        bookmarks_menu.addAction("📒 Bookmarks Manager", self.browser.show_bookmarks_manager)
         
         # Profiles menu
         profiles_menu = menu.addMenu("👤 Profiles")
         profiles_menu.addAction("👥 Manage Profiles", self.browser.show_profiles)
+
+        # Theme menu; checks follow the engine so every window's menu agrees
+        theme_menu = menu.addMenu("🎨 Theme")
+        theme_group = self.theme_group = QActionGroup(theme_menu)
+        engine = self.browser.theme_engine
+        for name in engine.available_themes():
+            action = theme_menu.addAction(name.title(), lambda n=name: self.browser.set_theme(n))
+            action.setCheckable(True)
+            action.setChecked(name == engine.current)
+            action.setData(name)
+            theme_group.addAction(action)
         
         # Settings
         menu.addSeparator()
         menu.addAction("⚙️ Settings", self.browser.show_settings)
-        
-        menu.exec_(self.menu_btn.mapToGlobal(QPoint(0, self.menu_btn.height())))
+        return menu
 
-    def apply_styles(self):
-        # Force set the background color directly
-        self.setAutoFillBackground(True)
-        palette = self.palette()
-        palette.setColor(self.backgroundRole(), QColor("#ff0000"))
-        self.setPalette(palette)
-        
-        self.setStyleSheet("""
-            /* Modern Ribbon - RED BACKGROUND */
-            ModernRibbon {
-                background: #ff0000;
-                border-bottom: 2px solid #0000ff;
-            }
-            
-            /* Search Icon - BLUE */
-            #searchIcon {
-                background: #0000ff;
-                border: 2px solid #0000ff;
-                border-right: none;
-                border-radius: 8px 0 0 8px;
-                color: black;
-                font-size: 12px;
-                font-weight: bold;
-            }
-            
-            /* Navigation Buttons - BLUE */
-            #navButton {
-                background: #0000ff;
-                border: 2px solid #0000ff;
-                border-radius: 8px;
-                color: black;
-                font-weight: bold;
-                font-size: 13px;
-            }
-            
-            #navButton:hover {
-                background: #3333ff;
-                border-color: #3333ff;
-            }
-            
-            #navButton:pressed {
-                background: #0000cc;
-                border-color: #0000cc;
-            }
-            
-            #navButton:disabled {
-                background: #6666ff;
-                color: #444444;
-                border-color: #6666ff;
-            }
-            
-            /* Action Buttons - BLUE */
-            #actionButton {
-                background: #0000ff;
-                border: 2px solid #0000ff;
-                border-radius: 8px;
-                color: black;
-                font-weight: bold;
-                font-size: 13px;
-            }
-            
-            #actionButton:hover {
-                background: #3333ff;
-                border-color: #3333ff;
-            }
-            
-            /* Address Bar - BLUE */
-            QLineEdit {
-                background: #0000ff;
-                border: 2px solid #0000ff;
-                border-left: none;
-                border-radius: 0 8px 8px 0;
-                padding: 8px 12px;
-                color: black;
-                font-size: 14px;
-                font-weight: bold;
-                selection-background-color: #ff0000;
-                selection-color: black;
-            }
-            
-            QLineEdit:focus {
-                border-color: #0000ff;
-                border-left: none;
-                background: #3333ff;
-            }
-            
-            QLineEdit::placeholder {
-                color: #333333;
-                font-weight: normal;
-            }
-        """)
\ No newline at end of file
+    def update_theme_checks(self, current):
+        if self.theme_group is not None:
+            for action in self.theme_group.actions():
+                action.setChecked(action.data() == current)
+
+    def show_menu(self):
+        self.get_menu().exec_(self.menu_btn.mapToGlobal(QPoint(0, self.menu_btn.height())))
@@ -0,0 +1,362 @@
+# profile_backup.py (INCREMENTAL, DEDUPLICATED BACKUPS OF PROFILE DATA)
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import time
+import zlib
+from io_executor import IOExecutor
+
+CHUNK_SIZE = 1024 * 1024
+SAMPLE_SIZE = 64 * 1024
+COMPRESSED = b"Z"
+STORED = b"R"
+
+
+class BackupStore:
+    """A backup directory of content-addressed chunks plus one manifest per snapshot.
+
+    Files are cut into fixed-size chunks named by the SHA-256 of their
+    contents and stored zlib-compressed (or as-is when that doesn't
+    help), so a chunk already in the store is never written again. A
+    snapshot manifest lists each file's chunks. Files whose size and
+    mtime match the previous snapshot are not even read.
+
+        backup_dir/chunks/ab/abcdef...   one chunk
+        backup_dir/snapshots/<id>.json   one snapshot
+    """
+
+    def __init__(self, root, chunk_size=CHUNK_SIZE, workers=4, level=1):
+        self.root = root
+        self.chunks_dir = os.path.join(root, "chunks")
+        self.snapshots_dir = os.path.join(root, "snapshots")
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.level = level
+
+    # ----- chunks -----
+
+    def chunk_path(self, digest):
+        return os.path.join(self.chunks_dir, digest[:2], digest)
+
+    def put_chunk(self, digest, data):
+        """Store a chunk unless it is already there; returns bytes written"""
+        path = self.chunk_path(digest)
+        if os.path.exists(path):
+            return 0
+        blob = STORED + data
+        # Cached images and media are already compressed; a sample tells us cheaply
+        sample = data[:SAMPLE_SIZE]
+        if len(zlib.compress(sample, self.level)) < len(sample) * 0.9:
+            packed = zlib.compress(data, self.level)
+            if len(packed) < len(data):
+                blob = COMPRESSED + packed
+        IOExecutor.atomic_write(path, blob)
+        return len(blob)
+
+    def get_chunk(self, digest):
+        """A chunk's contents, checked against its name; raises ValueError if corrupt"""
+        with open(self.chunk_path(digest), 'rb') as f:
+            blob = f.read()
+        try:
+            data = zlib.decompress(blob[1:]) if blob[:1] == COMPRESSED else blob[1:]
+        except zlib.error as e:
+            raise ValueError(f"chunk {digest[:12]} does not decompress: {e}")
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"chunk {digest[:12]} does not match its hash")
+        return data
+
+    # ----- snapshots -----
+
+    def snapshots(self):
+        """Snapshot ids, oldest first"""
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.snapshots_dir) if name.endswith(".json"))
+
+    def load_snapshot(self, snapshot=None):
+        """A snapshot manifest; the latest one if snapshot is None"""
+        if snapshot is None:
+            snapshots = self.snapshots()
+            if not snapshots:
+                return None
+            snapshot = snapshots[-1]
+        with open(os.path.join(self.snapshots_dir, f"{snapshot}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def backup(self, sources, progress=None):
+        """Back up {name: directory or file}; returns the new snapshot's manifest.
+
+        Archive paths are "<name>/<path relative to the source>".
+        progress(done, total) is called after each file.
+        """
+        started = time.perf_counter()
+        previous = self.load_snapshot()
+        previous_files = previous['files'] if previous else {}
+        files = {}
+        stats = {'files': 0, 'unchanged_files': 0, 'bytes': 0, 'read_bytes': 0,
+                 'chunks': 0, 'new_chunks': 0, 'written_bytes': 0}
+        # Chunks handed to a worker this run, so no two workers write the same one
+        submitted = set()
+
+        entries = list(iter_source_files(sources))
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backup") as executor:
+            for done, (archive_path, path) in enumerate(entries, 1):
+                if progress:
+                    progress(done, len(entries))
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                stats['files'] += 1
+                stats['bytes'] += stat.st_size
+                old = previous_files.get(archive_path)
+                if (old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns
+                        and all(os.path.exists(self.chunk_path(d)) for d in old['chunks'])):
+                    files[archive_path] = old
+                    stats['unchanged_files'] += 1
+                    stats['chunks'] += len(old['chunks'])
+                    continue
+                try:
+                    chunks = self.backup_file(path, executor, stats, submitted)
+                except OSError as e:
+                    print(f"Error backing up {path}: {e}")
+                    continue
+                files[archive_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                       'mode': stat.st_mode & 0o777, 'chunks': chunks}
+
+        snapshot_id = time.strftime("%Y%m%d-%H%M%S")
+        while snapshot_id in self.snapshots():
+            snapshot_id += "-1"
+        stats['seconds'] = round(time.perf_counter() - started, 2)
+        manifest = {'id': snapshot_id, 'created': time.time(), 'parent': previous['id'] if previous else None,
+                    'sources': sorted(sources), 'files': files, 'stats': stats}
+        IOExecutor.atomic_write(os.path.join(self.snapshots_dir, f"{snapshot_id}.json"),
+                                json.dumps(manifest).encode('utf-8'))
+        return manifest
+
+    def backup_file(self, path, executor, stats, submitted):
+        """Chunk one file, compressing and writing new chunks on the worker pool"""
+        chunks = []
+        pending = []
+        with open(path, 'rb') as f:
+            while True:
+                data = f.read(self.chunk_size)
+                if not data:
+                    break
+                digest = hashlib.sha256(data).hexdigest()
+                chunks.append(digest)
+                stats['read_bytes'] += len(data)
+                if digest in submitted:
+                    continue
+                submitted.add(digest)
+                pending.append(executor.submit(self.put_chunk, digest, data))
+                if len(pending) >= self.workers * 2:
+                    # Bound the chunks held in memory
+                    self.collect(pending.pop(0), stats)
+        for future in pending:
+            self.collect(future, stats)
+        stats['chunks'] += len(chunks)
+        return chunks
+
+    @staticmethod
+    def collect(future, stats):
+        written = future.result()
+        if written:
+            stats['new_chunks'] += 1
+            stats['written_bytes'] += written
+
+    # ----- restore and verify -----
+
+    def restore(self, targets, snapshot=None, progress=None):
+        """Make the target directories match a snapshot exactly, or leave them untouched.
+
+        targets maps source names to directories, like backup()'s sources;
+        sources not listed are skipped. Every file is first staged under a
+        temporary name next to its target, which checks each chunk
+        (progress(done, total) is called after each one). Only
+        when all of them have staged are they renamed into place, and
+        files the snapshot doesn't have are removed. On any error the
+        staged files are deleted and nothing else is changed.
+        """
+        started = time.perf_counter()
+        manifest = self.load_snapshot(snapshot)
+        if manifest is None:
+            raise FileNotFoundError(f"no snapshots in {self.root}")
+        remove_staged(targets.values())
+        wanted = {}
+        for archive_path, entry in manifest['files'].items():
+            name, _, relative = archive_path.partition("/")
+            if name in targets:
+                wanted[os.path.join(targets[name], *relative.split("/"))] = entry
+        stats = {'files': 0, 'bytes': 0, 'removed': 0}
+
+        staged = []
+        try:
+            for done, (path, entry) in enumerate(wanted.items(), 1):
+                if progress:
+                    progress(done, len(wanted))
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                tmp_path = path + ".restoring"
+                staged.append(tmp_path)
+                with open(tmp_path, 'wb') as f:
+                    for digest in entry['chunks']:
+                        f.write(self.get_chunk(digest))
+                os.chmod(tmp_path, entry.get('mode', 0o644))
+        except BaseException:
+            for tmp_path in staged:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            raise
+
+        for path, entry in wanted.items():
+            os.replace(path + ".restoring", path)
+            # Same mtime as when backed up, so the next backup skips the file
+            os.utime(path, ns=(entry['mtime_ns'], entry['mtime_ns']))
+            stats['files'] += 1
+            stats['bytes'] += entry['size']
+        # Files created since the snapshot would otherwise survive the restore
+        for _, path in iter_source_files({name: d for name, d in targets.items() if os.path.isdir(d)}):
+            if path not in wanted:
+                os.remove(path)
+                stats['removed'] += 1
+        stats['seconds'] = round(time.perf_counter() - started, 2)
+        return stats
+
+    def verify(self, snapshot=None, deep=True, repair=False, progress=None):
+        """Check that every chunk of a snapshot is present (and, if deep, intact).
+
+        With repair, corrupt chunks are deleted; the next backup then
+        re-reads the files that used them and writes the chunks afresh.
+        """
+        started = time.perf_counter()
+        manifest = self.load_snapshot(snapshot)
+        if manifest is None:
+            raise FileNotFoundError(f"no snapshots in {self.root}")
+        digests = {d for entry in manifest['files'].values() for d in entry['chunks']}
+        missing, corrupt = [], []
+
+        def check(digest):
+            if not os.path.exists(self.chunk_path(digest)):
+                return 'missing'
+            if deep:
+                try:
+                    self.get_chunk(digest)
+                except (OSError, ValueError):
+                    return 'corrupt'
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="verify") as executor:
+            for done, (digest, problem) in enumerate(zip(digests, executor.map(check, digests)), 1):
+                if progress and done % 64 == 0:
+                    progress(done, len(digests))
+                if problem == 'missing':
+                    missing.append(digest)
+                elif problem == 'corrupt':
+                    corrupt.append(digest)
+                    if repair:
+                        os.remove(self.chunk_path(digest))
+        damaged = sorted(path for path, entry in manifest['files'].items()
+                         if set(entry['chunks']) & set(missing + corrupt))
+        return {'snapshot': manifest['id'], 'chunks': len(digests), 'missing': missing,
+                'corrupt': corrupt, 'damaged_files': damaged, 'ok': not (missing or corrupt),
+                'seconds': round(time.perf_counter() - started, 2)}
+
+
+def iter_source_files(sources):
+    """(archive path, filesystem path) for every regular file in the sources"""
+    for name in sorted(sources):
+        root = sources[name]
+        if os.path.isfile(root):
+            yield name, root
+            continue
+        for directory, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.endswith((".tmp", ".restoring")):
+                    continue
+                path = os.path.join(directory, filename)
+                relative = os.path.relpath(path, root).replace(os.sep, "/")
+                yield f"{name}/{relative}", path
+
+
+def remove_staged(directories):
+    """Delete .restoring files an interrupted restore left behind"""
+    for root in directories:
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.endswith(".restoring"):
+                    os.remove(os.path.join(directory, filename))
+
+
+def make_test_profile(root, size=1024 ** 3, files=200):
+    """A profile directory of the given size: JSON-ish text plus incompressible cache blobs"""
+    import random
+
+    rng = random.Random(11)
+    os.makedirs(os.path.join(root, "profiles"), exist_ok=True)
+    os.makedirs(os.path.join(root, "cache"), exist_ok=True)
+    per_file = size // files
+    line = json.dumps({'url': "https://www.example.com/page", 'title': "Example page", 'visits': 3}) + "\n"
+    for i in range(files):
+        if i % 2:
+            path = os.path.join(root, "cache", f"blob{i}.bin")
+            data = rng.randbytes(per_file)
+        else:
+            path = os.path.join(root, "profiles", f"data{i}.json")
+            data = (line * (per_file // len(line) + 1)).encode()[:per_file]
+        with open(path, 'wb') as f:
+            f.write(data)
+
+
+def benchmark(size=1024 ** 3):
+    """Full, then incremental backups of a 1 GB profile; restore and verify"""
+    import random
+    import shutil
+    import tempfile
+
+    work = tempfile.mkdtemp(prefix="arc-backup-")
+    try:
+        profile = os.path.join(work, "profile")
+        make_test_profile(profile, size)
+        sources = {'profiles': os.path.join(profile, "profiles"), 'cache': os.path.join(profile, "cache")}
+        store = BackupStore(os.path.join(work, "backup"))
+        mb = 1024 * 1024
+
+        def show(label, manifest):
+            s = manifest['stats']
+            print(f"{label:22} {s['seconds']:6.2f} s  read {s['read_bytes'] / mb:6.0f} MB, "
+                  f"wrote {s['new_chunks']:4} chunks / {s['written_bytes'] / mb:6.0f} MB "
+                  f"({s['unchanged_files']} of {s['files']} files unchanged)")
+
+        show("full backup", store.backup(sources))
+        show("incremental, no change", store.backup(sources))
+
+        # Touch 1% of the data: rewrite one chunk in two files, append to a third
+        rng = random.Random(5)
+        names = sorted(os.listdir(sources['cache']))
+        for name in names[:2]:
+            with open(os.path.join(sources['cache'], name), 'r+b') as f:
+                f.seek(CHUNK_SIZE * 2)
+                f.write(rng.randbytes(CHUNK_SIZE))
+        with open(os.path.join(sources['profiles'], sorted(os.listdir(sources['profiles']))[0]), 'ab') as f:
+            f.write(b'{"url": "https://new.example.com/"}\n' * 1000)
+        show("incremental, 1% edit", store.backup(sources))
+
+        stored = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(store.chunks_dir) for f in fs)
+        print(f"backup directory: {stored / mb:.0f} MB for 3 snapshots of {size / mb:.0f} MB")
+
+        report = store.verify()
+        print(f"verify (deep):          {report['seconds']:6.2f} s  {report['chunks']} chunks, ok={report['ok']}")
+        restored = os.path.join(work, "restored")
+        stats = store.restore({name: os.path.join(restored, name) for name in sources})
+        print(f"restore:                {stats['seconds']:6.2f} s  {stats['files']} files, "
+              f"{stats['bytes'] / mb:.0f} MB")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,9 +1,12 @@
 import os
 import json
 import shutil
+import threading
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
+from io_executor import io_executor
+from profile_backup import BackupStore
 
 class Profile:
     def __init__(self, name, email="", pfp_path=""):
@@ -34,6 +37,8 @@ class Profile:
 class ProfilesManager:
     def __init__(self):
         self.profiles_dir = "profiles"
+        # Caches (favicons, thumbnails, feeds) are backed up with the profiles
+        self.cache_dir = "cache"
         self.current_profile = None
         self.profiles = []
         self.load_profiles()
@@ -61,10 +66,12 @@ class ProfilesManager:
         self.profiles.append(profile)
         self.save_profile(profile)
         
-    def save_profile(self, profile):
+    def profile_path(self, profile):
         filename = f"{profile.name.lower().replace(' ', '_')}.json"
-        with open(os.path.join(self.profiles_dir, filename), 'w') as f:
-            json.dump(profile.to_dict(), f, indent=2)
+        return os.path.join(self.profiles_dir, filename)
+
+    def save_profile(self, profile):
+        io_executor.write_json(self.profile_path(profile), profile.to_dict(), indent=2)
             
     def get_profile(self, name):
         for profile in self.profiles:
@@ -75,10 +82,61 @@ class ProfilesManager:
     def delete_profile(self, profile):
         if profile in self.profiles:
             self.profiles.remove(profile)
-            filename = f"{profile.name.lower().replace(' ', '_')}.json"
-            filepath = os.path.join(self.profiles_dir, filename)
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            io_executor.delete(self.profile_path(profile))
+
+    def backup_sources(self):
+        sources = {'profiles': self.profiles_dir}
+        if os.path.isdir(self.cache_dir):
+            sources['cache'] = self.cache_dir
+        return sources
+
+    # backup, restore_backup and verify_backup do disk I/O for seconds on
+    # large profiles; run them with a BackupTask, off the GUI thread
+
+    def backup(self, destination, progress=None):
+        """Incremental backup to a local directory; returns the snapshot manifest"""
+        # Queued profile writes belong in this snapshot
+        io_executor.flush()
+        return BackupStore(destination).backup(self.backup_sources(), progress)
+
+    def restore_backup(self, destination, snapshot=None, progress=None):
+        """Restore the latest (or a given) snapshot over the current profiles.
+        Call reload() on the GUI thread afterwards."""
+        io_executor.flush()
+        return BackupStore(destination).restore({'profiles': self.profiles_dir, 'cache': self.cache_dir},
+                                                snapshot, progress)
+
+    def reload(self):
+        """Re-read profiles after a restore, keeping the current one selected"""
+        current = self.current_profile.name if self.current_profile else None
+        self.load_profiles()
+        self.current_profile = self.get_profile(current) if current else None
+
+    def verify_backup(self, destination, snapshot=None, repair=False, progress=None):
+        return BackupStore(destination).verify(snapshot, repair=repair, progress=progress)
+
+
+class BackupTask(QObject):
+    """Runs a backup, restore or verify on a worker thread.
+
+    The task is called with a progress callback; progress and the result
+    reach the GUI thread through queued signals. finished is emitted
+    whatever happens, so the dialog waiting on it always closes.
+    """
+    progress = pyqtSignal(int, int)
+    # result, or None and an error message
+    finished = pyqtSignal(object, str)
+
+    def start(self, task, *args):
+        threading.Thread(target=self.run, args=(task, args), name="profile-backup", daemon=True).start()
+
+    def run(self, task, args):
+        try:
+            result, error = task(*args, progress=self.progress.emit), ""
+        except Exception as e:
+            result, error = None, str(e) or type(e).__name__
+        self.finished.emit(result, error)
+
 
 class ProfileDialog(QDialog):
     def __init__(self, profiles_manager, parent=None):
@@ -154,6 +212,19 @@ class ProfileDialog(QDialog):
         add_group.setLayout(add_layout)
         layout.addWidget(add_group)
         
+        # Backups
+        backup_group = QGroupBox("Backup")
+        backup_layout = QHBoxLayout()
+        for label, handler in (("Back Up...", self.backup_profiles),
+                               ("Restore...", self.restore_profiles),
+                               ("Verify...", self.verify_backup)):
+            btn = QPushButton(label)
+            btn.clicked.connect(handler)
+            backup_layout.addWidget(btn)
+        backup_layout.addStretch()
+        backup_group.setLayout(backup_layout)
+        layout.addWidget(backup_group)
+        
         # Close button
         close_btn = QPushButton("Close")
         close_btn.clicked.connect(self.accept)
@@ -209,6 +280,86 @@ class ProfileDialog(QDialog):
                 self.load_profiles()
                 self.update_current_display()
                 
+    def choose_backup_dir(self, title):
+        return QFileDialog.getExistingDirectory(self, title, os.path.expanduser("~"))
+
+    def run_backup_task(self, label, on_done, task, *args):
+        """Run task on a worker thread behind a progress dialog, then call on_done(result)"""
+        progress = QProgressDialog(label, None, 0, 0, self)
+        progress.setWindowTitle("Backup")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.show()
+        backup_task = BackupTask(self)
+
+        def update(done, total):
+            progress.setMaximum(total)
+            progress.setValue(done)
+
+        def finish(result, error):
+            progress.close()
+            backup_task.deleteLater()
+            if error:
+                QMessageBox.warning(self, "Backup", f"Backup operation failed:\n{error}")
+            else:
+                on_done(result)
+
+        backup_task.progress.connect(update)
+        backup_task.finished.connect(finish)
+        backup_task.start(task, *args)
+
+    def backup_profiles(self):
+        destination = self.choose_backup_dir("Back Up Profiles To")
+        if not destination:
+            return
+        self.run_backup_task("Backing up profiles...", self.on_backup_finished,
+                             self.profiles_manager.backup, destination)
+
+    def on_backup_finished(self, manifest):
+        if manifest:
+            stats = manifest['stats']
+            QMessageBox.information(self, "Backup Complete",
+                                    f"Snapshot {manifest['id']}: {stats['files']} files, "
+                                    f"{stats['written_bytes'] / 1048576:.1f} MB written "
+                                    f"({stats['unchanged_files']} unchanged) in {stats['seconds']} s")
+
+    def restore_profiles(self):
+        destination = self.choose_backup_dir("Restore Profiles From")
+        if not destination:
+            return
+        reply = QMessageBox.question(self, "Restore Profiles",
+                                     "Replace the current profiles with the latest backup?",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        self.run_backup_task("Restoring profiles...", self.on_restore_finished,
+                             self.profiles_manager.restore_backup, destination)
+
+    def on_restore_finished(self, stats):
+        self.profiles_manager.reload()
+        self.load_profiles()
+        self.update_current_display()
+        QMessageBox.information(self, "Restore Complete",
+                                f"Restored {stats['files']} files and removed {stats['removed']} "
+                                f"in {stats['seconds']} s")
+
+    def verify_backup(self):
+        destination = self.choose_backup_dir("Verify Backup In")
+        if not destination:
+            return
+        self.run_backup_task("Verifying backup...", self.on_verify_finished,
+                             self.profiles_manager.verify_backup, destination, None, True)
+
+    def on_verify_finished(self, report):
+        if report['ok']:
+            QMessageBox.information(self, "Backup Verified",
+                                    f"Snapshot {report['snapshot']}: all {report['chunks']} chunks intact")
+        else:
+            QMessageBox.warning(self, "Backup Damaged",
+                                f"{len(report['missing'])} missing and {len(report['corrupt'])} corrupt chunks "
+                                f"in {len(report['damaged_files'])} files. Corrupt chunks were removed; "
+                                f"back up again to replace them.")
+
     def choose_pfp(self):
         filename, _ = QFileDialog.getOpenFileName(self, "Select Profile Picture", "", 
                                                 "Images (*.png *.jpg *.jpeg *.bmp)")
@@ -11,6 +11,25 @@ class SettingsManager:
                 'preset_bg': 9,
                 'background_color': '#1a1a2e',
                 'background_gradient': 'linear-gradient(135deg, #1a1a2e 0%, #16213e 100%)'
+            },
+            'performance': {
+                'view_pool_size': 2
+            },
+            'search': {
+                # OpenSearch suggestions endpoint with {} for the query; empty = history only
+                'suggest_url': ''
+            },
+            'history': {
+                # Raw visits older than this are folded into per-page rows
+                'visit_retention_days': 90,
+                # Pages not visited for this long are forgotten entirely
+                'page_retention_days': 365
+            },
+            'privacy': {
+                # Incognito windows keep everything in memory, within these caps
+                'incognito_cache_mb': 32,
+                'incognito_cookie_kb': 256,
+                'incognito_history_visits': 5000
             }
         }
         self.settings = self.load_settings()
@@ -0,0 +1,125 @@
+# single_instance.py (HAND URLS TO AN ALREADY RUNNING BROWSER)
+from PyQt5.QtCore import *
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+import getpass
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def server_name():
+    # One instance per user, so separate accounts never share a browser
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "default"
+    return f"arc-browser-{user}"
+
+
+def forward_to_running_instance(urls, timeout_ms=300):
+    """Send URLs to a running browser. Returns True if one accepted them.
+
+    Runs before QApplication exists, using only blocking socket calls, so a
+    second launch can exit without ever starting Qt GUI or Chromium.
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(server_name())
+    if not socket.waitForConnected(timeout_ms):
+        return False
+    socket.write(json.dumps({'urls': urls}).encode('utf-8') + b"\n")
+    if not socket.waitForBytesWritten(timeout_ms):
+        return False
+    # Wait for the acknowledgement so the launch only exits once handled
+    ok = socket.waitForReadyRead(timeout_ms * 3) and socket.readLine().trimmed() == b"ok"
+    socket.disconnectFromServer()
+    return ok
+
+
+def instance_running(name, timeout_ms=300):
+    """Whether something answers on the socket, without sending it anything"""
+    socket = QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(timeout_ms):
+        return False
+    socket.abort()
+    return True
+
+
+class InstanceServer(QObject):
+    """Listens for later launches and emits the URLs they forward"""
+    urls_received = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.on_new_connection)
+
+    def listen(self):
+        name = server_name()
+        if not self.server.listen(name):
+            if instance_running(name):
+                # Another instance started at the same time and won the race
+                print("Single-instance server unavailable: another instance is listening")
+                return False
+            # A crashed instance can leave a stale socket file behind
+            QLocalServer.removeServer(name)
+            if not self.server.listen(name):
+                print(f"Single-instance server unavailable: {self.server.errorString()}")
+                return False
+        return True
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.readyRead.connect(lambda s=socket: self.on_ready_read(s))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def on_ready_read(self, socket):
+        if not socket.canReadLine():
+            return
+        try:
+            message = json.loads(bytes(socket.readLine()).decode('utf-8'))
+            urls = message.get('urls', []) if isinstance(message, dict) else None
+            if not isinstance(urls, list):
+                raise ValueError("expected {\"urls\": [...]}")
+            urls = [u for u in urls if isinstance(u, str)]
+        except ValueError:
+            socket.write(b"error\n")
+            return
+        socket.write(b"ok\n")
+        socket.flush()
+        self.urls_received.emit(urls)
+
+
+def benchmark_startup(url="https://example.com", timeout=60):
+    """Compare a cold start with a launch forwarded to a running instance"""
+    main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    if forward_to_running_instance([]):
+        print("Close the running browser before benchmarking")
+        return
+
+    start = time.perf_counter()
+    cold = subprocess.Popen([sys.executable, main_script])
+    # Cold start is done once the new instance answers on its socket
+    while not forward_to_running_instance([], timeout_ms=100):
+        if time.perf_counter() - start > timeout or cold.poll() is not None:
+            print("Browser did not start")
+            cold.kill()
+            return
+        time.sleep(0.02)
+    cold_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, main_script, url], timeout=timeout)
+    forward_time = time.perf_counter() - start
+
+    cold.terminate()
+    cold.wait()
+    print(f"Cold start:        {cold_time * 1000:.0f} ms")
+    print(f"Forwarded launch:  {forward_time * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    benchmark_startup()
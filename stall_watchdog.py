@@ -0,0 +1,139 @@
+# stall_watchdog.py (GUI THREAD STALL DETECTION)
+from PyQt5.QtCore import *
+from collections import deque
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+
+class StallWatchdog:
+    """Opt-in watchdog that reports Qt event-loop stalls.
+
+    A QTimer on the GUI thread bumps a heartbeat; a daemon thread checks
+    it and, while the heartbeat is late by more than the threshold, samples
+    the GUI thread's Python stack. Samples are aggregated per stack so the
+    report shows where the main thread spends its stalled time. Only the
+    latest stalls are kept individually; counts and totals cover them all.
+    """
+
+    def __init__(self, threshold_ms=50, sample_interval_ms=10,
+                 report_file="stall_report.json", recent_stalls=100):
+        self.threshold = threshold_ms / 1000.0
+        self.sample_interval = sample_interval_ms / 1000.0
+        self.report_file = report_file
+        self.main_thread_id = threading.main_thread().ident
+
+        self.last_beat = time.perf_counter()
+        self.stalls = deque(maxlen=recent_stalls)
+        self.stall_count = 0
+        self.total_stall_ms = 0.0
+        self.max_stall_ms = 0.0
+        self.stack_counts = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # Heartbeat runs at half the threshold so a late beat means a stall
+        self.heartbeat = QTimer()
+        self.heartbeat.setInterval(max(1, int(threshold_ms / 2)))
+        self.heartbeat.timeout.connect(self.beat)
+
+    @classmethod
+    def from_environment(cls):
+        """Create a watchdog if ARC_STALL_WATCHDOG_MS is set, else None"""
+        value = os.environ.get("ARC_STALL_WATCHDOG_MS")
+        if not value:
+            return None
+        try:
+            threshold_ms = int(value)
+        except ValueError:
+            print(f"Ignoring invalid ARC_STALL_WATCHDOG_MS: {value}")
+            return None
+        report_file = os.environ.get("ARC_STALL_REPORT", "stall_report.json")
+        return cls(threshold_ms=threshold_ms, report_file=report_file)
+
+    def beat(self):
+        self.last_beat = time.perf_counter()
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.last_beat = time.perf_counter()
+        self.heartbeat.start()
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="StallWatchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop monitoring and write the final report"""
+        if self.thread is None:
+            return
+        self.heartbeat.stop()
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        self.write_report()
+
+    def run(self):
+        stall_start = None
+        samples = {}
+        while not self.stop_event.is_set():
+            # Poll slowly while healthy, sample quickly during a stall
+            self.stop_event.wait(self.sample_interval if stall_start else self.threshold / 2)
+            now = time.perf_counter()
+            late = now - self.last_beat
+
+            if late > self.threshold:
+                if stall_start is None:
+                    stall_start = self.last_beat
+                    samples = {}
+                stack = self.sample_main_stack()
+                if stack:
+                    samples[stack] = samples.get(stack, 0) + 1
+            elif stall_start is not None:
+                self.record_stall(stall_start, self.last_beat, samples)
+                stall_start = None
+
+    def sample_main_stack(self):
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return None
+        summary = traceback.extract_stack(frame)
+        return tuple(f"{os.path.basename(f.filename)}:{f.lineno} {f.name}" for f in summary)
+
+    def record_stall(self, start, end, samples):
+        duration_ms = (end - start) * 1000.0
+        top_stack = max(samples, key=samples.get) if samples else ()
+        with self.lock:
+            self.stalls.append({
+                'duration_ms': round(duration_ms, 1),
+                'samples': sum(samples.values()),
+                'top_stack': list(top_stack),
+            })
+            self.stall_count += 1
+            self.total_stall_ms += duration_ms
+            self.max_stall_ms = max(self.max_stall_ms, round(duration_ms, 1))
+            for stack, count in samples.items():
+                self.stack_counts[stack] = self.stack_counts.get(stack, 0) + count
+
+    def get_report(self):
+        with self.lock:
+            hot_stacks = sorted(self.stack_counts.items(), key=lambda item: item[1], reverse=True)
+            return {
+                'threshold_ms': self.threshold * 1000.0,
+                'stall_count': self.stall_count,
+                'total_stall_ms': round(self.total_stall_ms, 1),
+                'max_stall_ms': self.max_stall_ms,
+                'hot_stacks': [{'samples': count, 'stack': list(stack)} for stack, count in hot_stacks[:20]],
+                'stalls': list(self.stalls),
+            }
+
+    def write_report(self):
+        try:
+            with open(self.report_file, 'w', encoding='utf-8') as f:
+                json.dump(self.get_report(), f, indent=2)
+        except OSError as e:
+            print(f"Error writing stall report: {e}")
@@ -0,0 +1,355 @@
+# suggestions.py (SEARCH SUGGESTIONS FOR THE ADDRESS BAR AND LANDING SEARCH)
+from PyQt5.QtCore import *
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+import urllib.parse
+import requests
+
+# Hosts whose "q" parameter is a search the user typed
+SEARCH_HOSTS = ("google.", "bing.com", "duckduckgo.com", "search.yahoo.com")
+
+
+class SuggestionProvider(ABC):
+    """Source of query suggestions.
+
+    suggest() may block; providers with remote = True are called on a
+    worker thread, local ones directly on the GUI thread.
+    """
+    name = "base"
+    remote = False
+
+    @abstractmethod
+    def suggest(self, prefix, limit):
+        """Up to limit suggestions completing prefix"""
+
+
+class HistorySuggestionProvider(SuggestionProvider):
+    """Past searches found in history, most frequent first.
+
+    The index follows the history manager's listener calls, one visit at a
+    time. Only the scan of the history that already exists is a full pass:
+    it runs on a worker thread, and changes made meanwhile are replayed
+    onto its result before that is swapped in.
+    """
+    name = "history"
+
+    def __init__(self, history_manager):
+        self.history_manager = history_manager
+        # query -> [count, last_visit]
+        self.queries = {}
+        self.lock = threading.Lock()
+        # (sign, entries) changes made during the initial scan; None once it is in
+        self.pending = []
+        history_manager.add_listener(self)
+        threading.Thread(target=self.build, args=(list(history_manager.get_history()),),
+                         name="suggest-index", daemon=True).start()
+
+    def build(self, entries):
+        queries = {}
+        count_queries(queries, entries, 1)
+        with self.lock:
+            for sign, changed in self.pending:
+                if changed is None:
+                    queries.clear()
+                else:
+                    count_queries(queries, changed, sign)
+            self.pending = None
+            self.queries = queries
+
+    def apply(self, sign, entries):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((sign, entries))
+                return
+        count_queries(self.queries, entries, sign)
+
+    def visits_added(self, entries):
+        self.apply(1, entries)
+
+    def visits_removed(self, entries):
+        self.apply(-1, entries)
+
+    def history_cleared(self):
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((0, None))
+                return
+        self.queries.clear()
+
+    def suggest(self, prefix, limit):
+        prefix = prefix.lower()
+        matches = [(stats[0], stats[1], query) for query, stats in self.queries.items()
+                   if query.startswith(prefix) and query != prefix]
+        matches.sort(reverse=True)
+        return [query for _, _, query in matches[:limit]]
+
+
+class HttpSuggestionProvider(SuggestionProvider):
+    """OpenSearch suggestions endpoint returning ["prefix", ["s1", "s2", ...]]"""
+    name = "http"
+    remote = True
+
+    def __init__(self, url_template, timeout=2.0):
+        self.url_template = url_template
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def suggest(self, prefix, limit):
+        url = self.url_template.format(urllib.parse.quote_plus(prefix))
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        payload = response.json()
+        return [s for s in payload[1] if isinstance(s, str)][:limit]
+
+
+def count_queries(queries, entries, sign):
+    """Add (sign 1) or take away (sign -1) the searches among entries.
+    last_visit only moves forward; it just breaks ties between equal counts."""
+    for entry in entries:
+        query = search_query_from_url(entry['url'])
+        if not query:
+            continue
+        stats = queries.get(query)
+        if sign > 0:
+            if stats is None:
+                queries[query] = [1, entry['visit_time']]
+            else:
+                stats[0] += 1
+                stats[1] = max(stats[1], entry['visit_time'])
+        elif stats is not None:
+            stats[0] -= 1
+            if stats[0] <= 0:
+                del queries[query]
+
+
+def search_query_from_url(url):
+    # Most visits aren't searches; skip parsing them
+    if "q=" not in url:
+        return None
+    parts = urllib.parse.urlsplit(url)
+    if not parts.query or not any(h in parts.netloc for h in SEARCH_HOSTS):
+        return None
+    query = urllib.parse.parse_qs(parts.query).get('q')
+    return query[0].strip().lower() if query and query[0].strip() else None
+
+
+class SuggestionService(QObject):
+    """Shared providers, worker thread and prefix cache for every Suggester.
+
+    Remote results are cached per prefix in a small LRU so retyping or
+    backspacing never goes back to the network.
+    """
+
+    def __init__(self, providers, cache_size=256, cache_ttl=600, limit=8, parent=None):
+        super().__init__(parent)
+        self.providers = providers
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.limit = limit
+        self.cache = OrderedDict()
+        self.stats = {'requests': 0, 'cache_hits': 0, 'remote_calls': 0, 'cancelled': 0}
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="suggestions")
+
+    @classmethod
+    def from_environment(cls, history_manager, settings_manager=None):
+        """History suggestions, plus a remote endpoint when one is configured"""
+        providers = [HistorySuggestionProvider(history_manager)]
+        url = os.environ.get("ARC_SUGGEST_URL")
+        if url is None and settings_manager:
+            url = settings_manager.get('search', 'suggest_url', '')
+        if url:
+            providers.append(HttpSuggestionProvider(url))
+        return cls(providers)
+
+    def has_remote(self):
+        return any(p.remote for p in self.providers)
+
+    def local_suggestions(self, prefix):
+        results = []
+        for provider in self.providers:
+            if not provider.remote:
+                results.extend(provider.suggest(prefix, self.limit))
+        return results
+
+    def cached_remote(self, prefix):
+        entry = self.cache.get(prefix)
+        if entry is None:
+            return None
+        if time.time() - entry[0] > self.cache_ttl:
+            del self.cache[prefix]
+            return None
+        self.cache.move_to_end(prefix)
+        self.stats['cache_hits'] += 1
+        return entry[1]
+
+    def store_remote(self, prefix, results):
+        self.cache[prefix] = (time.time(), results)
+        self.cache.move_to_end(prefix)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def fetch_remote(self, prefix):
+        """Runs on a worker thread"""
+        self.stats['remote_calls'] += 1
+        results = []
+        for provider in self.providers:
+            if provider.remote:
+                try:
+                    results.extend(provider.suggest(prefix, self.limit))
+                except (requests.RequestException, ValueError, IndexError, TypeError) as e:
+                    print(f"Error fetching {provider.name} suggestions: {e}")
+        return results
+
+    def merge(self, local, remote):
+        seen = set()
+        merged = []
+        for suggestion in local + remote:
+            key = suggestion.lower()
+            if key not in seen:
+                seen.add(key)
+                merged.append(suggestion)
+        return merged[:self.limit]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Suggester(QObject):
+    """Debounced suggestions for one input box.
+
+    Each keystroke restarts the debounce timer; only the text that is
+    still current when it fires is looked up. A newer lookup cancels the
+    queued one and any answer to an older prefix is dropped.
+    """
+    suggestions_ready = pyqtSignal(str, list)
+    # Internal: carries remote results from the worker to the GUI thread
+    remote_finished = pyqtSignal(int, str, list)
+
+    def __init__(self, service, debounce_ms=150, parent=None):
+        super().__init__(parent)
+        self.service = service
+        self.pending_text = ""
+        self.generation = 0
+        self.future = None
+        self.remote_finished.connect(self.on_remote_finished)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self.lookup)
+
+    def request(self, text):
+        self.pending_text = text
+        self.timer.start()
+
+    def cancel(self):
+        """Forget the current input, e.g. once it has been submitted"""
+        self.timer.stop()
+        self.generation += 1
+        if self.future is not None and self.future.cancel():
+            self.service.stats['cancelled'] += 1
+        self.future = None
+
+    def lookup(self):
+        self.cancel()
+        prefix = self.pending_text.strip()
+        if not prefix or "://" in prefix:
+            self.suggestions_ready.emit(self.pending_text, [])
+            return
+        service = self.service
+        service.stats['requests'] += 1
+        key = prefix.lower()
+        local = service.local_suggestions(key)
+        remote = service.cached_remote(key) if service.has_remote() else []
+        if remote is not None:
+            self.suggestions_ready.emit(prefix, service.merge(local, remote))
+            return
+
+        # Show local matches now, then again with remote ones mixed in
+        self.suggestions_ready.emit(prefix, local[:service.limit])
+        generation = self.generation
+        self.future = service.executor.submit(service.fetch_remote, key)
+        self.future.add_done_callback(
+            lambda future, g=generation, p=prefix: self.on_future_done(future, g, p))
+
+    def on_future_done(self, future, generation, prefix):
+        if future.cancelled():
+            return
+        self.remote_finished.emit(generation, prefix, future.result())
+
+    def on_remote_finished(self, generation, prefix, remote):
+        self.service.store_remote(prefix.lower(), remote)
+        if generation != self.generation:
+            # The user has typed on since this request went out
+            self.service.stats['cancelled'] += 1
+            return
+        self.future = None
+        local = self.service.local_suggestions(prefix.lower())
+        self.suggestions_ready.emit(prefix, self.service.merge(local, remote))
+
+
+def benchmark(keystrokes="how to make sourdough bread", interval_ms=40):
+    """Type against a local stand-in suggestion server and count requests"""
+    import json
+    import sys
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query).get('q', [''])[0]
+            hits.append(query)
+            time.sleep(0.05)
+            body = json.dumps([query, [f"{query} {n}" for n in range(5)]]).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/complete?q={{}}"
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    class NoHistory:
+        def get_history(self):
+            return [{'url': "https://www.google.com/search?q=how+to+make+pasta", 'visit_time': 0}]
+
+    service = SuggestionService([HistorySuggestionProvider(NoHistory()), HttpSuggestionProvider(url)])
+    suggester = Suggester(service)
+    shown = []
+    suggester.suggestions_ready.connect(lambda prefix, results: shown.append((prefix, results)))
+
+    def run_typing(text):
+        for i in range(1, len(text) + 1):
+            QTimer.singleShot(i * interval_ms, lambda t=text[:i]: suggester.request(t))
+        loop = QEventLoop()
+        QTimer.singleShot(len(text) * interval_ms + 600, loop.quit)
+        loop.exec_()
+
+    start = time.perf_counter()
+    run_typing(keystrokes)
+    elapsed = time.perf_counter() - start
+    print(f"Typed {len(keystrokes)} keys every {interval_ms} ms in {elapsed:.2f} s: "
+          f"{len(hits)} request(s) to the server")
+    print(f"  last shown: {shown[-1] if shown else None}")
+
+    hits.clear()
+    run_typing(keystrokes)
+    print(f"Retyped the same text: {len(hits)} request(s), stats {service.stats}")
+    server.shutdown()
+    service.shutdown()
+
+
+if __name__ == "__main__":
+    benchmark()
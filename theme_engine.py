@@ -0,0 +1,194 @@
+# theme_engine.py (ONE COMPILED APPLICATION STYLESHEET PER THEME)
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import *
+import json
+import os
+import sys
+import time
+
+THEMES_DIR = "themes"
+
+THEMES = {
+    'dark': {
+        'window': '#1a1a1a', 'surface': '#252525', 'surface_alt': '#2d2d2d',
+        'border': '#404040', 'text': '#ffffff', 'text_muted': '#aaaaaa',
+        'accent': '#ff6f3c', 'accent_hover': '#ff8a5c', 'accent_pressed': '#e55a2a',
+        'input': '#2d2d2d', 'chip': 'rgba(255,255,255,0.08)', 'chip_hover': 'rgba(255,111,60,0.3)',
+    },
+    'light': {
+        'window': '#f5f5f7', 'surface': '#ffffff', 'surface_alt': '#ececf0',
+        'border': '#d0d0d6', 'text': '#1a1a1a', 'text_muted': '#666666',
+        'accent': '#ff6f3c', 'accent_hover': '#ff8a5c', 'accent_pressed': '#e55a2a',
+        'input': '#ffffff', 'chip': 'rgba(0,0,0,0.06)', 'chip_hover': 'rgba(255,111,60,0.25)',
+    },
+}
+
+TEMPLATE = """
+QMainWindow {{ background-color: {window}; color: {text}; }}
+QTabWidget::pane {{ border: 1px solid {border}; background-color: {surface}; }}
+QTabBar::tab {{
+    background-color: {surface}; color: {text}; padding: 8px 16px;
+    border: 1px solid {border}; border-bottom: none;
+}}
+QTabBar::tab:selected {{ background-color: {window}; border-bottom: 2px solid {accent}; }}
+
+ModernRibbon {{ background: {surface}; border-bottom: 1px solid {border}; }}
+ModernRibbon #searchIcon {{
+    background: {input}; border: 2px solid {border}; border-right: none;
+    border-radius: 8px 0 0 8px; color: {text_muted}; font-size: 12px;
+}}
+ModernRibbon #navButton, ModernRibbon #actionButton {{
+    background: {surface_alt}; border: 1px solid {border}; border-radius: 8px;
+    color: {text}; font-weight: bold; font-size: 13px;
+}}
+ModernRibbon #navButton:hover, ModernRibbon #actionButton:hover {{ background: {chip_hover}; border-color: {accent}; }}
+ModernRibbon #navButton:pressed, ModernRibbon #actionButton:pressed {{ background: {accent_pressed}; }}
+ModernRibbon #navButton:disabled {{ color: {text_muted}; }}
+ModernRibbon QLineEdit {{
+    background: {input}; border: 2px solid {border}; border-left: none;
+    border-radius: 0 8px 8px 0; padding: 8px 12px; color: {text}; font-size: 14px;
+    selection-background-color: {accent}; selection-color: #ffffff;
+}}
+ModernRibbon QLineEdit:focus {{ border-color: {accent}; border-left: none; }}
+
+#bookmarksBar {{ background: {window}; }}
+#bookmarksBar QPushButton {{
+    background: {chip}; color: {text}; border: none; border-radius: 8px; padding: 4px 10px;
+}}
+#bookmarksBar QPushButton:hover {{ background: {chip_hover}; }}
+
+QMenu {{
+    background-color: {surface_alt}; color: {text}; border: 1px solid {border};
+    border-radius: 8px; padding: 4px;
+}}
+QMenu::item {{ padding: 6px 16px; border-radius: 4px; margin: 2px; }}
+QMenu::item:selected {{ background-color: {accent}; color: #ffffff; }}
+QMenu::separator {{ height: 1px; background: {border}; margin: 4px 8px; }}
+"""
+
+
+class ThemeEngine(QObject):
+    """Compiles a theme into a single application stylesheet and caches it.
+
+    Widgets carry object names only; every color comes from here, so a
+    theme switch is one QApplication.setStyleSheet() and one repolish.
+    Custom themes are JSON files in themes/: {"base": "dark", "colors": {...}}.
+    """
+    theme_changed = pyqtSignal(str)
+
+    def __init__(self, themes_dir=THEMES_DIR, parent=None):
+        super().__init__(parent)
+        self.themes_dir = themes_dir
+        self.themes = dict(THEMES)
+        self.themes.update(self.load_custom_themes())
+        self.compiled = {}
+        self.current = None
+
+    def load_custom_themes(self):
+        themes = {}
+        if not os.path.isdir(self.themes_dir):
+            return themes
+        for filename in sorted(os.listdir(self.themes_dir)):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.themes_dir, filename), 'r', encoding='utf-8') as f:
+                    definition = json.load(f)
+                colors = dict(THEMES.get(definition.get('base', 'dark'), THEMES['dark']))
+                colors.update(definition.get('colors', {}))
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"Error loading theme {filename}: {e}")
+                continue
+            themes[definition.get('name') or filename[:-5]] = colors
+        return themes
+
+    def available_themes(self):
+        return list(self.themes)
+
+    def resolve(self, name):
+        """Theme name for a setting value; 'auto' follows the system palette"""
+        if name == 'auto':
+            app = QApplication.instance()
+            dark = app is not None and app.palette().window().color().lightness() < 128
+            return 'dark' if dark else 'light'
+        return name if name in self.themes else 'dark'
+
+    def stylesheet(self, name):
+        name = self.resolve(name)
+        sheet = self.compiled.get(name)
+        if sheet is None:
+            sheet = self.compiled[name] = TEMPLATE.format(**self.themes[name])
+        return sheet
+
+    def apply(self, name, app=None):
+        """Switch the whole application to a theme; no-op if it is already active"""
+        name = self.resolve(name)
+        if name == self.current:
+            return False
+        app = app or QApplication.instance()
+        app.setStyleSheet(self.stylesheet(name))
+        self.current = name
+        self.theme_changed.emit(name)
+        return True
+
+
+def benchmark(switches=20, menu_opens=50):
+    """Theme switch and menu-open time on a real ribbon and bookmarks bar"""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTabWidget
+    from modern_ribbon import ModernRibbon
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    engine = ThemeEngine()
+
+    class Window(QMainWindow):
+        """Stands in for SimpleBrowser: every ribbon action is a no-op"""
+        theme_engine = engine
+
+        def __getattr__(self, name):
+            return lambda *args: None
+
+    window = Window()
+    central = QWidget()
+    layout = QVBoxLayout(central)
+    ribbon = ModernRibbon(window)
+    layout.addWidget(ribbon)
+    bar = QWidget()
+    bar.setObjectName("bookmarksBar")
+    bar_layout = QHBoxLayout(bar)
+    for i in range(10):
+        bar_layout.addWidget(QPushButton(f"Bookmark {i}"))
+    layout.addWidget(bar)
+    tabs = QTabWidget()
+    for i in range(20):
+        tabs.addTab(QWidget(), f"Tab {i}")
+    layout.addWidget(tabs)
+    window.setCentralWidget(central)
+    window.show()
+    app.processEvents()
+
+    names = ['dark', 'light']
+    start = time.perf_counter()
+    for i in range(switches):
+        engine.apply(names[i % 2])
+        app.processEvents()
+    switch_ms = (time.perf_counter() - start) * 1000 / switches
+    print(f"Theme switch (app stylesheet, cached): {switch_ms:.2f} ms")
+
+    def time_menu(get_menu):
+        start = time.perf_counter()
+        for _ in range(menu_opens):
+            menu = get_menu()
+            menu.popup(QPoint(0, 0))
+            app.processEvents()
+            menu.hide()
+        return (time.perf_counter() - start) * 1000 / menu_opens
+
+    cached_ms = time_menu(ribbon.get_menu)
+    rebuilt_ms = time_menu(ribbon.build_menu)
+    print(f"Menu open, cached:  {cached_ms:.2f} ms")
+    print(f"Menu open, rebuilt: {rebuilt_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,163 @@
+# thumbnail_cache.py (TOP-SITES PAGE THUMBNAILS)
+from PyQt5.QtCore import *
+from PyQt5.QtGui import *
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import hashlib
+import os
+import threading
+from url_canonicalizer import canonical_url
+from io_executor import io_executor
+
+
+class ThumbnailCache(QObject):
+    """Size-capped cache of page thumbnails for the landing page top sites.
+
+    Only the grab itself happens on the GUI thread; the QImage is scaled and
+    JPEG-encoded on a worker thread and written to cache/thumbnails through
+    io_executor. The oldest files are evicted once the directory exceeds
+    max_bytes. The index of files on disk is built, and thumbnails are
+    read back, on io_executor's reader: a lookup that misses memory starts
+    a read and returns nothing, and thumbnail_ready follows.
+    """
+    thumbnail_ready = pyqtSignal(str)
+
+    def __init__(self, cache_dir="cache/thumbnails", max_bytes=20 * 1024 * 1024,
+                 width=320, height=200, quality=70):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.width = width
+        self.height = height
+        self.quality = quality
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+        self.data_uris = OrderedDict()
+        self.files = OrderedDict()  # filename -> size, oldest first
+        self.total_bytes = 0
+        # filename -> url of lookups waiting on a read (or on the index)
+        self.reading = {}
+        self.indexed = False
+        io_executor.submit_read(self.load_index)
+
+    def load_index(self):
+        """Runs on the reader"""
+        entries = []
+        try:
+            filenames = os.listdir(self.cache_dir)
+        except OSError:
+            filenames = []
+        for filename in filenames:
+            if filename.endswith(".jpg"):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, filename))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, filename, stat.st_size))
+        with self.lock:
+            # Thumbnails stored while the scan ran are newer than anything on disk
+            stored = self.files
+            self.files = OrderedDict((filename, size) for _, filename, size in sorted(entries)
+                                     if filename not in stored)
+            self.files.update(stored)
+            self.total_bytes = sum(self.files.values())
+            self.indexed = True
+            evicted = self.evict_locked()
+            self.reading = {f: url for f, url in self.reading.items() if f in self.files}
+            waiting = list(self.reading.items())
+        for name in evicted:
+            io_executor.delete(os.path.join(self.cache_dir, name))
+        for filename, url in waiting:
+            self.read_thumbnail(filename, url)
+
+    @staticmethod
+    def key_for(url):
+        return hashlib.sha1(canonical_url(url).encode('utf-8')).hexdigest() + ".jpg"
+
+    def capture(self, view):
+        """Grab a loaded, visible view and encode it in the background"""
+        if not view.isVisible() or view.width() <= 0 or view.height() <= 0:
+            return
+        url = view.url().toString()
+        if not url.startswith(("http://", "https://")):
+            return
+        # QPixmap is GUI-thread only; the QImage copy is safe to hand off
+        image = view.grab().toImage()
+        self.executor.submit(self.encode_and_store, url, image)
+
+    def encode_and_store(self, url, image):
+        scaled = image.scaled(self.width, self.height, Qt.KeepAspectRatioByExpanding,
+                              Qt.SmoothTransformation)
+        scaled = scaled.copy(0, 0, min(self.width, scaled.width()), min(self.height, scaled.height()))
+        buffer = QBuffer()
+        buffer.open(QIODevice.WriteOnly)
+        if not scaled.save(buffer, "JPG", self.quality):
+            return
+        data = bytes(buffer.data())
+        filename = self.key_for(url)
+        io_executor.write_bytes(os.path.join(self.cache_dir, filename), data)
+
+        with self.lock:
+            self.total_bytes -= self.files.pop(filename, 0)
+            self.files[filename] = len(data)
+            self.total_bytes += len(data)
+            self.remember_locked(filename, data)
+            evicted = self.evict_locked()
+        for name in evicted:
+            io_executor.delete(os.path.join(self.cache_dir, name))
+        self.thumbnail_ready.emit(url)
+
+    def remember_locked(self, filename, data):
+        self.data_uris[filename] = "data:image/jpeg;base64," + base64.b64encode(data).decode('ascii')
+        self.data_uris.move_to_end(filename)
+        if len(self.data_uris) > 32:
+            self.data_uris.popitem(last=False)
+
+    def evict_locked(self):
+        evicted = []
+        while self.total_bytes > self.max_bytes and len(self.files) > 1:
+            name, size = self.files.popitem(last=False)
+            self.total_bytes -= size
+            self.data_uris.pop(name, None)
+            evicted.append(name)
+        return evicted
+
+    def data_uri_for_url(self, url):
+        """Thumbnail as a data: URI if it is in memory, else empty string.
+        Never waits on the disk."""
+        filename = self.key_for(url)
+        with self.lock:
+            uri = self.data_uris.get(filename)
+            if uri is not None:
+                self.data_uris.move_to_end(filename)
+                return uri
+            if filename in self.reading or (self.indexed and filename not in self.files):
+                return ""
+            self.reading[filename] = url
+            indexed = self.indexed
+        # Before the index is in, load_index starts the read
+        if indexed:
+            io_executor.submit_read(self.read_thumbnail, filename, url)
+        return ""
+
+    def read_thumbnail(self, filename, url):
+        """Runs on the reader"""
+        try:
+            with open(os.path.join(self.cache_dir, filename), 'rb') as f:
+                data = f.read()
+        except OSError:
+            data = None
+        with self.lock:
+            self.reading.pop(filename, None)
+            if data is None:
+                self.total_bytes -= self.files.pop(filename, 0)
+                return
+            # A capture may have stored a newer one while the read was in flight
+            if filename in self.data_uris:
+                return
+            self.remember_locked(filename, data)
+        self.thumbnail_ready.emit(url)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,142 @@
+# tracing.py (NAVIGATION TRACING)
+import collections
+import itertools
+import json
+import os
+import threading
+import time
+
+# Tracing is off unless ARC_TRACE is set; when off every call is a no-op
+TRACING_ENABLED = bool(os.environ.get("ARC_TRACE"))
+TRACE_BUFFER_SIZE = int(os.environ.get("ARC_TRACE_BUFFER", "10000"))
+
+
+class _NullSpan:
+    """Shared do-nothing span used when tracing is disabled"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.tracer.record('X', self.name, self.start, end - self.start, None, self.args)
+        return False
+
+
+class Tracer:
+    """Span recorder backed by a fixed-size ring buffer.
+
+    Events are appended to a bounded deque, which is safe to use from any
+    thread without taking a lock; the oldest events fall off the end.
+    """
+
+    def __init__(self, capacity=TRACE_BUFFER_SIZE):
+        self.events = collections.deque(maxlen=capacity)
+        self.origin = time.perf_counter()
+        self.ids = itertools.count(1)
+        self.pid = os.getpid()
+
+    def new_id(self):
+        return next(self.ids)
+
+    def record(self, phase, name, start, duration, async_id, args):
+        self.events.append((phase, name, start, duration, async_id,
+                            threading.get_ident(), args))
+
+    def span(self, name, **args):
+        """Context manager timing a synchronous block"""
+        return _Span(self, name, args)
+
+    def instant(self, name, **args):
+        self.record('i', name, time.perf_counter(), 0, None, args)
+
+    def begin(self, name, async_id, **args):
+        """Start an async span that ends in a later callback"""
+        self.record('b', name, time.perf_counter(), 0, async_id, args)
+
+    def step(self, name, async_id, **args):
+        """Mark a point inside an async span"""
+        self.record('n', name, time.perf_counter(), 0, async_id, args)
+
+    def end(self, name, async_id, **args):
+        self.record('e', name, time.perf_counter(), 0, async_id, args)
+
+    def to_chrome_trace(self):
+        """Convert the buffer to Chrome trace-event format (chrome://tracing)"""
+        trace_events = []
+        for phase, name, start, duration, async_id, tid, args in list(self.events):
+            event = {
+                'name': name,
+                'cat': 'navigation',
+                'ph': phase,
+                'ts': (start - self.origin) * 1e6,
+                'pid': self.pid,
+                'tid': tid,
+                'args': args,
+            }
+            if phase == 'X':
+                event['dur'] = duration * 1e6
+            elif phase == 'i':
+                event['s'] = 't'
+            else:
+                event['id'] = async_id
+            trace_events.append(event)
+        return {'traceEvents': trace_events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+
+class NullTracer:
+    """Stand-in used when tracing is disabled; every method is a no-op"""
+    events = ()
+
+    def new_id(self):
+        return 0
+
+    def span(self, name, **args):
+        return _NULL_SPAN
+
+    def instant(self, name, **args):
+        pass
+
+    def begin(self, name, async_id, **args):
+        pass
+
+    def step(self, name, async_id, **args):
+        pass
+
+    def end(self, name, async_id, **args):
+        pass
+
+    def to_chrome_trace(self):
+        return {'traceEvents': [], 'displayTimeUnit': 'ms'}
+
+    def export(self, path):
+        pass
+
+
+tracer = Tracer() if TRACING_ENABLED else NullTracer()
+
+
+def export_trace():
+    """Write the trace to ARC_TRACE_FILE (default arc_trace.json) if enabled"""
+    if TRACING_ENABLED:
+        tracer.export(os.environ.get("ARC_TRACE_FILE", "arc_trace.json"))
@@ -0,0 +1,131 @@
+# url_canonicalizer.py (ONE KEY PER PAGE FOR HISTORY, BOOKMARKS AND CACHES)
+import functools
+import time
+import urllib.parse
+
+DEFAULT_PORTS = {'http': '80', 'https': '443', 'ftp': '21'}
+# Query parameters that only identify the campaign or click, never the page
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid',
+    'mc_cid', 'mc_eid', 'igshid', '_ga', '_gl', 'ref_src',
+})
+TRACKING_PREFIXES = ('utm_',)
+
+
+class UrlCanonicalizer:
+    """Maps equivalent spellings of a URL to one key.
+
+    Lowercases scheme and host, drops user:password@, default ports,
+    fragments and tracking parameters, and treats "/docs/" and "/docs" as
+    the same page. Keys end up in history rows and cache file names, so
+    credentials must never reach them.
+    The key is only for lookups; stores keep the URL they were given for
+    display and navigation. Results are memoized in an LRU cache.
+    """
+
+    def __init__(self, tracking_params=TRACKING_PARAMS, tracking_prefixes=TRACKING_PREFIXES,
+                 cache_size=65536):
+        self.tracking_params = frozenset(p.lower() for p in tracking_params)
+        self.tracking_prefixes = tuple(p.lower() for p in tracking_prefixes)
+        self.canonicalize = functools.lru_cache(maxsize=cache_size)(self.compute)
+
+    def is_tracking(self, name):
+        name = name.lower()
+        return name in self.tracking_params or name.startswith(self.tracking_prefixes)
+
+    def compute(self, url):
+        url = url.strip()
+        scheme, sep, rest = url.partition("://")
+        scheme = scheme.lower()
+        if not sep or scheme not in DEFAULT_PORTS:
+            # arc://, about:, file:// and friends are already canonical enough
+            return url
+
+        rest = rest.split("#", 1)[0]
+        split_at = len(rest)
+        for c in "/?":
+            i = rest.find(c)
+            if 0 <= i < split_at:
+                split_at = i
+        authority, remainder = rest[:split_at], rest[split_at:]
+        path, _, query = remainder.partition("?")
+
+        hostport = authority.rpartition("@")[2]
+        host, port = hostport, ""
+        if hostport.startswith("["):
+            end = hostport.find("]")
+            if end > 0 and hostport[end + 1:end + 2] == ":":
+                host, port = hostport[:end + 1], hostport[end + 2:]
+        elif ":" in hostport:
+            host, _, port = hostport.rpartition(":")
+        host = host.lower().rstrip(".")
+        if port == DEFAULT_PORTS[scheme]:
+            port = ""
+
+        if len(path) > 1 and path.endswith("/"):
+            path = path.rstrip("/") or "/"
+        if not path:
+            path = "/"
+
+        if query:
+            kept = [p for p in query.split("&") if p and not self.is_tracking(p.split("=", 1)[0])]
+            query = "&".join(kept)
+
+        return (f"{scheme}://{host}{':' + port if port else ''}{path}"
+                f"{'?' + query if query else ''}")
+
+    def same_page(self, a, b):
+        return self.canonicalize(a) == self.canonicalize(b)
+
+    def host(self, url):
+        """Canonical host of a URL, '' for URLs without one"""
+        return urllib.parse.urlsplit(self.canonicalize(url)).hostname or ""
+
+
+def host_of_key(key):
+    """Host part of a canonical URL, without userinfo or port"""
+    parts = key.split("/", 3)
+    if len(parts) < 3 or not parts[0].endswith(":"):
+        return ""
+    host = parts[2].rpartition("@")[2]
+    if host.startswith("["):
+        return host[:host.find("]") + 1]
+    return host.partition(":")[0]
+
+
+canonicalizer = UrlCanonicalizer()
+canonical_url = canonicalizer.canonicalize
+
+
+def benchmark(count=1000000, unique=20000):
+    """Throughput on a million URLs: all distinct, then with typical repetition"""
+    templates = [
+        "https://Example.com:443/docs/page{}/?utm_source=news&id={}#top",
+        "http://www.site{}.org/path/to/article?fbclid=abc&q={}",
+        "https://sub.domain.co.uk/search?q=item{}&page={}",
+        "https://github.com/user{}/repo{}/",
+    ]
+    distinct = [templates[i % len(templates)].format(i, i * 7) for i in range(count)]
+    canonicalizer.canonicalize.cache_clear()
+    start = time.perf_counter()
+    for url in distinct:
+        canonicalizer.compute(url)
+    cold = time.perf_counter() - start
+    print(f"Canonicalized {count:,} distinct URLs in {cold:.2f} s "
+          f"({count / cold:,.0f}/s, {cold / count * 1e6:.2f} us each, uncached)")
+
+    repeated = [distinct[(i * 7919) % unique] for i in range(count)]
+    start = time.perf_counter()
+    for url in repeated:
+        canonical_url(url)
+    warm = time.perf_counter() - start
+    info = canonical_url.cache_info()
+    print(f"Canonicalized {count:,} URLs ({unique:,} distinct) in {warm:.2f} s "
+          f"({count / warm:,.0f}/s, {warm / count * 1e6:.2f} us each, "
+          f"hit rate {info.hits / max(1, info.hits + info.misses):.0%})")
+    for url in templates:
+        print(f"  {url.format(1, 2)}\n    -> {canonical_url(url.format(1, 2))}")
+
+
+if __name__ == "__main__":
+    benchmark()
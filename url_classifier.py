@@ -0,0 +1,184 @@
+# url_classifier.py (ADDRESS BAR TEXT -> URL OR SEARCH)
+import ipaddress
+import os
+import re
+import time
+import urllib.parse
+from url_canonicalizer import host_of_key
+
+PSL_FILE = os.path.join("assets", "public_suffix_list.dat")
+SEARCH_URL = "https://www.google.com/search?q={}"
+
+KNOWN_SCHEMES = ("http", "https", "ftp", "file", "arc", "about", "data", "view-source")
+INTRANET_SUFFIXES = (".local", ".localhost", ".internal", ".lan", ".home.arpa", ".corp")
+LABEL_RE = re.compile(r"^(?!-)[\w-]{1,63}(?<!-)$", re.UNICODE)
+TERMINAL = "$"
+
+
+def compile_psl(path=PSL_FILE):
+    """Build a trie of reversed labels: {'uk': {'co': {'$': 1}, '$': 1}}"""
+    root = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            rule = line.strip()
+            if not rule or rule.startswith("//"):
+                continue
+            rule = rule.split()[0].lower()
+            exception = rule.startswith("!")
+            labels = rule.lstrip("!").split(".")
+            node = root
+            for label in reversed(labels[1:] if exception else labels):
+                node = node.setdefault(label, {})
+            if exception:
+                # Stored on the parent so the walk can see it before descending
+                node.setdefault("!" + labels[0], {})
+            else:
+                node[TERMINAL] = 1
+    return root
+
+
+class UrlClassifier:
+    """Decides whether typed text is an address or a search query.
+
+    Hosts must end in a real public suffix (so "config.yaml" and "v1.2"
+    are searches), while IP literals, localhost, explicit ports and
+    intranet names are treated as addresses.
+    """
+
+    def __init__(self, search_url=SEARCH_URL):
+        self.search_url = search_url
+        self.trie = None
+
+    def public_suffix_length(self, labels):
+        """Number of trailing labels that form a listed public suffix (0 if none)"""
+        if self.trie is None:
+            # Compiled on first use (~20 ms) rather than at import
+            try:
+                self.trie = compile_psl()
+            except OSError as e:
+                print(f"Error loading public suffix list: {e}")
+                self.trie = {}
+        node = self.trie
+        matched = 0
+        for depth, label in enumerate(reversed(labels)):
+            if "!" + label in node:
+                return depth
+            child = node.get(label)
+            if child is None:
+                child = node.get("*")
+                if child is None:
+                    break
+            if TERMINAL in child:
+                matched = depth + 1
+            node = child
+        return matched
+
+    def is_public_host(self, host):
+        labels = host.split(".")
+        if not all(LABEL_RE.match(label) for label in labels):
+            return False
+        suffix = self.public_suffix_length(labels)
+        # Needs at least one label in front of the suffix, e.g. "example" in example.co.uk
+        return 0 < suffix < len(labels)
+
+    def registrable_domain(self, host):
+        """The site a host belongs to, e.g. google.co.uk for mail.google.co.uk"""
+        host = host.lower().rstrip(".")
+        if not host or self.is_ip_literal(host.strip("[]")):
+            return host
+        labels = host.split(".")
+        suffix = self.public_suffix_length(labels)
+        if suffix == 0 or suffix >= len(labels):
+            return host
+        return ".".join(labels[-(suffix + 1):])
+
+    def site_matcher(self, host):
+        """Predicate on canonical URLs: is the URL on the same site as host?"""
+        site = self.registrable_domain(host)
+        sites_by_host = {}
+
+        def matches(key):
+            key_host = host_of_key(key)
+            result = sites_by_host.get(key_host)
+            if result is None:
+                result = sites_by_host[key_host] = self.registrable_domain(key_host) == site
+            return result
+        return matches
+
+    def classify(self, text):
+        """Return ('url', url) or ('search', query)"""
+        text = text.strip()
+        if not text:
+            return ('search', text)
+
+        scheme, sep, _ = text.partition(":")
+        if sep and scheme.lower() in KNOWN_SCHEMES:
+            return ('url', text)
+        if any(c.isspace() for c in text):
+            return ('search', text)
+
+        # Split "host:port/path?query" into its host and port
+        authority = re.split(r"[/?#]", text, 1)[0]
+        has_path = len(authority) < len(text)
+        host, port = authority, ""
+        if authority.startswith("["):
+            host, _, rest = authority[1:].partition("]")
+            port = rest[1:] if rest.startswith(":") else ""
+        elif authority.count(":") == 1:
+            host, port = authority.split(":")
+        host = host.lower().rstrip(".")
+        if port and not port.isdigit():
+            return ('search', text)
+
+        if self.is_ip_literal(host):
+            return ('url', "http://" + text)
+        if host == "localhost" or host.endswith(INTRANET_SUFFIXES):
+            return ('url', "http://" + text)
+        if "." not in host:
+            # "intranet/" or "server:8080" name a machine; a bare word is a search
+            if host and LABEL_RE.match(host) and (port or has_path and text[len(authority)] == "/"):
+                return ('url', "http://" + text)
+            return ('search', text)
+        if self.is_public_host(host):
+            return ('url', "https://" + text)
+        return ('search', text)
+
+    @staticmethod
+    def is_ip_literal(host):
+        try:
+            ipaddress.ip_address(host)
+            return True
+        except ValueError:
+            return False
+
+    def search_url_for(self, query):
+        return self.search_url.format(urllib.parse.quote_plus(query))
+
+    def to_url(self, text):
+        """Navigable URL for typed text: the address itself or a search"""
+        kind, value = self.classify(text)
+        return value if kind == 'url' else self.search_url_for(value)
+
+
+classifier = UrlClassifier()
+
+
+def benchmark(iterations=200000):
+    samples = [
+        "example.com", "config.yaml", "v1.2", "news.bbc.co.uk/sport", "localhost:8000",
+        "192.168.1.1", "intranet/", "how to cook rice", "https://github.com", "python",
+        "foo.blogspot.com", "README.md", "[::1]:8080/x", "city.kawasaki.jp", "server:3000",
+    ]
+    classifier.classify("warm.up")
+    start = time.perf_counter()
+    for i in range(iterations):
+        classifier.classify(samples[i % len(samples)])
+    elapsed = time.perf_counter() - start
+    print(f"Classified {iterations} inputs in {elapsed:.2f} s "
+          f"({iterations / elapsed:,.0f}/s, {elapsed / iterations * 1e6:.2f} us each)")
+    for sample in samples:
+        print(f"  {sample!r:28} -> {classifier.classify(sample)}")
+
+
+if __name__ == "__main__":
+    benchmark()
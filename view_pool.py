@@ -0,0 +1,131 @@
+# view_pool.py (PRE-WARMED WEB VIEWS FOR NEW TABS)
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtCore import *
+from collections import deque
+import json
+import os
+from tracing import tracer
+
+
+class ViewPool(QObject):
+    """Keeps a few web views (and one rendered landing page) ready for new tabs.
+
+    Views are created one per idle tick so filling the pool never blocks
+    input. Taking a view schedules a refill. Time-to-visible for every new
+    tab is recorded, whether it came from the pool or not.
+    """
+
+    # Shared by every window's pool so metrics cover the whole session:
+    # percentiles come from the latest samples, counts and maxima from all
+    timings = {'landing': deque(maxlen=1000), 'browser': deque(maxlen=1000)}
+    # (kind, pooled) -> {'count': n, 'max_ms': ms}
+    totals = {}
+
+    def __init__(self, landing_factory, size=2, parent=None, view_factory=QWebEngineView):
+        super().__init__(parent)
+        self.landing_factory = landing_factory
+        self.view_factory = view_factory
+        self.size = size
+        self.views = []
+        self.landing = None
+        self.landing_ready = False
+        self.refill_scheduled = False
+        self.closed = False
+        self.schedule_refill()
+
+    def schedule_refill(self):
+        if not self.refill_scheduled and not self.closed:
+            self.refill_scheduled = True
+            # A zero timeout runs once the event queue is empty
+            QTimer.singleShot(0, self.refill_step)
+
+    def refill_step(self):
+        self.refill_scheduled = False
+        if self.closed:
+            return
+        if self.landing is None:
+            self.landing = self.landing_factory()
+            self.landing_ready = False
+            self.landing.loadFinished.connect(self.on_landing_loaded)
+        elif len(self.views) < self.size:
+            view = self.view_factory()
+            # Loading a blank page starts the render process ahead of time
+            view.setUrl(QUrl("about:blank"))
+            self.views.append(view)
+        else:
+            return
+        self.schedule_refill()
+
+    def on_landing_loaded(self, ok):
+        self.landing_ready = ok
+
+    def take_landing(self):
+        """A landing page, pre-rendered when the pool had one ready"""
+        landing = self.landing
+        if landing is not None and self.landing_ready:
+            landing.loadFinished.disconnect(self.on_landing_loaded)
+            self.landing = None
+            self.schedule_refill()
+            return landing, True
+        return self.landing_factory(), False
+
+    def take_browser_view(self):
+        pooled = bool(self.views)
+        view = self.views.pop(0) if pooled else self.view_factory()
+        self.schedule_refill()
+        return view, pooled
+
+    def track_visible(self, kind, view, pooled, ready_signal=None):
+        """Record time from the tab request until its content is visible"""
+        timer = QElapsedTimer()
+        timer.start()
+
+        def done(*args):
+            elapsed = timer.elapsed()
+            self.timings[kind].append({'ms': elapsed, 'pooled': pooled})
+            total = self.totals.setdefault((kind, pooled), {'count': 0, 'max_ms': 0})
+            total['count'] += 1
+            total['max_ms'] = max(total['max_ms'], elapsed)
+            tracer.instant("tab_visible", kind=kind, ms=elapsed, pooled=pooled)
+            if ready_signal is not None:
+                ready_signal.disconnect(done)
+
+        if ready_signal is None:
+            QTimer.singleShot(0, done)
+        else:
+            ready_signal.connect(done)
+
+    @classmethod
+    def metrics(cls):
+        summary = {}
+        for (kind, pooled), total in cls.totals.items():
+            values = sorted(s['ms'] for s in cls.timings[kind] if s['pooled'] == pooled)
+            if values:
+                summary[f"{kind}_{'pooled' if pooled else 'cold'}"] = {
+                    'count': total['count'],
+                    'p50_ms': values[len(values) // 2],
+                    'p95_ms': values[min(len(values) - 1, int(len(values) * 0.95))],
+                    'max_ms': total['max_ms'],
+                }
+        return summary
+
+    @classmethod
+    def export_metrics(cls, path=None):
+        """Write time-to-visible percentiles to ARC_TAB_METRICS if set"""
+        path = path or os.environ.get("ARC_TAB_METRICS")
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(cls.metrics(), f, indent=2)
+        except OSError as e:
+            print(f"Error writing tab metrics: {e}")
+
+    def clear(self):
+        self.closed = True
+        for view in self.views:
+            view.deleteLater()
+        self.views = []
+        if self.landing is not None:
+            self.landing.deleteLater()
+            self.landing = None